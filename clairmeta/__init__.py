@@ -2,10 +2,6 @@
 # See LICENSE for more information
 
 from clairmeta.info import __license__, __author__, __version__
-from clairmeta.dcp import DCP
-from clairmeta.sequence import Sequence
-from clairmeta.logger import get_log
-from clairmeta.utils.probe import check_command, PROBE_DEPS
 
 
 __all__ = ["DCP", "Sequence"]
@@ -14,7 +10,17 @@ __author__ = __author__
 __version__ = __version__
 
 
-# External dependencies check
-for d in PROBE_DEPS:
-    if not check_command(d):
-        get_log().warning("Missing dependency : {}".format(d))
+def __getattr__(name):
+    # Package classes are imported on first access only, this keep the
+    # command line tool startup fast. External dependencies are located
+    # (and reported if missing) the first time they are needed, see
+    # ``clairmeta.utils.probe.get_capabilities``.
+    if name == "DCP":
+        from clairmeta.dcp import DCP
+
+        return DCP
+    if name == "Sequence":
+        from clairmeta.sequence import Sequence
+
+        return Sequence
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
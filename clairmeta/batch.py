@@ -0,0 +1,235 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import re
+import json
+import hashlib
+import time
+import importlib
+import multiprocessing
+import concurrent.futures
+from datetime import datetime
+
+from clairmeta.logger import get_log, disable_log
+from clairmeta.settings import DCP_CHECK_SETTINGS
+from clairmeta.profile import DCP_CHECK_PROFILE
+from clairmeta.utils.throttle import split_io_settings
+from clairmeta.utils.scheduler import device_of
+from clairmeta.exception import ClairMetaException
+
+ASSETMAP_NAMES = ["ASSETMAP", "ASSETMAP.xml"]
+
+# Per worker process state, initialized once by ``init_worker``.
+_worker_io_semaphores = None
+
+
+def find_packages(root):
+    """Discover DCP packages in a directory tree.
+
+    A package is any directory containing an AssetMap, sub directories of
+    a package are not explored any further.
+
+    Args:
+        root (str): Base directory path.
+
+    Returns:
+        Sorted list of packages absolute path.
+
+    Raises:
+        ClairMetaException: If ``root`` is not a valid directory.
+
+    """
+    if not os.path.isdir(root):
+        raise ClairMetaException("{} is not a valid folder".format(root))
+
+    packages = []
+
+    for dirpath, dirnames, filenames in os.walk(os.path.abspath(root)):
+        if any(f in filenames for f in ASSETMAP_NAMES):
+            packages.append(dirpath)
+            dirnames[:] = []
+        else:
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+
+    return sorted(packages)
+
+
+def report_name(root, path):
+    """Build a unique report file name for a package.
+
+    The package path relative to ``root`` is made a valid file name and
+    suffixed by a short hash of it : distinct paths mapped to the same name
+    (eg. ``a/b`` and ``a_b``) don't overwrite each other, nor the batch
+    ``summary.json`` file.
+
+    >>> report_name('/lib', '/lib/a/DCP_1')
+    'a_DCP_1-c67fe659.json'
+    >>> report_name('/lib', '/lib/a_DCP_1')
+    'a_DCP_1-e055806d.json'
+
+    """
+    rel = os.path.relpath(path, root)
+    if rel == ".":
+        rel = os.path.basename(os.path.normpath(path))
+    rel = rel.replace(os.sep, "/")
+    digest = hashlib.sha1(rel.encode("utf-8")).hexdigest()[:8]
+    return "{}-{}.json".format(re.sub(r"[^\w.-]", "_", rel), digest)
+
+
+def init_worker(io_semaphores):
+    """Worker process initializer.
+
+    Import all check modules once so that each package checked by this
+    worker reuse them, XSD schemas are also cached per process on first
+    use (see ``clairmeta.utils.xml.get_xsd_schema``).
+
+    Args:
+        io_semaphores (dict): Shared semaphores (by device) limiting the
+            number of packages being read at the same time on a device.
+
+    """
+    global _worker_io_semaphores
+    _worker_io_semaphores = io_semaphores
+
+    disable_log()
+
+    prefix = DCP_CHECK_SETTINGS["module_prefix"]
+    for k in DCP_CHECK_SETTINGS["modules"]:
+        importlib.import_module("clairmeta." + prefix + k)
+
+
+def check_package(path, profile, report_path):
+    """Check one package, executed in a worker process.
+
+    XML parsing is done first without holding the I/O semaphore of the
+    package device, essence probing and checking (including hashing) are
+    done while holding it.
+
+    Args:
+        path (str): Package absolute path.
+        profile (dict): Checker profile.
+        report_path (str): Report (json) output file path.
+
+    Returns:
+        Dictionary summarizing the check result of ``path``.
+
+    """
+    from clairmeta.dcp import DCP
+
+    start = time.time()
+    summary = {
+        "path": path,
+        "report": report_path,
+        "valid": False,
+        "errors": {},
+        "exception": "",
+    }
+
+    try:
+        dcp = DCP(path)
+        dcp.parse(probe=False)
+
+        with _worker_io_semaphores[device_of(path)]:
+            status, report = dcp.check(profile=profile)
+
+        with open(report_path, "w") as f:
+            json.dump(report.to_dict(), f, sort_keys=True, indent=2)
+
+        summary["valid"] = status
+        summary["errors"] = {
+            c: len(report.errors_by_criticality(c))
+            for c in ["ERROR", "WARNING", "INFO"]
+        }
+    except Exception as e:
+        summary["exception"] = str(e)
+
+    summary["seconds_elapsed"] = time.time() - start
+    return summary
+
+
+def check_batch(
+    root, output, profile=DCP_CHECK_PROFILE, jobs=None, io_jobs=None, callback=None
+):
+    """Check all packages found in a directory tree.
+
+    Packages are checked in parallel using a process pool, a per package
+    report is written in ``output`` along with a ``summary.json`` file.
+
+    Args:
+        root (str): Base directory path.
+        output (str): Reports output directory, created if needed.
+        profile (dict, optional): Checker profile.
+        jobs (int, optional): Number of worker processes, default to the
+            number of CPU.
+        io_jobs (int, optional): Maximum number of packages being read at
+            the same time on each device (file system), default to
+            ``jobs``. Packages on distinct devices are read in parallel.
+        callback (function, optional): Called with each package summary
+            dictionary as soon as the package check is done.
+
+    Returns:
+        Tuple (boolean, dict) of global check status and summary.
+
+    """
+    packages = find_packages(root)
+    jobs = jobs or os.cpu_count() or 1
+    io_jobs = min(io_jobs or jobs, jobs)
+
+    if not os.path.isdir(output):
+        os.makedirs(output)
+
+    log = get_log()
+    log.info("Checking {} package(s) found in {}".format(len(packages), root))
+
+    devices = {device_of(p) for p in packages}
+
+    # Read limits are enforced per process
+    if profile.get("io"):
+        readers = min(jobs, io_jobs * len(devices)) or 1
+        profile = dict(profile, io=split_io_settings(profile["io"], readers))
+
+    start = time.time()
+    results = []
+    context = multiprocessing.get_context()
+    io_semaphores = {d: context.BoundedSemaphore(io_jobs) for d in devices}
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(io_semaphores,),
+    ) as executor:
+        futures = [
+            executor.submit(
+                check_package,
+                path,
+                profile,
+                os.path.join(output, report_name(root, path)),
+            )
+            for path in packages
+        ]
+
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if callback:
+                callback(result)
+
+    results.sort(key=lambda r: r["path"])
+    summary = {
+        "root": os.path.abspath(root),
+        "date": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        "duration_seconds": time.time() - start,
+        "jobs": jobs,
+        "io_jobs": io_jobs,
+        "packages_count": len(results),
+        "packages_valid": len([r for r in results if r["valid"]]),
+        "valid": all([r["valid"] for r in results]),
+        "packages": results,
+    }
+
+    with open(os.path.join(output, "summary.json"), "w") as f:
+        json.dump(summary, f, sort_keys=True, indent=2)
+
+    return summary["valid"], summary
@@ -8,16 +8,14 @@ import os
 import argparse
 import sys
 import json
-import dicttoxml
-import pprint
 
 from clairmeta import DCP, Sequence
 from clairmeta.logger import disable_log
 from clairmeta.info import __version__
-from clairmeta.profile import load_profile, DCP_CHECK_PROFILE
+from clairmeta.profile import load_profile, get_default_profile, DCP_CHECK_PROFILE
 from clairmeta.settings import SEQUENCE_SETTINGS
-from clairmeta.utils.xml import prettyprint_xml
-from clairmeta.utils.file import ConsoleProgress
+from clairmeta.utils.file import ConsoleProgress, write_digest_manifest
+from clairmeta.utils.throttle import READ_MODES
 
 
 package_type_map = {
@@ -34,40 +32,92 @@ package_check_settings = {
 }
 
 
+def format_dict(content):
+    """Format a dictionary as a pretty printed python dict."""
+    import pprint
+
+    return pprint.pformat(content)
+
+
+def format_xml(content, root):
+    """Format a dictionary as a pretty printed XML document."""
+    import dicttoxml
+    from clairmeta.utils.xml import prettyprint_xml
+
+    xml_str = dicttoxml.dicttoxml(content, custom_root=root, ids=False, attr_type=False)
+    return prettyprint_xml(xml_str)
+
+
+def write_manifests(path, digests):
+    """Write a sidecar manifest next to the package for each digest."""
+    algorithms = {a for d in digests.values() for a in d}
+    for algorithm in algorithms:
+        manifest = "{}.{}".format(os.path.normpath(path), algorithm)
+        write_digest_manifest(manifest, digests, algorithm)
+
+
+def print_ndjson_check(check):
+    """Print a completed check execution as a single json line."""
+    print(json.dumps(check.to_dict(), sort_keys=True, separators=(",", ":")))
+    sys.stdout.flush()
+
+
 def cli_check(args):
     try:
         if args.type == "dcp":
-            check_profile = DCP_CHECK_PROFILE
+            check_profile = get_default_profile()
             callback = None
+            check_callback = None
 
             if args.profile:
                 path = os.path.abspath(args.profile)
                 check_profile = load_profile(path)
             if args.log:
                 check_profile["log_level"] = args.log
+            if args.fail_fast:
+                check_profile["fail_fast"] = True
+            if args.read_limit is not None:
+                check_profile.setdefault("io", {})["read_limit"] = args.read_limit
+            if args.idle_priority:
+                check_profile.setdefault("io", {})["idle_priority"] = True
+            if args.read_mode:
+                check_profile.setdefault("io", {})["read_mode"] = args.read_mode
+            if args.digests:
+                check_profile["digests"] = args.digests.split(",")
+            if args.library:
+                check_profile["library"] = os.path.abspath(args.library)
             if args.progress:
                 callback = ConsoleProgress()
             if args.format != "text":
                 disable_log()
+            if args.format == "ndjson":
+                check_callback = print_ndjson_check
 
-            status, report = DCP(args.path, kdm=args.kdm, pkey=args.key).check(
-                profile=check_profile, ov_path=args.ov, hash_callback=callback
+            dcp = DCP(args.path, kdm=args.kdm, pkey=args.key)
+            status, report = dcp.check(
+                profile=check_profile,
+                ov_path=args.ov,
+                hash_callback=callback,
+                check_callback=check_callback,
             )
 
-            if args.format == "dict":
-                msg = pprint.pformat(report.to_dict())
+            if args.manifest:
+                write_manifests(dcp.path, report.digests)
+
+            if args.format == "ndjson":
+                msg = json.dumps(
+                    {"summary": report.summary_dict()},
+                    sort_keys=True,
+                    separators=(",", ":"),
+                )
+            elif args.format == "dict":
+                msg = format_dict(report.to_dict())
             elif args.format == "json":
                 msg = json.dumps(
                     report.to_dict(), sort_keys=True, indent=2, separators=(",", ": ")
                 )
             elif args.format == "xml":
-                xml_str = dicttoxml.dicttoxml(
-                    report.to_dict(),
-                    custom_root="ClairmetaCheck",
-                    ids=False,
-                    attr_type=False,
-                )
-                msg = prettyprint_xml(xml_str)
+                msg = format_xml(report.to_dict(), "ClairmetaCheck")
 
             if args.format != "text":
                 return True, msg
@@ -87,6 +137,143 @@ def cli_check(args):
     return status, msg
 
 
+def cli_check_batch(args):
+    from clairmeta.batch import check_batch
+
+    try:
+        check_profile = DCP_CHECK_PROFILE
+        if args.profile:
+            check_profile = load_profile(os.path.abspath(args.profile))
+
+        def print_result(result):
+            print(
+                "DCP - {} - Check {}".format(
+                    result["path"], "succeeded" if result["valid"] else "failed"
+                )
+            )
+
+        disable_log()
+        status, summary = check_batch(
+            args.root,
+            args.output,
+            profile=check_profile,
+            jobs=args.jobs,
+            io_jobs=args.io_jobs,
+            callback=print_result,
+        )
+
+        msg = "{} - {}/{} package(s) valid - Summary : {}".format(
+            args.root,
+            summary["packages_valid"],
+            summary["packages_count"],
+            os.path.join(args.output, "summary.json"),
+        )
+        return status, msg
+    except Exception as e:
+        return False, "Error : {}".format(e)
+
+
+def cli_library(args):
+    from clairmeta.library import LibraryIndex
+
+    try:
+        index = LibraryIndex(args.index)
+        for root in args.add or []:
+            index.add_root(root)
+
+        disable_log()
+        stats = index.scan()
+        msg = "{} - {} package(s), {} indexed, {} removed".format(
+            args.index, stats["packages"], stats["indexed"], stats["removed"]
+        )
+        return True, msg
+    except Exception as e:
+        return False, "Error : {}".format(e)
+
+
+def cli_manifest(args):
+    try:
+        disable_log()
+        setting = package_check_settings[args.type]
+        sequence = Sequence(args.path)
+        callback = ConsoleProgress() if args.progress else None
+
+        if args.verify:
+            sequence.verify_manifest(
+                args.verify, setting, journal_path=args.journal, callback=callback
+            )
+            msg = "{} - {} - Verification succeeded".format(
+                args.type.upper(), args.path
+            )
+        else:
+            extension = "mhl" if args.format == "mhl" else args.algorithm
+            manifest = args.output or "{}.{}".format(
+                os.path.normpath(args.path), extension
+            )
+            digests = sequence.make_manifest(
+                manifest, setting, args.algorithm, args.format, callback
+            )
+            msg = "{} - {} file(s) - Manifest : {}".format(
+                args.path, len(digests), manifest
+            )
+        return True, msg
+    except Exception as e:
+        return False, "Error : {}".format(e)
+
+
+def cli_serve(args):
+    from clairmeta.server import serve
+
+    try:
+        serve(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            jobs=args.jobs,
+            queue_size=args.queue_size,
+        )
+        return True, "Server stopped"
+    except Exception as e:
+        return False, "Error : {}".format(e)
+
+
+def cli_watch(args):
+    from clairmeta.watch import watch_folder
+
+    try:
+        check_profile = DCP_CHECK_PROFILE
+        if args.profile:
+            check_profile = load_profile(os.path.abspath(args.profile))
+
+        def print_result(path, status, report):
+            if report is None:
+                print("DCP - {} - Error : {}".format(path, status))
+            else:
+                print(
+                    "DCP - {} - Check {}".format(
+                        path, "succeeded" if status else "failed"
+                    )
+                )
+            sys.stdout.flush()
+
+        disable_log()
+        watch_folder(
+            args.root,
+            args.output,
+            profile=check_profile,
+            callback=print_result,
+            settle_time=args.settle,
+            poll_interval=args.interval,
+            hash_jobs=args.hash_jobs,
+            use_inotify=not args.poll,
+        )
+        return True, "Watch stopped"
+    except KeyboardInterrupt:
+        return True, "Watch stopped"
+    except Exception as e:
+        return False, "Error : {}".format(e)
+
+
 def cli_probe(args):
     try:
         disable_log()
@@ -100,14 +287,11 @@ def cli_probe(args):
         res = obj_type(args.path, **kwargs).parse()
 
         if args.format == "dict":
-            msg = pprint.pformat(res)
+            msg = format_dict(res)
         elif args.format == "json":
             msg = json.dumps(res, sort_keys=True, indent=2, separators=(",", ": "))
         elif args.format == "xml":
-            xml_str = dicttoxml.dicttoxml(
-                res, custom_root="ClairmetaProbe", ids=False, attr_type=False
-            )
-            msg = prettyprint_xml(xml_str)
+            msg = format_xml(res, "ClairmetaProbe")
 
         return True, msg
     except Exception as e:
@@ -130,18 +314,150 @@ def get_parser():
     parser.add_argument(
         "-format",
         default="text",
-        choices=["text", "dict", "xml", "json"],
-        help="output format [dcp]",
+        choices=["text", "dict", "xml", "json", "ndjson"],
+        help="output format, ndjson stream each check as completed [dcp]",
     )
     parser.add_argument(
         "-progress", action="store_true", help="hash progress bar [dcp]"
     )
     parser.add_argument("-ov", default=None, help="ov package path [dcp]")
+    parser.add_argument(
+        "-library",
+        default=None,
+        help="library index used to find the ov package if -ov is not set [dcp]",
+    )
+    parser.add_argument(
+        "-fail_fast", action="store_true", help="stop on first error [dcp]"
+    )
+    parser.add_argument(
+        "-digests",
+        default=None,
+        help="additional digests computed with the pkl hash, eg. md5,xxh64 [dcp]",
+    )
+    parser.add_argument(
+        "-manifest",
+        action="store_true",
+        help="write a sidecar manifest next to the package for each digest [dcp]",
+    )
+    parser.add_argument(
+        "-read_limit", type=float, default=None, help="read limit in MB/s [dcp]"
+    )
+    parser.add_argument(
+        "-read_mode",
+        default=None,
+        choices=READ_MODES,
+        help="page cache usage while reading files [dcp]",
+    )
+    parser.add_argument(
+        "-idle_priority",
+        action="store_true",
+        help="run external tools at idle i/o priority [dcp]",
+    )
     parser.add_argument(
         "-type", choices=package_type_map.keys(), required=True, help="package type"
     )
     parser.set_defaults(func=cli_check)
 
+    parser = subparsers.add_parser(
+        "check-batch", help="Validation of all packages found in a folder"
+    )
+    parser.add_argument("root", help="absolute library path")
+    parser.add_argument("-output", default=os.getcwd(), help="reports output folder")
+    parser.add_argument("-profile", default=None, help="json profile")
+    parser.add_argument(
+        "-jobs", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "-io_jobs",
+        type=int,
+        default=None,
+        help="maximum number of packages read concurrently per device",
+    )
+    parser.set_defaults(func=cli_check_batch)
+
+    parser = subparsers.add_parser(
+        "library", help="Update the library asset index (ov discovery)"
+    )
+    parser.add_argument("index", help="index database path")
+    parser.add_argument(
+        "-add", action="append", default=None, help="add a library root folder"
+    )
+    parser.set_defaults(func=cli_library)
+
+    parser = subparsers.add_parser(
+        "manifest", help="Sequence checksum manifest generation and verification"
+    )
+    parser.add_argument("path", help="absolute package path")
+    parser.add_argument(
+        "-type",
+        choices=package_check_settings.keys(),
+        required=True,
+        help="package type",
+    )
+    parser.add_argument(
+        "-algorithm",
+        default="md5",
+        choices=["md5", "sha1", "xxh64"],
+        help="digest algorithm",
+    )
+    parser.add_argument(
+        "-format", default="mhl", choices=["mhl", "text"], help="manifest format"
+    )
+    parser.add_argument(
+        "-output",
+        default=None,
+        help="manifest path, next to the package by default",
+    )
+    parser.add_argument(
+        "-verify", default=None, help="verify the package against this manifest"
+    )
+    parser.add_argument(
+        "-journal",
+        default=None,
+        help="verification journal path, resume an interrupted verification",
+    )
+    parser.add_argument("-progress", action="store_true", help="hash progress bar")
+    parser.set_defaults(func=cli_manifest)
+
+    parser = subparsers.add_parser(
+        "serve", help="Long lived server executing probe and check jobs"
+    )
+    parser.add_argument("-host", default="127.0.0.1", help="listening address")
+    parser.add_argument("-port", type=int, default=8085, help="listening port")
+    parser.add_argument(
+        "-socket", default=None, help="unix socket path (instead of host / port)"
+    )
+    parser.add_argument(
+        "-jobs", type=int, default=2, help="number of jobs executed concurrently"
+    )
+    parser.add_argument(
+        "-queue_size", type=int, default=64, help="maximum number of pending jobs"
+    )
+    parser.set_defaults(func=cli_serve)
+
+    parser = subparsers.add_parser(
+        "watch", help="Validation of packages copied in a folder once complete"
+    )
+    parser.add_argument("root", help="absolute watched folder path")
+    parser.add_argument("-output", default=os.getcwd(), help="reports output folder")
+    parser.add_argument("-profile", default=None, help="json profile")
+    parser.add_argument(
+        "-settle",
+        type=float,
+        default=10,
+        help="seconds without modification for a file to be complete",
+    )
+    parser.add_argument(
+        "-interval", type=float, default=2, help="polling interval in seconds"
+    )
+    parser.add_argument(
+        "-hash_jobs", type=int, default=2, help="number of files hashed concurrently"
+    )
+    parser.add_argument(
+        "-poll", action="store_true", help="disable inotify, always poll"
+    )
+    parser.set_defaults(func=cli_watch)
+
     parser = subparsers.add_parser("probe", help="Package metadata extraction")
     parser.add_argument("path", help="absolute package path")
     parser.add_argument("-kdm", default=None, help="kdm with encrypted keys")
@@ -2,8 +2,11 @@
 # See LICENSE for more information
 
 import os
+import json
 import time
+import threading
 
+from clairmeta.info import __version__
 from clairmeta.logger import get_log
 from clairmeta.dcp_utils import list_cpl_assets
 from clairmeta.dcp_parse import (
@@ -15,25 +18,61 @@ from clairmeta.dcp_parse import (
 )
 from clairmeta.dcp_utils import (
     list_am_assets,
-    list_pkl_assets,
     cpl_extract_characteristics,
     cpl_probe_asset,
     kdm_extract_key_info,
+    UUIDIndex,
 )
-from clairmeta.dcp_check import CheckerBase
-from clairmeta.utils.xml import parse_xml
+from clairmeta.utils.xml import xml_root_name
 from clairmeta.utils.sys import remove_key_dict
 from clairmeta.utils.file import folder_size, human_size
-from clairmeta.utils.crypto import decrypt_b64
+from clairmeta.utils.throttle import io_context
 from clairmeta.utils.isdcf import parse_isdcf_string
-from clairmeta.settings import DCP_SETTINGS
+from clairmeta.model import Package
 from clairmeta.profile import DCP_CHECK_PROFILE
-from clairmeta.report import CheckReport
-from clairmeta.exception import ClairMetaException
+from clairmeta.exception import ClairMetaException, SnapshotException
 
 
 class DCP(object):
-    """Digital Cinema Package abstraction."""
+    """Digital Cinema Package abstraction.
+
+    Package components are parsed lazily on first access, along with the
+    components they depend on (eg. ``list_cpl`` only requires the AssetMap
+    and CPL files). ``parse`` initialize all of them and probe assets.
+
+    """
+
+    # Component : (init method, dependencies)
+    COMPONENTS = {
+        "files": ("init_package_files", ()),
+        "assetmap": ("init_assetmap", ("files",)),
+        "volindex": ("init_volindex", ("files",)),
+        "pkl": ("init_pkl", ("assetmap",)),
+        "cpl": ("init_cpl", ("assetmap",)),
+        "kdm": ("init_kdm", ("files",)),
+    }
+
+    # Snapshot format version, see ``save_snapshot``
+    SNAPSHOT_VERSION = 1
+    # KDM are never saved (decrypted keys), they are parsed again if needed
+    SNAPSHOT_COMPONENTS = ["files", "assetmap", "volindex", "pkl", "cpl"]
+    SNAPSHOT_ATTRIBUTES = [
+        "_list_files",
+        "_xml_roots",
+        "_list_am_path",
+        "_list_am",
+        "_list_asset",
+        "_list_vol_path",
+        "_list_vol",
+        "_list_pkl_path",
+        "_list_pkl",
+        "_list_cpl_path",
+        "_list_cpl",
+        "_schema",
+        "_package_type",
+        "_size",
+        "_probeb",
+    ]
 
     def __init__(self, path, kdm=None, pkey=None):
         """DCP constructor.
@@ -55,18 +94,46 @@ class DCP(object):
         self.path = os.path.normpath(path)
         self.kdm = os.path.normpath(kdm) if kdm else None
         self.pkey = os.path.normpath(pkey) if pkey else None
-        self.schema = "Unknown"
-        self.package_type = "Unknown"
         self.foreign_files = []
-        self.size = folder_size(path)
         self.log = get_log()
-
+        self.uuid_index = UUIDIndex()
+
+        self._schema = "Unknown"
+        self._package_type = "Unknown"
+        self._size = None
+        self._metadata = None
+        self._package = None
+        self._initialized = set()
+        self._require_lock = threading.RLock()
         self._probeb = False
         self._parsed = False
 
+    def require(self, *components):
+        """Initialize package components and their dependencies, once.
+
+        Args:
+            components (str): Components names, see ``COMPONENTS``.
+
+        """
+        for name in components:
+            if name in self._initialized:
+                continue
+
+            # Shared packages (eg. cached OV) are accessed by concurrent checks
+            with self._require_lock:
+                if name in self._initialized:
+                    continue
+
+                init, depends = self.COMPONENTS[name]
+                self.require(*depends)
+                getattr(self, init)()
+                self._initialized.add(name)
+                self.reset_metadata()
+
     def init_package_files(self):
         """List all files present in DCP."""
         self._list_files = []
+        self._xml_roots = {}
         for dirpath, dirnames, filenames in os.walk(self.path):
             for f in sorted(filenames):
                 fullpath = os.path.join(dirpath, f)
@@ -89,8 +156,9 @@ class DCP(object):
         ]
 
         for c in candidates:
-            nodes = parse_xml(c, namespaces=DCP_SETTINGS["xmlns"])
-            if nodes and root_name in nodes:
+            if c not in self._xml_roots:
+                self._xml_roots[c] = xml_root_name(c)
+            if self._xml_roots[c] == root_name:
                 xml_list.append(c)
 
         return xml_list
@@ -100,6 +168,8 @@ class DCP(object):
         self._list_am_path = self.filter_files(["ASSETMAP", "ASSETMAP.xml"])
         self._list_am = [assetmap_parse(f) for f in self._list_am_path]
         self._list_am = [am for am in self._list_am if am is not None]
+        for am in self._list_am:
+            self.uuid_index.add_assetmap(am)
 
         # In the improbable case of multiple Assetmap found in the folder,
         # flatten asset list.
@@ -112,7 +182,7 @@ class DCP(object):
 
         # Schema (IOP or SMPTE) is assumed to be the one found for the Assetmap
         if self._list_am:
-            self.schema = self._list_am[0]["Info"]["AssetMap"]["Schema"]
+            self._schema = self._list_am[0]["Info"]["AssetMap"]["Schema"]
 
     def init_volindex(self):
         """Find DCP VolIndex."""
@@ -125,8 +195,12 @@ class DCP(object):
         self._list_pkl_path = self.filter_xml_by_root("PackingList")
         self._list_pkl = [pkl_parse(f) for f in self._list_pkl_path]
         self._list_pkl = [pkl for pkl in self._list_pkl if pkl is not None]
+        for pkl in self._list_pkl:
+            self.uuid_index.add_pkl(pkl)
 
         self.pkl_find_path()
+        if "cpl" in self._initialized:
+            self.cpl_find_pkl()
 
     def pkl_find_path(self):
         """Find path for each PKL assets (using UUID and AssetMap)."""
@@ -142,9 +216,13 @@ class DCP(object):
         self._list_cpl_path = self.filter_xml_by_root("CompositionPlaylist")
         self._list_cpl = [cpl_parse(f) for f in self._list_cpl_path]
         self._list_cpl = [cpl for cpl in self._list_cpl if cpl is not None]
+        for cpl in self._list_cpl:
+            self.uuid_index.add_cpl(cpl)
 
-        self.cpl_find_pkl()
+        if "pkl" in self._initialized:
+            self.cpl_find_pkl()
         self.cpl_link_assets()
+        self.cpl_parse_metadata()
 
     def init_kdm(self):
         """Find DCP KeyDeliveryMessage."""
@@ -154,30 +232,29 @@ class DCP(object):
         self._list_kdm = [kdm_parse(f) for f in self._list_kdm_path]
         self._list_kdm = [kdm for kdm in self._list_kdm if kdm is not None]
 
-        if not self.pkey or not os.path.exists(self.pkey):
-            return
+        if self.pkey and os.path.exists(self.pkey):
+            from clairmeta.utils.crypto import decrypt_b64
+
+            for kdm in self._list_kdm:
+                for _, key in kdm["Info"]["KDM"]["Keys"].items():
+                    plain = decrypt_b64(key["Cipher"], self.pkey)
+                    key.update(kdm_extract_key_info(plain))
 
         for kdm in self._list_kdm:
-            for _, key in kdm["Info"]["KDM"]["Keys"].items():
-                plain = decrypt_b64(key["Cipher"], self.pkey)
-                key.update(kdm_extract_key_info(plain))
+            self.uuid_index.add_kdm(kdm)
 
     def cpl_find_pkl(self):
         """Find PKL that reference the CPL."""
         for cpl in self._list_cpl:
             cpl_node = cpl["Info"]["CompositionPlaylist"]
-            cpl_id = cpl_node["Id"]
-
-            for pkl in self._list_pkl:
-                assets = list(list_pkl_assets(pkl))
-                uuids = [asset_id for asset_id, _, _ in assets]
+            pkls = self.uuid_index.pkl_for_asset(cpl_node["Id"])
 
-                if cpl_id in uuids:
-                    cpl_node["PKLId"] = pkl["Info"]["PackingList"]["Id"]
+            if pkls:
+                cpl_node["PKLId"] = pkls[-1]["Info"]["PackingList"]["Id"]
 
     def cpl_link_assets(self):
         """Link assets for each reel with actual files in the package."""
-        self.package_type = "OV"
+        self._package_type = "OV"
 
         for cpl in self._list_cpl:
             cpl_type = "OV"
@@ -194,7 +271,7 @@ class DCP(object):
                     )
                 else:
                     cpl_type = "VF"
-                    self.package_type = "VF"
+                    self._package_type = "VF"
 
             cpl["CPLType"] = cpl_type
 
@@ -214,62 +291,132 @@ class DCP(object):
     @property
     def list_assetmap(self):
         """List of DCP AssetMap Dictionary."""
-        if not self._parsed:
-            return None
+        self.require("assetmap")
         return self._list_am
 
     @property
     def list_volindex(self):
         """List of DCP VolIndex Dictionary."""
-        if not self._parsed:
-            return None
+        self.require("volindex")
         return self._list_vol
 
     @property
     def list_pkl(self):
         """List of DCP PackingList Dictionary."""
-        if not self._parsed:
-            return None
+        self.require("pkl")
         return self._list_pkl
 
     @property
     def list_cpl(self):
         """List of DCP CompositionPlayList Dictionary."""
-        if not self._parsed:
-            return None
+        self.require("cpl")
         return self._list_cpl
 
     @property
     def list_kdm(self):
         """List of DCP KeyDeliveryMessage List Dictionary."""
-        if not self._parsed:
-            return None
+        self.require("kdm")
         return self._list_kdm
 
+    @property
+    def list_asset(self):
+        """Dictionary of AssetMap assets UUID : relative path."""
+        self.require("assetmap")
+        return self._list_asset
+
+    @property
+    def schema(self):
+        """Package schema (SMPTE or Interop), from the AssetMap."""
+        self.require("assetmap")
+        return self._schema
+
+    @property
+    def package_type(self):
+        """Package type (OV or VF), from the CPL assets."""
+        self.require("cpl")
+        return self._package_type
+
+    @property
+    def size(self):
+        """Package size in bytes."""
+        if self._size is None:
+            self._size = folder_size(self.path)
+        return self._size
+
+    @property
+    def path_isdcf_fields(self):
+        """ISDCF naming convention fields of the package folder name."""
+        fields, _ = parse_isdcf_string(os.path.basename(self.path))
+        return fields
+
     @property
     def metadata(self):
-        """All extracted package metadata Dictionnary."""
+        """All extracted package metadata Dictionnary.
+
+        Built once and shared between calls until the package state changes
+        (components parsed, assets probed or checked), do not modify it.
+        Once released (see ``compact``) a new dictionary is built from the
+        compact model on each call.
+
+        """
+        if self._metadata is not None:
+            return self._metadata
+        if self._package is not None:
+            return self._package.to_dict()
+
         self.probe_dict = {
-            "asset_list": self._list_asset,
-            "volindex_list": self._list_vol,
-            "assetmap_list": self._list_am,
-            "cpl_list": self._list_cpl,
-            "pkl_list": self._list_pkl,
-            "kdm_list": self._list_kdm,
+            "asset_list": self.list_asset,
+            "volindex_list": self.list_volindex,
+            "assetmap_list": self.list_assetmap,
+            "cpl_list": self.list_cpl,
+            "pkl_list": self.list_pkl,
+            "kdm_list": self.list_kdm,
             "package_type": self.package_type,
             "path": self.path,
             "path_naming_convention": self.path_isdcf_fields,
             "size": human_size(self.size),
             "size_bytes": self.size,
-            "count_file": len(self._list_asset),
+            "count_file": len(self.list_asset),
             "schema": self.schema,
             "type": "DCP",
         }
 
         # Remove namespace and attributes key
         self.probe_dict = remove_key_dict(self.probe_dict, ["__xmlns__", "@xmlns"])
+        self._metadata = self.probe_dict
+
+        return self._metadata
+
+    @property
+    def package(self):
+        """Compact metadata model, see ``clairmeta.model.Package``.
+
+        Built once and shared between calls until the package state changes.
+
+        """
+        if self._package is None:
+            self._package = Package.from_dict(self.metadata)
+        return self._package
 
-        return self.probe_dict
+    def compact(self):
+        """Release the metadata dictionary, keeping the compact model only.
+
+        To be used when the DCP object is kept in memory (eg. server jobs),
+        the metadata dictionary is a copy of all parsed components.
+
+        Returns:
+            Compact metadata model, see ``package``.
+
+        """
+        package = self.package
+        self._metadata = None
+        self.probe_dict = None
+        return package
+
+    def reset_metadata(self):
+        """Discard metadata built so far, the package state changed."""
+        self._metadata = None
+        self._package = None
 
     def parse(self, probe=True):
         """Parse the DCP and Probe its assets."""
@@ -281,15 +428,7 @@ class DCP(object):
 
         # Find and parse package components
         if not self._parsed:
-            self.init_package_files()
-            self.init_assetmap()
-            self.init_volindex()
-            self.init_pkl()
-            self.init_cpl()
-            self.init_kdm()
-            self.cpl_parse_metadata()
-
-            self.path_isdcf_fields, _ = parse_isdcf_string(os.path.basename(self.path))
+            self.require(*self.COMPONENTS)
             self._parsed = True
 
         # Probe file content
@@ -297,43 +436,173 @@ class DCP(object):
             self.cpl_probe_assets()
             self.cpl_parse_metadata()
             self._probeb = True
+            self.reset_metadata()
 
         seconds_elapsed = time.time() - start
         self.log.info("Total time : {:.2f} seconds".format(seconds_elapsed))
 
         return self.metadata
 
+    def fingerprint(self):
+        """Size and modification time of each package file.
+
+        Returns:
+            Dictionary of relative path : [size, modification time (ns)].
+
+        """
+        fingerprint = {}
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for f in filenames:
+                fullpath = os.path.join(dirpath, f)
+                st = os.stat(fullpath)
+                rel_path = os.path.relpath(fullpath, self.path)
+                fingerprint[rel_path] = [st.st_size, st.st_mtime_ns]
+        return fingerprint
+
+    def save_snapshot(self, file_path):
+        """Save the parsed (and probed if done) package state.
+
+        Args:
+            file_path (str): Snapshot (json) file path.
+
+        """
+        self.require(*self.SNAPSHOT_COMPONENTS)
+        snapshot = {
+            "version": self.SNAPSHOT_VERSION,
+            "clairmeta": __version__,
+            "path": self.path,
+            "fingerprint": self.fingerprint(),
+            "state": {k: getattr(self, k) for k in self.SNAPSHOT_ATTRIBUTES},
+        }
+
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load_snapshot(cls, path, file_path, kdm=None, pkey=None):
+        """Build a DCP from a snapshot, without parsing it again.
+
+        Args:
+            path (str): Absolute path to directory.
+            file_path (str): Snapshot (json) file path, see
+                ``save_snapshot``.
+            kdm (str): Absolute path to KDM file.
+            pkey (str): Absolute path to private key.
+
+        Returns:
+            DCP object, assets are not probed again if they were when the
+            snapshot was saved.
+
+        Raises:
+            SnapshotException: If the snapshot can't be read, was saved by
+                another version or for another package, or if package files
+                changed since then.
+
+        """
+        dcp = cls(path, kdm=kdm, pkey=pkey)
+
+        try:
+            with open(file_path) as f:
+                snapshot = json.load(f)
+            version = (snapshot["version"], snapshot["clairmeta"])
+            state = {k: snapshot["state"][k] for k in cls.SNAPSHOT_ATTRIBUTES}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise SnapshotException(
+                "Snapshot {} can't be read : {}".format(file_path, str(e))
+            )
+
+        if version != (cls.SNAPSHOT_VERSION, __version__):
+            raise SnapshotException(
+                "Snapshot {} version {} not supported".format(file_path, version)
+            )
+        if snapshot.get("path") != dcp.path:
+            raise SnapshotException(
+                "Snapshot {} was saved for {}".format(file_path, snapshot.get("path"))
+            )
+        if snapshot.get("fingerprint") != dcp.fingerprint():
+            raise SnapshotException(
+                "Snapshot {} is outdated, package files changed".format(file_path)
+            )
+
+        for k, v in state.items():
+            setattr(dcp, k, v)
+        for am in dcp._list_am:
+            dcp.uuid_index.add_assetmap(am)
+        for pkl in dcp._list_pkl:
+            dcp.uuid_index.add_pkl(pkl)
+        for cpl in dcp._list_cpl:
+            dcp.uuid_index.add_cpl(cpl)
+        dcp._initialized = set(cls.SNAPSHOT_COMPONENTS)
+
+        return dcp
+
     def check(
         self,
         profile=DCP_CHECK_PROFILE,
         ov_path=None,
         hash_callback=None,
+        check_callback=None,
+        ov_resolver=None,
     ):
         """Check validity.
 
         Args:
             profile (dict, optional): Checker profile.
-            ov_path (str, optional): Absolute path of OriginalVersion DCP.
+            ov_path (str, optional): Absolute path of OriginalVersion DCP,
+                found using the profile ``library`` index if not set.
             hash_callback (function, optional): Callback function to report
                 file hash progression.
+            check_callback (function, optional): Callback function called
+                with each CheckExecution as soon as it is completed, errors
+                criticality is already assigned according to ``profile``.
+            ov_resolver (clairmeta.dcp_ov.OVResolver, optional): OV
+                packages resolver (and cache), the process wide one by
+                default.
 
         Returns:
             Tuple (boolean, CheckReport) of DCP check status and report.
 
         """
-        if not self._parsed or not self._probeb:
-            self.parse()
-
-        self.checker = CheckerBase(
+        from clairmeta.dcp_check import CheckerBase
+        from clairmeta.report import CheckReport, CheckCriticality
+
+        # I/O settings are scoped to this check, see ``io_context``
+        with io_context(profile.get("io")):
+            if not self._parsed or not self._probeb:
+                self.parse()
+
+            if not ov_path and profile.get("library") and self.package_type == "VF":
+                from clairmeta.library import LibraryIndex
+
+                ov_path = LibraryIndex(profile["library"]).find_ov(self)
+                if ov_path:
+                    self.log.info("OV found in library : {}".format(ov_path))
+
+            self.checker = CheckerBase(
+                self,
+                ov_path=ov_path,
+                hash_callback=hash_callback,
+                bypass_list=profile.get("bypass"),
+                allowed_foreign_files=profile.get("allowed_foreign_files"),
+                check_callback=check_callback,
+                criticality=CheckCriticality(profile),
+                fail_fast=profile.get("fail_fast", False),
+                digests=profile.get("digests"),
+                ov_resolver=ov_resolver,
+            )
+            self.checks = self.checker.check()
+
+        # Checks may complete assets metadata (eg. VF assets found in OV)
+        self.reset_metadata()
+
+        report = CheckReport(
             self,
-            ov_path=ov_path,
-            hash_callback=hash_callback,
-            bypass_list=profile.get("bypass"),
-            allowed_foreign_files=profile.get("allowed_foreign_files"),
+            profile,
+            aborted=self.checker.is_aborted(),
+            digests=self.checker.digests,
         )
-        self.checks = self.checker.check()
-
-        report = CheckReport(self, profile)
         self.log.info("Check report:\n\n" + report.pretty_str())
 
         return report.is_valid(), report
@@ -5,13 +5,15 @@ import re
 import time
 import importlib
 import inspect
+import threading
 import traceback
 
 from clairmeta.settings import DCP_CHECK_SETTINGS
 from clairmeta.logger import get_log
+from clairmeta.dcp_ov import OV_RESOLVER
 from clairmeta.dcp_check_execution import CheckError, CheckExecution
-from clairmeta.utils.file import ConsoleProgress
-from clairmeta.exception import CheckException
+from clairmeta.utils.file import ConsoleProgress, new_hasher
+from clairmeta.exception import CheckException, CheckAbortedException
 
 
 class CheckerBase(object):
@@ -31,6 +33,11 @@ class CheckerBase(object):
         hash_callback=None,
         bypass_list=None,
         allowed_foreign_files=None,
+        check_callback=None,
+        criticality=None,
+        fail_fast=False,
+        digests=None,
+        ov_resolver=None,
     ):
         """CheckerBase constructor.
 
@@ -42,6 +49,19 @@ class CheckerBase(object):
             bypass_list (list, optional): List of checks to bypass.
             allowed_foreign_files (list, optional): List of files allowed
                 in the DCP folder (don't trigger foreign files check).
+            check_callback (function, optional): Callback function called
+                with each CheckExecution as soon as it is completed.
+            criticality (clairmeta.report.CheckCriticality, optional):
+                Criticality resolver used to assign errors level as soon as
+                a check is completed.
+            fail_fast (boolean, optional): Abort the check process as soon
+                as an ERROR level error is found, this requires
+                ``criticality`` to be set.
+            digests (list, optional): Additional digest algorithms computed
+                along with the PKL hash check (same read), see
+                ``clairmeta.utils.file.file_digests``.
+            ov_resolver (clairmeta.dcp_ov.OVResolver, optional): OV
+                packages resolver, the process wide one by default.
 
         """
         self.dcp = dcp
@@ -54,6 +74,14 @@ class CheckerBase(object):
         self.check_modules = {}
         self.ov_path = ov_path
         self.ov_dcp = None
+        self.ov_resolver = ov_resolver or OV_RESOLVER
+        self.check_callback = check_callback
+        self.criticality = criticality
+        self.fail_fast = fail_fast
+        self.abort_event = threading.Event()
+        self.digest_algorithms = digests or []
+        # Relative path: dictionary of algorithm: hexadecimal digest
+        self.digests = {}
 
         self.hash_callback = hash_callback
         if not self.hash_callback:
@@ -66,6 +94,12 @@ class CheckerBase(object):
                 " or instance of ConsoleProgress (or derivate)."
             )
 
+        for algorithm in self.digest_algorithms:
+            try:
+                new_hasher(algorithm)
+            except ValueError as e:
+                raise CheckException(str(e))
+
     def load_modules(self):
         prefix = DCP_CHECK_SETTINGS["module_prefix"]
         for k, v in DCP_CHECK_SETTINGS["modules"].items():
@@ -74,9 +108,16 @@ class CheckerBase(object):
                 module = importlib.import_module(module_path)
                 checker = module.Checker(self.dcp)
                 checker.ov_path = self.ov_path
+                checker.ov_resolver = self.ov_resolver
                 checker.allowed_foreign_files = self.allowed_foreign_files
                 checker.bypass_list = self.bypass_list
                 checker.hash_callback = self.hash_callback
+                checker.check_callback = self.check_callback
+                checker.criticality = self.criticality
+                checker.fail_fast = self.fail_fast
+                checker.abort_event = self.abort_event
+                checker.digest_algorithms = self.digest_algorithms
+                checker.digests = self.digests
                 self.check_modules[v] = checker
             except (ImportError, Exception) as e:
                 self.log.critical("Import error {} : {}".format(module_path, str(e)))
@@ -115,6 +156,7 @@ class CheckerBase(object):
                 check_exec = CheckExecution(v)
                 check_exec.bypass = True
                 self.checks.append(check_exec)
+                self._check_done(check_exec)
 
         return checks
 
@@ -123,9 +165,24 @@ class CheckerBase(object):
         self.log.info("Checking DCP : {}".format(self.dcp.path))
 
         for _, checker in self.check_modules.items():
-            self.checks += checker.run_checks()
+            try:
+                checker.run_checks()
+            except Exception:
+                # Check modules don't expect skipped checks once aborted
+                if not self.is_aborted():
+                    raise
+
+            self.checks += checker.checks
+            if self.is_aborted():
+                self.log.info("Check aborted : {}".format(self.dcp.path))
+                break
+
         return self.checks
 
+    def is_aborted(self):
+        """Returns whether the check process was aborted (fail fast)."""
+        return self.abort_event.is_set()
+
     def run_check(self, check, *args, **kwargs):
         """Execute a check.
 
@@ -139,23 +196,34 @@ class CheckerBase(object):
             Check function return value
 
         """
+        if self.is_aborted():
+            return None
+
         self._check_setup()
 
         check_exec = CheckExecution(check)
+        aborted = False
 
         try:
             start = time.time()
             check_res = None
             check_res = check(*args)
+        except CheckAbortedException:
+            aborted = True
         except CheckException:
             pass
         except Exception:
-            error = CheckError("{}".format(traceback.format_exc()))
-            error.name = "internal_error"
-            error.parent_name = check_exec.name
-            error.doc = "ClairMeta internal error"
-            check_exec.errors.append(error)
-            self.log.error(error.message)
+            # Failures caused by the cancellation of an in-flight operation
+            # are not internal errors.
+            if self.is_aborted():
+                aborted = True
+            else:
+                error = CheckError("{}".format(traceback.format_exc()))
+                error.name = "internal_error"
+                error.parent_name = check_exec.name
+                error.doc = "ClairMeta internal error"
+                check_exec.errors.append(error)
+                self.log.error(error.message)
         finally:
             for error in self.errors:
                 error.parent_name = check_exec.name
@@ -165,10 +233,22 @@ class CheckerBase(object):
             check_exec.asset_stack = kwargs.get("stack", [self.dcp.path])
             check_exec.seconds_elapsed = time.time() - start
 
-            self.checks.append(check_exec)
+            # Interrupted checks are not reported, they did not complete
+            if not aborted:
+                self.checks.append(check_exec)
+                self._check_done(check_exec)
 
             return check_res
 
+    def _check_done(self, check_exec):
+        """Internal hook executed after each check is completed."""
+        if self.criticality:
+            self.criticality.assign(check_exec)
+        if self.check_callback:
+            self.check_callback(check_exec)
+        if self.fail_fast and not check_exec.is_valid():
+            self.abort_event.set()
+
     def _check_setup(self):
         """Internal setup executed before each check is run."""
         self.errors = []
@@ -335,11 +335,11 @@ cause issue for some equipements in the field.
         """
         _, asset = asset
         uuid = asset["Id"]
-        is_vf_asset = uuid not in self.dcp._list_asset
+        is_vf_asset = not self.dcp.uuid_index.in_assetmap(uuid)
         is_relinked_from_ov = "Probe" in asset
 
         if is_vf_asset and not is_relinked_from_ov:
-            asset_type = get_type_for_asset(playlist, uuid)
+            asset_type = get_type_for_asset(playlist, uuid, self.dcp.uuid_index)
             self.error("Asset missing ({}), external reference".format(asset_type))
 
     def check_assets_cpl_missing_from_multi_cpl(self, playlist, asset):
@@ -349,13 +349,13 @@ cause issue for some equipements in the field.
         """
         _, asset = asset
         uuid = asset["Id"]
-        is_found = uuid in self.dcp._list_asset
+        is_found = self.dcp.uuid_index.in_assetmap(uuid)
 
         if len(self.dcp.list_cpl) == 1:
             return
 
         if not is_found:
-            asset_type = get_type_for_asset(playlist, uuid)
+            asset_type = get_type_for_asset(playlist, uuid, self.dcp.uuid_index)
             self.error(
                 "Asset missing ({}), multi CPL must be complete".format(asset_type)
             )
@@ -4,7 +4,7 @@
 import os
 import re
 
-from clairmeta.dcp_utils import list_cpl_assets, cpl_probe_asset
+from clairmeta.dcp_utils import list_cpl_assets
 from clairmeta.dcp_check import CheckerBase
 
 
@@ -129,10 +129,7 @@ class Checker(CheckerBase):
         if self.ov_path and self.dcp.package_type != "VF":
             self.error("Package checked must be a VF")
 
-        from clairmeta.dcp import DCP
-
-        self.ov_dcp = DCP(self.ov_path)
-        self.ov_dcp.parse()
+        self.ov_dcp = self.ov_resolver.resolve(self.ov_path)
         if self.ov_dcp.package_type != "OV":
             self.error("Package referenced must be a OV")
 
@@ -144,11 +141,9 @@ class Checker(CheckerBase):
         if not self.ov_dcp:
             return
 
-        ov_dcp_dict = self.ov_dcp.parse()
-
         if not asset.get("Path"):
             uuid = asset["Id"]
-            path_ov = ov_dcp_dict["asset_list"].get(uuid)
+            path_ov = self.ov_dcp.list_asset.get(uuid)
 
             if not path_ov:
                 self.error("Asset missing ({}) from OV : {}".format(essence, uuid))
@@ -162,4 +157,6 @@ class Checker(CheckerBase):
 
             # Probe asset for later checks
             asset["AbsolutePath"] = asset_path
-            cpl_probe_asset(asset, essence, asset_path)
+            self.ov_resolver.probe_asset(
+                self.ov_dcp, asset, essence, asset_path, cancel=self.abort_event
+            )
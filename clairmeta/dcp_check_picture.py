@@ -1,7 +1,15 @@
 # Clairmeta - (C) YMAGIS S.A.
 # See LICENSE for more information
 
-from clairmeta.utils.time import compare_ratio
+from clairmeta.utils.time import compare_ratio, frame_to_tc
+from clairmeta.utils.mxf import (
+    mxf_edit_unit_sizes,
+    frame_bitrates,
+    sliding_average,
+    bitrate_violations,
+)
+from clairmeta.utils.j2k import sample_codestreams, dci_profile_errors
+from clairmeta.exception import MXFException
 from clairmeta.dcp_check import CheckerBase
 from clairmeta.dcp_utils import list_cpl_assets
 from clairmeta.settings import DCP_SETTINGS
@@ -53,6 +61,51 @@ class Checker(CheckerBase):
 
         return bitrate_map[bitrate]
 
+    def get_picture_bitrates(self, asset):
+        """Per frame bitrates (Mb/s) and timecode rate, None if unavailable.
+
+        Only the frames played by the CPL are kept (``EntryPoint`` and
+        ``Duration``), the first one is the start of the reel.
+
+        """
+        if "BitRateStats" not in asset["Probe"]:
+            return None
+
+        try:
+            sizes, edit_rate = mxf_edit_unit_sizes(asset["AbsolutePath"])
+        except (OSError, MXFException):
+            return None
+
+        entry_point = asset.get("EntryPoint") or 0
+        duration = asset.get("Duration")
+        end = entry_point + duration if duration else len(sizes)
+        sizes = sizes[entry_point:end]
+        if not len(sizes):
+            return None
+
+        fps = int(round(edit_rate[0] / edit_rate[1]))
+        return frame_bitrates(sizes, edit_rate), fps
+
+    def get_picture_codestreams(self, asset):
+        """Sampled frames codestream headers, None if unavailable."""
+        if asset["Probe"].get("EncryptedEssence"):
+            return None
+
+        try:
+            return sample_codestreams(
+                asset["AbsolutePath"],
+                self.settings["j2k_sample_frames"],
+                self.settings["j2k_sample_jobs"],
+            )
+        except (OSError, MXFException):
+            return None
+
+    def get_resolution_name(self, asset):
+        for k, v in self.settings["resolutions"].items():
+            if asset["Probe"]["Resolution"] in v:
+                return k
+        return ""
+
     def check_picture_cpl_resolution(self, playlist, asset):
         """Stored pixel array size compliance.
 
@@ -117,12 +170,15 @@ class Checker(CheckerBase):
             # asdcp-lib was not able to extract DecompositionLevels, this
             # probably means that the J2KCodingStyleDefault descriptor is not
             # present.
-            # It is indeed listed as an optional field in ST 422, but
-            # DCI Specification and RDD 52 seems to imply that it should be
-            # present so dedicated checks could be added to validate the J2K
-            # codestream.
+            # It is indeed listed as an optional field in ST 422, fallback
+            # to the first frame codestream, see also
+            # check_picture_cpl_j2k_codestream.
             if levels == 0:
-                return
+                codestreams = self.get_picture_codestreams(asset) or {}
+                headers = [h for h in codestreams.values() if "Error" not in h]
+                if not headers:
+                    return
+                levels = headers[0]["COD"]["DecompositionLevels"]
 
             for k, v in resolutions.items():
                 if resolution in v:
@@ -136,6 +192,56 @@ class Checker(CheckerBase):
                     " found".format(levels_map[resolution_name], levels)
                 )
 
+    def check_picture_cpl_j2k_codestream(self, playlist, asset):
+        """Picture JPEG 2000 codestream DCI profile compliance.
+
+        Main header of a sample of frames (first, last and evenly spaced
+        ones) are parsed, only a few KB are read per frame.
+
+        References:
+            ISO/IEC 15444-1:2019 Table A.10 and A.47
+            SMPTE ST 429-4:2006 5.3
+            DCI DCSS (v1.4) 4.3.3
+        """
+        levels_map = {
+            "2K": self.settings["dwt_levels_2k"],
+            "4K": self.settings["dwt_levels_4k"],
+        }
+
+        _, asset = asset
+        if "Probe" not in asset:
+            return
+
+        resolution_name = self.get_resolution_name(asset)
+        if resolution_name not in levels_map:
+            return
+
+        codestreams = self.get_picture_codestreams(asset)
+        if not codestreams:
+            return
+
+        fps = int(round(asset["Probe"]["EditRate"]))
+        frames_errors = {}
+        for edit_unit, header in sorted(codestreams.items()):
+            if "Error" in header:
+                errors = ["Invalid codestream : {}".format(header["Error"])]
+            else:
+                errors = dci_profile_errors(
+                    header, resolution_name, levels_map[resolution_name]
+                )
+            for error in errors:
+                frames_errors.setdefault(error, []).append(edit_unit)
+
+        for error, edit_units in frames_errors.items():
+            self.error(
+                "{} ({} of {} sampled frame(s) : {})".format(
+                    error,
+                    len(edit_units),
+                    len(codestreams),
+                    ", ".join([frame_to_tc(e, fps) for e in edit_units]),
+                )
+            )
+
     def check_picture_cpl_max_bitrate(self, playlist, asset):
         """Picture maximum bitrate DCI compliance.
 
@@ -151,12 +257,40 @@ class Checker(CheckerBase):
             dci_bitrate = self.get_picture_max_bitrate(playlist, asset)
             t_bitrate = dci_bitrate + tolerance
 
-            if max_bitrate > t_bitrate:
+            if max_bitrate <= t_bitrate:
+                return
+
+            timeline = self.get_picture_bitrates(asset)
+            violations = []
+            if timeline:
+                bitrates, fps = timeline
+                violations = bitrate_violations(bitrates, t_bitrate)
+
+            if not timeline:
                 self.error(
                     "Exceed DCI maximum bitrate ({} Mb/s) : {} Mb/s".format(
                         t_bitrate, max_bitrate
                     )
                 )
+            elif not violations:
+                self.error(
+                    "Exceed DCI maximum bitrate ({} Mb/s) : {} Mb/s, outside of"
+                    " the frames played by the CPL".format(t_bitrate, max_bitrate)
+                )
+
+            max_errors = self.settings["bitrate_max_errors"]
+            for start, count, peak in violations[:max_errors]:
+                self.error(
+                    "Exceed DCI maximum bitrate ({} Mb/s) : {:.2f} Mb/s at {}"
+                    " ({} frame(s))".format(
+                        t_bitrate, peak, frame_to_tc(start, fps), count
+                    )
+                )
+            if len(violations) > max_errors:
+                self.error(
+                    "Exceed DCI maximum bitrate ({} Mb/s) : {} more frame"
+                    " range(s)".format(t_bitrate, len(violations) - max_errors)
+                )
 
     def check_picture_cpl_avg_bitrate(self, playlist, asset):
         """Picture average bitrate DCI compliance.
@@ -171,11 +305,20 @@ class Checker(CheckerBase):
             dci_bitrate = self.get_picture_max_bitrate(playlist, asset)
             t_bitrate = dci_bitrate - (dci_bitrate * margin) / 100.0
 
-            if avg_bitrate > t_bitrate:
-                self.error(
-                    "Exceed DCI safe average bitrate ({} Mb/s) "
-                    ": {} Mb/s".format(t_bitrate, avg_bitrate)
+            if avg_bitrate <= t_bitrate:
+                return
+
+            message = "Exceed DCI safe average bitrate ({} Mb/s) : {} Mb/s".format(
+                t_bitrate, avg_bitrate
+            )
+            timeline = self.get_picture_bitrates(asset)
+            if timeline:
+                bitrates, fps = timeline
+                peaks = sliding_average(bitrates, fps)
+                message += ", one second peak {:.2f} Mb/s at {}".format(
+                    peaks.max(), frame_to_tc(int(peaks.argmax()), fps)
                 )
+            self.error(message)
 
     def check_picture_cpl_framerate(self, playlist, asset):
         """Picture framerate DCI compliance.
@@ -2,13 +2,29 @@
 # See LICENSE for more information
 
 import os
-
-from clairmeta.utils.file import shaone_b64
+import sys
+import concurrent.futures
+
+from clairmeta.utils.file import (
+    shaone_b64,
+    file_digests,
+    hex_to_b64,
+    human_size,
+    ConsoleProgress,
+    AggregateProgress,
+)
+from clairmeta.utils.scheduler import DeviceScheduler, device_of
+from clairmeta.utils.throttle import get_device_readers
+from clairmeta.utils.mxf import scan_mxf
 from clairmeta.dcp_check import CheckerBase
 from clairmeta.dcp_check_utils import check_xml, check_issuedate
 from clairmeta.dcp_utils import list_pkl_assets
 
 
+# Hash progression of each device is logged every N seconds
+HASH_LOG_INTERVAL = 10
+
+
 class Checker(CheckerBase):
     def __init__(self, dcp):
         super(Checker, self).__init__(dcp)
@@ -16,26 +32,102 @@ class Checker(CheckerBase):
     def run_checks(self):
         # Accumulate hash by UUID, useful for multi PKL package
         self.hash_map = {}
+        scheduler = self.hash_assets()
+
+        try:
+            for source in self.dcp._list_pkl:
+                asset_stack = [source["FileName"]]
+
+                checks = self.find_check("pkl")
+                [self.run_check(check, source, stack=asset_stack) for check in checks]
+
+                asset_checks = self.find_check("assets_pkl")
+                [
+                    self.run_check(
+                        check,
+                        source,
+                        asset,
+                        stack=asset_stack + [asset[2].get("Path", asset[2]["Id"])],
+                    )
+                    for asset in list_pkl_assets(source)
+                    for check in asset_checks
+                ]
+        finally:
+            if scheduler:
+                scheduler.shutdown(cancel_futures=True)
+                self.log_hash_stats(scheduler)
 
-        for source in self.dcp._list_pkl:
-            asset_stack = [source["FileName"]]
+        return self.checks
 
-            checks = self.find_check("pkl")
-            [self.run_check(check, source, stack=asset_stack) for check in checks]
+    def hash_assets(self):
+        """Start hashing all PKL assets, see ``DeviceScheduler``.
 
-            asset_checks = self.find_check("assets_pkl")
-            [
-                self.run_check(
-                    check,
-                    source,
-                    asset,
-                    stack=asset_stack + [asset[2].get("Path", asset[2]["Id"])],
-                )
-                for asset in list_pkl_assets(source)
-                for check in asset_checks
-            ]
+        Assets on distinct devices are read concurrently, futures are stored
+        in ``hash_map`` and collected by ``check_assets_pkl_hash``.
 
-        return self.checks
+        Returns:
+            DeviceScheduler object, None if the hash check is bypassed.
+
+        """
+        if any(["check_assets_pkl_hash".startswith(c) for c in self.bypass_list]):
+            return None
+
+        paths = {
+            asset["Id"]: path
+            for pkl in self.dcp._list_pkl
+            for _, path, asset in list_pkl_assets(pkl)
+            if path and os.path.isfile(path)
+        }
+
+        readers = get_device_readers()
+        devices = {device_of(p) for p in paths.values()}
+        callback = self.hash_callback
+        if callback and readers * len(devices) > 1:
+            # Files hashed concurrently are reported as a whole
+            total_size = sum(os.path.getsize(p) for p in paths.values())
+            if isinstance(callback, ConsoleProgress):
+                callback._total_size = max(1, total_size)
+            callback = AggregateProgress(callback, self.dcp.path, total_size)
+
+        self._device_logged = {}
+        scheduler = DeviceScheduler(readers, callback, self.log_device_progress)
+        futures = scheduler.submit(self._hash_asset, paths.values())
+        self.hash_map = {k: futures[v] for k, v in paths.items()}
+        return scheduler
+
+    def _hash_asset(self, path, callback):
+        """Hash an asset, additional digests are computed in the same read."""
+        algorithms = ["sha1"] + self.digest_algorithms
+        digests = file_digests(path, algorithms, callback, cancel=self.abort_event)
+        self.digests[os.path.relpath(path, self.dcp.path)] = digests
+        return hex_to_b64(digests["sha1"])
+
+    def log_device_progress(self, name, processed, size, elapsed):
+        """Log hash progression of a device, see ``DeviceProgress``."""
+        last = self._device_logged.get(name, 0)
+        if processed < size and elapsed - last < HASH_LOG_INTERVAL:
+            return
+        self._device_logged[name] = elapsed
+
+        self.log.info(
+            "Hashing on {} : {} / {} ({:.2f} MBytes/s)".format(
+                name,
+                human_size(processed),
+                human_size(size),
+                processed / 1e6 / max(elapsed, sys.float_info.epsilon),
+            )
+        )
+
+    def log_hash_stats(self, scheduler):
+        for stats in scheduler.progress.devices.values():
+            self.log.info(
+                "Hashed {} file(s) ({}) on {} in {:.2f} seconds".format(
+                    stats["files"],
+                    human_size(stats["size"]),
+                    stats["name"],
+                    stats["elapsed"],
+                )
+            )
 
     def check_pkl_xml(self, pkl):
         """PKL XML syntax and structure check."""
@@ -85,8 +177,7 @@ class Checker(CheckerBase):
         References: N/A
         """
         uuid, _, _ = asset
-        # Note : dcp._list_asset is directly extracted from Assetmap
-        if uuid not in self.dcp._list_asset.keys():
+        if not self.dcp.uuid_index.in_assetmap(uuid):
             self.error("Not present in Assetmap")
 
     def check_assets_pkl_size(self, pkl, asset):
@@ -107,6 +198,23 @@ class Checker(CheckerBase):
                 "Invalid size, expected {} but got {}".format(asset_size, actual_size)
             )
 
+    def check_assets_pkl_essence_integrity(self, pkl, asset):
+        """PKL MXF assets structure and index table check.
+
+        Each edit unit listed in the index table shall lie within the
+        file, this detects truncated files without hashing them.
+
+        References:
+            SMPTE ST 377-1:2011 6.2, 7.4, 11
+        """
+        _, path, asset = asset
+        if not path or not os.path.exists(path) or not path.lower().endswith(".mxf"):
+            return
+
+        scan = scan_mxf(path)
+        for error in scan["errors"]:
+            self.error(error)
+
     def check_assets_pkl_hash(self, pkl, asset):
         """PKL assets hash check.
 
@@ -121,7 +229,11 @@ class Checker(CheckerBase):
         asset_id = asset["Id"]
 
         if asset_id not in self.hash_map:
-            self.hash_map[asset_id] = shaone_b64(path, self.hash_callback)
+            self.hash_map[asset_id] = shaone_b64(
+                path, self.hash_callback, cancel=self.abort_event
+            )
+        elif isinstance(self.hash_map[asset_id], concurrent.futures.Future):
+            self.hash_map[asset_id] = self.hash_map[asset_id].result()
 
         if self.hash_map[asset_id] != asset_hash:
             self.error(
@@ -12,6 +12,7 @@ from cryptography.hazmat.primitives.asymmetric.padding import PKCS1v15
 
 from clairmeta.settings import DCP_SETTINGS
 from clairmeta.utils.xml import canonicalize_xml
+from clairmeta.utils.crypto import load_der_certificate_b64
 from clairmeta.utils.sys import all_keys_in_dict
 from clairmeta.dcp_check import CheckerBase
 
@@ -73,8 +74,7 @@ class Checker(CheckerBase):
     def certif_der_decoding(self, cert):
         """Certificate ASN.1 DER decoding."""
         try:
-            certif_bytes = base64.b64decode(cert["X509Certificate"])
-            certif = x509.load_der_x509_certificate(certif_bytes)
+            certif = load_der_certificate_b64(cert["X509Certificate"])
         except Exception as e:
             self.error("Invalid certificate encoding : {}".format(str(e)))
 
@@ -200,7 +200,7 @@ class Checker(CheckerBase):
                 get_log().info("Subtitle inspection skipped : {}".format(str(e)))
                 return
 
-            with unwrap_mxf(path, args=unwrap_args) as folder:
+            with unwrap_mxf(path, args=unwrap_args, cancel=self.abort_event) as folder:
                 [
                     self.run_check(check, cpl, asset, folder, stack=asset_stack)
                     for check in checks
@@ -275,7 +275,8 @@ class Checker(CheckerBase):
         _, asset = asset
 
         reel_no = self.st_util.get_subtitle_elem(st_dict, "ReelNumber")
-        reel_cpl = get_reel_for_asset(playlist, asset["Id"])["Position"]
+        reel = get_reel_for_asset(playlist, asset["Id"], self.dcp.uuid_index)
+        reel_cpl = reel["Position"]
 
         if reel_no and reel_no != reel_cpl:
             self.error(
@@ -610,7 +611,8 @@ class Checker(CheckerBase):
         last_tc_st = last_tc / ratio_editrate
 
         if last_tc_st > cpl_dur:
-            reel_cpl = get_reel_for_asset(playlist, asset["Id"])["Position"]
+            reel = get_reel_for_asset(playlist, asset["Id"], self.dcp.uuid_index)
+            reel_cpl = reel["Position"]
             self.error(
                 "Subtitle exceed track duration. Subtitle {} - Track {} "
                 "- Reel {}".format(
@@ -853,8 +855,11 @@ class Checker(CheckerBase):
         Reference:
             SMPTE RDD 52:2020 7.2.4
         """
-        reel_cpl = get_reel_for_asset(playlist, asset[1]["Id"])["Position"]
-        first_reel_of_st = get_first_reel_for_asset_type(playlist, "Subtitle")
+        reel = get_reel_for_asset(playlist, asset[1]["Id"], self.dcp.uuid_index)
+        reel_cpl = reel["Position"]
+        first_reel_of_st = get_first_reel_for_asset_type(
+            playlist, "Subtitle", self.dcp.uuid_index
+        )
         # We are probably checking a Caption track
         if not first_reel_of_st:
             return None
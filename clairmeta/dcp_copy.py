@@ -0,0 +1,384 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+import concurrent.futures
+
+from clairmeta.logger import get_log
+from clairmeta.dcp_utils import list_pkl_assets
+from clairmeta.utils.file import (
+    copy_file,
+    shaone_b64,
+    get_hash_cache,
+    COPY_BUFFER_SIZE,
+    CHECKPOINT_SIZE,
+)
+from clairmeta.utils.throttle import throttle_read
+from clairmeta.exception import ClairMetaException
+
+
+class CopyProgress(object):
+    """Aggregate copy progression of files copied concurrently."""
+
+    def __init__(self, total_size, callback=None):
+        """CopyProgress constructor.
+
+        Args:
+            total_size (int): Total number of bytes to copy.
+            callback (func, optional): Called with (bytes written, total
+                size, seconds elapsed) each time some data is written.
+
+        """
+        self.total_size = total_size
+        self.written = 0
+        self.callback = callback
+        self.start = time.time()
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, file_path, file_processed, file_size, file_elapsed):
+        """Callback for ``copy_file``."""
+        with self._lock:
+            self.written += file_processed - self._files.get(file_path, 0)
+            self._files[file_path] = file_processed
+            written = self.written
+
+        if self.callback:
+            self.callback(written, self.total_size, time.time() - self.start)
+
+
+class CopyJournal(object):
+    """Checkpoint journal of a copy, allowing it to be resumed.
+
+    The journal is an append only file of json lines, each line is either a
+    ``checkpoint`` record (a file is copied up to ``offset``, with the sha1
+    of this prefix) or a ``done`` record (a file is completely copied, with
+    its hash and verification status). By default a record is flushed to
+    disk before the copy proceeds, an interrupted copy loose at most one
+    checkpoint interval per file.
+
+    Source files are identified by their size and modification time, a
+    record is ignored if the source file changed since it was written.
+
+    """
+
+    def __init__(self, path, sync_records=1, sync_interval=0):
+        """CopyJournal constructor, load existing records if any.
+
+        Args:
+            path (str): Journal file absolute path.
+            sync_records (int, optional): Flush the journal to disk every
+                ``sync_records`` records.
+            sync_interval (float, optional): Flush the journal to disk if
+                the last flush is older than ``sync_interval`` seconds.
+
+        """
+        self.path = path
+        self.done = {}
+        self.checkpoints = {}
+        self.sync_records = sync_records
+        self.sync_interval = sync_interval
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self.load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def load(self):
+        """Load records from the journal file."""
+        if not os.path.isfile(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Last line may be truncated by an interruption
+                    break
+
+                if record["type"] == "done":
+                    self.done[record["path"]] = record
+                    self.checkpoints.pop(record["path"], None)
+                elif record["type"] == "checkpoint":
+                    self.checkpoints[record["path"]] = record
+                    self.done.pop(record["path"], None)
+
+    def write(self, record):
+        """Append a record, flushed to disk according to sync settings."""
+        with self._lock:
+            self._file.write(json.dumps(record, sort_keys=True) + "\n")
+            self._pending += 1
+            if (
+                self._pending >= self.sync_records
+                or time.monotonic() - self._last_sync >= self.sync_interval
+            ):
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._sync()
+            self._file.close()
+
+
+def file_identity(path):
+    """Returns a dictionary identifying a file content (size, mtime)."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def hash_file_prefix(path, size, buffer_size=COPY_BUFFER_SIZE):
+    """Hash the first ``size`` bytes of a file.
+
+    Returns:
+        A hashlib sha1 object, that can be used to continue hashing the
+        remaining part of the file.
+
+    """
+    sha1 = hashlib.sha1()
+    remaining = size
+
+    with open(path, "rb") as f:
+        while remaining > 0:
+            data = f.read(min(buffer_size, remaining))
+            if not data:
+                break
+            throttle_read(len(data))
+            sha1.update(data)
+            remaining -= len(data)
+
+    return sha1
+
+
+def drop_file_cache(path):
+    """Evict ``path`` from the page cache, where available (posix_fadvise).
+
+    A subsequent read then hits the storage instead of memory. Dirty pages
+    are not evicted, ``path`` must be flushed to disk first (see
+    ``copy_file`` sync argument).
+
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def list_pkl_hashes(dcp):
+    """Map each PKL asset absolute path to its expected hash.
+
+    Args:
+        dcp (clairmeta.DCP): DCP object.
+
+    Returns:
+        Dictionary of path: hash.
+
+    """
+    return {
+        os.path.normpath(path): asset["Hash"]
+        for pkl in dcp.list_pkl
+        for _, path, asset in list_pkl_assets(pkl)
+        if path
+    }
+
+
+def copy_dcp(
+    source,
+    dest,
+    jobs=4,
+    verify=False,
+    overwrite=False,
+    callback=None,
+    buffer_size=COPY_BUFFER_SIZE,
+    journal=None,
+    checkpoint_size=CHECKPOINT_SIZE,
+):
+    """Copy a DCP, hashing each file while it is copied.
+
+    Files are copied concurrently, largest first. Each file is read once,
+    the sha1 computed on the copied buffers is compared with the PKL hash.
+    If the hash cache is enabled (see ``enable_hash_cache``), checking the
+    destination package afterward won't read the files again.
+
+    When a ``journal`` is used, an interrupted copy can be resumed : files
+    already completed are skipped (their recorded hash is reused), partial
+    files are resumed from their last checkpoint once the destination
+    prefix is verified. Only the destination is read to verify the prefix,
+    the source is never read twice. The journal is removed once the copy
+    succeed.
+
+    Args:
+        source (str): Source DCP absolute path.
+        dest (str): Destination absolute path.
+        jobs (int, optional): Number of files copied concurrently.
+        verify (bool, optional): Read back each copied file from the
+            destination and compare its hash.
+        overwrite (bool, optional): Allow copying into a non empty
+            destination folder.
+        callback (func, optional): Progress callback, see ``CopyProgress``.
+        buffer_size (int, optional): Copy buffer size in bytes.
+        journal (str, optional): Checkpoint journal absolute path, created
+            if missing. Resuming into a non empty ``dest`` is allowed if the
+            journal exists.
+        checkpoint_size (int, optional): Journal checkpoint interval in
+            bytes.
+
+    Returns:
+        Tuple (boolean, list) of copy status and dictionaries describing
+        each file copied.
+
+    Raises:
+        ClairMetaException: If ``dest`` is not empty and ``overwrite`` is
+            not set (and no journal exists).
+
+    """
+    from clairmeta.dcp import DCP
+
+    dcp = DCP(source)
+    dest = os.path.abspath(dest)
+
+    resume = journal and os.path.isfile(journal)
+    if os.path.isdir(dest) and os.listdir(dest) and not (overwrite or resume):
+        raise ClairMetaException("{} already exists".format(dest))
+    journal = CopyJournal(journal) if journal else None
+
+    files = []
+    for dirpath, dirnames, filenames in os.walk(dcp.path):
+        rel_dir = os.path.relpath(dirpath, dcp.path)
+        os.makedirs(os.path.normpath(os.path.join(dest, rel_dir)), exist_ok=True)
+        files += [os.path.join(dirpath, f) for f in filenames]
+
+    sizes = {f: os.path.getsize(f) for f in files}
+    files.sort(key=lambda f: sizes[f], reverse=True)
+
+    hashes = list_pkl_hashes(dcp)
+    progress = CopyProgress(sum(sizes.values()), callback)
+    log = get_log()
+
+    def resume_offset(rel_path, dst, identity):
+        """Offset and hash object to resume a partial copy from."""
+        record = journal.checkpoints.get(rel_path)
+        if (
+            not record
+            or record["source"] != identity
+            or not os.path.isfile(dst)
+            or os.path.getsize(dst) < record["offset"]
+        ):
+            return 0, None
+
+        sha1 = hash_file_prefix(dst, record["offset"], buffer_size)
+        if base64.b64encode(sha1.digest()).decode("utf-8") != record["hash"]:
+            log.warning("Copy {} : partial copy corrupted, restart".format(rel_path))
+            return 0, None
+        return record["offset"], sha1
+
+    def copy_done(rel_path, dst, identity):
+        """Result recorded in the journal for a completed file, if valid."""
+        record = journal.done.get(rel_path)
+        if (
+            not record
+            or record["source"] != identity
+            or not os.path.isfile(dst)
+            or file_identity(dst) != record["dest"]
+        ):
+            return None
+
+        # Checking the destination will reuse the recorded hash
+        cache = get_hash_cache()
+        if cache:
+            cache.set(dst, record["hash"])
+        progress(dst, record["size"], record["size"], 0)
+        return dict(record["result"], resumed=record["size"])
+
+    def copy_one(src):
+        rel_path = os.path.relpath(src, dcp.path)
+        dst = os.path.join(dest, rel_path)
+        identity = file_identity(src)
+        offset, sha1 = 0, None
+
+        if journal:
+            result = copy_done(rel_path, dst, identity)
+            if result:
+                return result
+            offset, sha1 = resume_offset(rel_path, dst, identity)
+
+        def checkpoint(dst, offset, prefix_hash):
+            journal.write(
+                {
+                    "type": "checkpoint",
+                    "path": rel_path,
+                    "source": identity,
+                    "offset": offset,
+                    "hash": prefix_hash,
+                }
+            )
+
+        result = {
+            "path": rel_path,
+            "size": sizes[src],
+            "hash": copy_file(
+                src,
+                dst,
+                progress,
+                buffer_size,
+                offset=offset,
+                sha1=sha1,
+                checkpoint=checkpoint if journal else None,
+                checkpoint_size=checkpoint_size,
+                sync=verify,
+            ),
+            "expected_hash": hashes.get(os.path.normpath(src)),
+            "verified": None,
+            "resumed": offset,
+        }
+        result["valid"] = result["expected_hash"] in [None, result["hash"]]
+
+        if verify:
+            drop_file_cache(dst)
+            verify_hash = shaone_b64(dst, use_cache=False)
+            result["verified"] = verify_hash == result["hash"]
+            result["valid"] = result["valid"] and result["verified"]
+
+        if not result["valid"]:
+            log.error("Copy {} : hash mismatch".format(rel_path))
+        elif journal:
+            journal.write(
+                {
+                    "type": "done",
+                    "path": rel_path,
+                    "source": identity,
+                    "dest": file_identity(dst),
+                    "size": sizes[src],
+                    "hash": result["hash"],
+                    "result": result,
+                }
+            )
+        return result
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(copy_one, files))
+    finally:
+        if journal:
+            journal.close()
+
+    status = all([r["valid"] for r in results])
+    if journal and status:
+        os.remove(journal.path)
+    return status, results
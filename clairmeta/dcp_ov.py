@@ -0,0 +1,103 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import copy
+import weakref
+import threading
+import collections
+
+from clairmeta.dcp import DCP
+from clairmeta.dcp_utils import cpl_probe_asset
+
+
+# Asset fields ``cpl_probe_asset`` depends on
+PROBE_INPUT_FIELDS = ["Stereoscopic", "EntryPoint", "Duration"]
+# Asset fields set by ``cpl_probe_asset``
+PROBE_OUTPUT_FIELDS = ["Probe", "ProbeError"]
+
+
+class OVResolver(object):
+    """Resolve OV packages referenced by VF checks.
+
+    OV packages are parsed on demand without probing their assets, only
+    assets referenced by a VF are probed. Resolved packages and probes are
+    cached as long as the OV files are unchanged : checking many VF against
+    the same OV parse it and probe each of its assets once.
+
+    """
+
+    def __init__(self, max_packages=8):
+        """OVResolver constructor.
+
+        Args:
+            max_packages (int, optional): Number of OV packages cached,
+                least recently used are dropped first.
+
+        """
+        self.max_packages = max_packages
+        # Real path : (fingerprint, DCP)
+        self._packages = collections.OrderedDict()
+        # DCP : (dictionary of probe key : result, probe key : lock)
+        self._probes = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def resolve(self, path):
+        """Returns the OV DCP object, components are parsed on demand.
+
+        Args:
+            path (str): Absolute path of OriginalVersion DCP.
+
+        """
+        key = os.path.realpath(path)
+        dcp = DCP(path)
+        fingerprint = dcp.fingerprint()
+
+        with self._lock:
+            if key in self._packages and self._packages[key][0] == fingerprint:
+                dcp = self._packages[key][1]
+            else:
+                self._packages[key] = (fingerprint, dcp)
+                self._probes[dcp] = ({}, {})
+
+            self._packages.move_to_end(key)
+            while len(self._packages) > self.max_packages:
+                self._packages.popitem(last=False)
+
+            return dcp
+
+    def probe_asset(self, ov_dcp, asset, essence, path, cancel=None):
+        """Probe an OV asset referenced by a VF, see ``cpl_probe_asset``.
+
+        Args:
+            ov_dcp (clairmeta.DCP): OV DCP object, see ``resolve``.
+            asset (dict): Dictionary representation of the VF Asset,
+                updated with the probe results.
+            essence (str): Type of Asset.
+            path (str): Absolute path of Asset file (in the OV).
+            cancel (threading.Event, optional): Cancel the probe when set.
+
+        """
+        inputs = {k: asset[k] for k in PROBE_INPUT_FIELDS if k in asset}
+        key = (path, essence) + tuple(sorted(inputs.items()))
+
+        with self._lock:
+            probes, locks = self._probes.setdefault(ov_dcp, ({}, {}))
+            probe_lock = locks.setdefault(key, threading.Lock())
+
+        with probe_lock:
+            if key not in probes:
+                cpl_probe_asset(inputs, essence, path, cancel=cancel)
+                result = {k: v for k, v in inputs.items() if k in PROBE_OUTPUT_FIELDS}
+
+                # Interrupted and failed probes are not cached
+                if (cancel and cancel.is_set()) or "ProbeError" in result:
+                    asset.update(result)
+                    return
+                probes[key] = result
+
+            asset.update(copy.deepcopy(probes[key]))
+
+
+# Process wide resolver, shared by all checks
+OV_RESOLVER = OVResolver()
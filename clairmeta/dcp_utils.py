@@ -86,17 +86,86 @@ def list_cpl_assets(
 #
 
 
-def get_reel_for_asset(cpl, uuid):
+class UUIDIndex(object):
+    """UUID index of the package components.
+
+    Map each asset UUID to its AssetMap entry, PKL entries and CPL reel
+    occurrences (with the asset type) and each KeyId to its ContentKey,
+    all lookups are O(1). Components are added as they are parsed.
+
+    """
+
+    def __init__(self):
+        # UUID : (path, AssetMap asset dict)
+        self.assetmap = {}
+        # UUID : list of (PKL dict, PKL asset dict)
+        self.pkl = {}
+        # (CPL UUID, asset UUID) : (reel dict, asset type, asset dict)
+        self.cpl = {}
+        # (CPL UUID, asset type) : first reel dict
+        self.cpl_types = {}
+        # KeyId : ContentKey
+        self.keys = {}
+        self.cpl_ids = set()
+
+    def add_assetmap(self, assetmap):
+        for asset_id, path, asset in list_am_assets(assetmap):
+            self.assetmap.setdefault(asset_id, (path, asset))
+
+    def add_pkl(self, packinglist):
+        for asset_id, _, asset in list_pkl_assets(packinglist):
+            self.pkl.setdefault(asset_id, []).append((packinglist, asset))
+
+    def add_cpl(self, cpl):
+        cpl_node = cpl["Info"]["CompositionPlaylist"]
+        cpl_id = cpl_node["Id"]
+        self.cpl_ids.add(cpl_id)
+
+        for reel in cpl_node["ReelList"]:
+            for asset_type, asset in reel.get("Assets", {}).items():
+                self.cpl.setdefault((cpl_id, asset["Id"]), (reel, asset_type, asset))
+                self.cpl_types.setdefault((cpl_id, asset_type), reel)
+
+    def add_kdm(self, kdm):
+        for key_id, key in kdm["Info"]["KDM"]["Keys"].items():
+            if "ContentKey" in key:
+                self.keys.setdefault(key_id, key["ContentKey"])
+
+    def has_cpl(self, cpl):
+        return cpl["Info"]["CompositionPlaylist"]["Id"] in self.cpl_ids
+
+    def in_assetmap(self, uuid):
+        return uuid in self.assetmap
+
+    def pkl_for_asset(self, uuid):
+        """Returns the list of PKL dict referencing ``uuid``."""
+        return [pkl for pkl, _ in self.pkl.get(uuid, [])]
+
+    def cpl_asset(self, cpl, uuid):
+        """Returns (reel, asset type, asset) of ``uuid`` in ``cpl``, or None."""
+        return self.cpl.get((cpl["Info"]["CompositionPlaylist"]["Id"], uuid))
+
+    def first_reel_for_type(self, cpl, type):
+        return self.cpl_types.get((cpl["Info"]["CompositionPlaylist"]["Id"], type))
+
+
+def get_reel_for_asset(cpl, uuid, index=None):
     """Asset Reel lookup.
 
     Args:
         cpl (dict): Dictionary representation of CompositionPlayList.
         uuid (str): Asset UUID.
+        index (UUIDIndex, optional): Package UUID index, CPL reels are
+            scanned if ``cpl`` is not indexed.
 
     Returns:
         Returns the Reel Dictionary in which ``uuid`` Asset was found.
 
     """
+    if index and index.has_cpl(cpl):
+        found = index.cpl_asset(cpl, uuid)
+        return found[0] if found else None
+
     for reel in cpl["Info"]["CompositionPlaylist"]["ReelList"]:
         assets = reel.get("Assets", [])
         uuids = [a["Id"] for a in assets.values()]
@@ -105,18 +174,22 @@ def get_reel_for_asset(cpl, uuid):
             return reel
 
 
-def get_first_reel_for_asset_type(cpl, type):
+def get_first_reel_for_asset_type(cpl, type, index=None):
     """First reel of asset type lookup.
 
     Args:
         cpl (dict): Dictionary representation of CompositionPlayList.
         type (str): Type of asset.
+        index (UUIDIndex, optional): Package UUID index.
 
     Returns:
         Returns the first Reel's Dictionary containing an asset of matching
             ``type``.
 
     """
+    if index and index.has_cpl(cpl):
+        return index.first_reel_for_type(cpl, type)
+
     for reel in cpl["Info"]["CompositionPlaylist"]["ReelList"]:
         assets = reel.get("Assets", [])
 
@@ -124,17 +197,22 @@ def get_first_reel_for_asset_type(cpl, type):
             return reel
 
 
-def get_type_for_asset(cpl, uuid):
+def get_type_for_asset(cpl, uuid, index=None):
     """Asset Track type lookup (eg. Picture, Sound, AuxData, ...).
 
     Args:
         cpl (dict): Dictionary representation of CompositionPlayList.
         uuid (str): Asset UUID.
+        index (UUIDIndex, optional): Package UUID index.
 
     Returns:
         Returns the a string describing the asset type.
 
     """
+    if index and index.has_cpl(cpl):
+        found = index.cpl_asset(cpl, uuid)
+        return found[1] if found else "Unknown"
+
     for reel in cpl["Info"]["CompositionPlaylist"]["ReelList"]:
         assets = reel.get("Assets", [])
         for asset_type, asset in assets.items():
@@ -145,9 +223,10 @@ def get_type_for_asset(cpl, uuid):
 
 
 def get_contentkey_for_asset(dcp, asset):
-    """Asset encryption key lookup.
+    """Asset encryption key lookup, KDM are parsed if not done yet.
 
     Args:
+        dcp (clairmeta.DCP): DCP object.
         asset (dict): Dictionary representation of Asset.
 
     Returns:
@@ -163,10 +242,9 @@ def get_contentkey_for_asset(dcp, asset):
         raise ValueError("Asset {} don't have a KeyId tag".format(asset["Id"]))
 
     key_id = asset["KeyId"]
-    for kdm in dcp.list_kdm:
-        keys_list = kdm["Info"]["KDM"]["Keys"]
-        if key_id in keys_list and "ContentKey" in keys_list[key_id]:
-            return keys_list[key_id]["ContentKey"]
+    dcp.require("kdm")
+    if key_id in dcp.uuid_index.keys:
+        return dcp.uuid_index.keys[key_id]
 
     raise LookupError("Asset {} key was not found".format(asset["Id"]))
 
@@ -268,13 +346,14 @@ def cpl_extract_characteristics(cpl):
         cpl[cpl_key] = any(v)
 
 
-def cpl_probe_asset(asset, essence, path):
+def cpl_probe_asset(asset, essence, path, cancel=None):
     """Probe an individual MXF asset.
 
     Args:
         asset (dict): Dictionary representation of Asset.
         essence (str): Type of Asset.
         path (str): Absolute path of Asset file.
+        cancel (threading.Event, optional): Cancel the probe when set.
 
     """
     if not path.endswith(".mxf"):
@@ -282,7 +361,7 @@ def cpl_probe_asset(asset, essence, path):
 
     try:
         is_stereoscopic = asset.get("Stereoscopic", False)
-        asset["Probe"] = probe_mxf(path, stereoscopic=is_stereoscopic)
+        asset["Probe"] = probe_mxf(path, stereoscopic=is_stereoscopic, cancel=cancel)
 
         is_encrypted = asset["Probe"]["EncryptedEssence"]
         if essence == "Sound" and not is_encrypted:
@@ -291,6 +370,7 @@ def cpl_probe_asset(asset, essence, path):
                 int(asset["Probe"]["ChannelCount"]),
                 asset["EntryPoint"],
                 asset["Duration"],
+                cancel=cancel,
             )
     except Exception as e:
         asset["ProbeError"] = str(e)
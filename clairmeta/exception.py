@@ -30,3 +30,45 @@ class CheckException(ClairMetaException):
     """
 
     pass
+
+
+class CheckAbortedException(CheckException):
+    """Raised when a check is cancelled before completion (fail fast)."""
+
+    pass
+
+
+class JobQueueFullException(ClairMetaException):
+    """Raised when submitting a job to a full job queue."""
+
+    pass
+
+
+class MXFException(ClairMetaException):
+    """Raised when a MXF file structure can't be read."""
+
+    pass
+
+
+class J2KException(ClairMetaException):
+    """Raised when a JPEG 2000 codestream header can't be read."""
+
+    pass
+
+
+class SnapshotException(ClairMetaException):
+    """Raised when a parse snapshot can't be loaded or is outdated."""
+
+    pass
+
+
+class ImageException(ClairMetaException):
+    """Raised when an image file header can't be read."""
+
+    pass
+
+
+class ManifestException(ClairMetaException):
+    """Raised when a checksum manifest can't be written or read."""
+
+    pass
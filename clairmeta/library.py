@@ -0,0 +1,298 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import json
+import sqlite3
+import contextlib
+
+from clairmeta.logger import get_log
+from clairmeta.batch import ASSETMAP_NAMES
+from clairmeta.dcp_parse import assetmap_parse
+from clairmeta.dcp_utils import list_am_assets, list_cpl_assets
+from clairmeta.exception import ClairMetaException
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    subdirs TEXT,
+    package INTEGER
+);
+CREATE TABLE IF NOT EXISTS packages (
+    path TEXT PRIMARY KEY,
+    assetmap TEXT,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS assets (
+    package TEXT,
+    uuid TEXT,
+    path TEXT,
+    size INTEGER,
+    PRIMARY KEY (package, uuid)
+);
+CREATE INDEX IF NOT EXISTS assets_uuid ON assets (uuid);
+"""
+
+# Maximum number of parameters per query
+QUERY_CHUNK_SIZE = 500
+
+
+class LibraryIndex(object):
+    """Persistent index of the assets of all packages found in a library.
+
+    Every AssetMap entry (UUID, path, size, package) of the packages found
+    under the library roots is recorded in a sqlite database. Scans are
+    incremental : directories with an unchanged modification time are not
+    listed again and packages with an unchanged AssetMap are not parsed
+    again. Lookups only query the database.
+
+    """
+
+    def __init__(self, db_path):
+        """LibraryIndex constructor.
+
+        Args:
+            db_path (str): Index database file path, created if needed.
+
+        """
+        self.db_path = db_path
+        self.log = get_log()
+
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Database connection, committed on success."""
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @property
+    def roots(self):
+        """List of library roots absolute path."""
+        with self._connect() as db:
+            return [r[0] for r in db.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, path):
+        """Add a library root, see ``scan``.
+
+        Raises:
+            ClairMetaException: If ``path`` is not a valid directory.
+
+        """
+        if not os.path.isdir(path):
+            raise ClairMetaException("{} is not a valid folder".format(path))
+
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO roots VALUES (?)", (os.path.abspath(path),)
+            )
+
+    def scan(self, roots=None):
+        """Update the index.
+
+        Args:
+            roots (list, optional): Roots to scan, all library roots by
+                default.
+
+        Returns:
+            Dictionary with the number of packages found, (re)indexed and
+            removed from the index.
+
+        """
+        stats = {"packages": 0, "indexed": 0, "removed": 0}
+
+        for root in roots or self.roots:
+            root = os.path.abspath(root)
+            with self._connect() as db:
+                visited, packages = self._scan_root(db, root, stats)
+                stats["removed"] += self._remove_missing(db, root, visited, packages)
+
+        self.log.info(
+            "Library scan : {packages} package(s), {indexed} indexed, "
+            "{removed} removed".format(**stats)
+        )
+        return stats
+
+    def _scan_root(self, db, root, stats):
+        visited = set()
+        packages = set()
+        stack = [root]
+
+        while stack:
+            path = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            visited.add(path)
+
+            row = db.execute(
+                "SELECT mtime_ns, subdirs, package FROM directories WHERE path = ?",
+                (path,),
+            ).fetchone()
+
+            if row and row[0] == mtime_ns:
+                subdirs, is_package = json.loads(row[1]), bool(row[2])
+            else:
+                subdirs, is_package = self._list_directory(path)
+                db.execute(
+                    "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)",
+                    (path, mtime_ns, json.dumps(subdirs), int(is_package)),
+                )
+
+            if is_package:
+                packages.add(path)
+                stats["packages"] += 1
+                stats["indexed"] += self._index_package(db, path)
+            else:
+                stack.extend(subdirs)
+
+        return visited, packages
+
+    def _list_directory(self, path):
+        """Returns (sub directories, is package) of a directory."""
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return [], False
+
+        if any(e.name in ASSETMAP_NAMES for e in entries):
+            return [], True
+
+        subdirs = [
+            e.path
+            for e in entries
+            if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")
+        ]
+        return sorted(subdirs), False
+
+    def _index_package(self, db, path):
+        """Index the AssetMap of a package if it changed, returns 1 if so."""
+        for name in ASSETMAP_NAMES:
+            assetmap_path = os.path.join(path, name)
+            if os.path.isfile(assetmap_path):
+                break
+        else:
+            return 0
+
+        mtime_ns = os.stat(assetmap_path).st_mtime_ns
+        row = db.execute(
+            "SELECT assetmap, mtime_ns FROM packages WHERE path = ?", (path,)
+        ).fetchone()
+        if row and tuple(row) == (assetmap_path, mtime_ns):
+            return 0
+
+        assetmap = assetmap_parse(assetmap_path)
+        assets = []
+        if assetmap:
+            for uuid, asset_path, asset in list_am_assets(assetmap):
+                size = asset["ChunkList"]["Chunk"].get("Length")
+                assets.append((path, uuid, asset_path, size))
+
+        db.execute("DELETE FROM assets WHERE package = ?", (path,))
+        db.executemany("INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?)", assets)
+        db.execute(
+            "INSERT OR REPLACE INTO packages VALUES (?, ?, ?)",
+            (path, assetmap_path, mtime_ns),
+        )
+        return 1
+
+    def _remove_missing(self, db, root, visited, packages):
+        """Remove directories and packages of ``root`` no longer found."""
+        prefix = os.path.join(root, "")
+        query = "SELECT path FROM {} WHERE path = ? OR substr(path, 1, ?) = ?"
+        args = (root, len(prefix), prefix)
+
+        directories = [
+            r[0]
+            for r in db.execute(query.format("directories"), args)
+            if r[0] not in visited
+        ]
+        db.executemany(
+            "DELETE FROM directories WHERE path = ?", [(d,) for d in directories]
+        )
+
+        removed = [
+            r[0]
+            for r in db.execute(query.format("packages"), args)
+            if r[0] not in packages
+        ]
+        for package in removed:
+            db.execute("DELETE FROM assets WHERE package = ?", (package,))
+            db.execute("DELETE FROM packages WHERE path = ?", (package,))
+
+        return len(removed)
+
+    def find_assets(self, uuids):
+        """Lookup assets by UUID.
+
+        Args:
+            uuids (list): Assets UUID.
+
+        Returns:
+            Dictionary of UUID : list of dictionaries (package, path, size),
+            UUID not found are omitted.
+
+        """
+        uuids = list(uuids)
+        found = {}
+
+        with self._connect() as db:
+            for i in range(0, len(uuids), QUERY_CHUNK_SIZE):
+                chunk = uuids[i : i + QUERY_CHUNK_SIZE]
+                rows = db.execute(
+                    "SELECT uuid, package, path, size FROM assets "
+                    "WHERE uuid IN ({}) ORDER BY package".format(
+                        ",".join("?" * len(chunk))
+                    ),
+                    chunk,
+                )
+                for uuid, package, path, size in rows:
+                    found.setdefault(uuid, []).append(
+                        {"package": package, "path": path, "size": size}
+                    )
+
+        return found
+
+    def find_ov(self, dcp):
+        """Find the package containing the assets a VF references.
+
+        Args:
+            dcp (clairmeta.DCP): VF DCP object.
+
+        Returns:
+            Absolute path of the package containing most of the assets
+            missing from ``dcp``, None if none is found.
+
+        """
+        missing = {
+            asset["Id"]
+            for cpl in dcp.list_cpl
+            for _, asset in list_cpl_assets(cpl)
+            if not dcp.uuid_index.in_assetmap(asset["Id"])
+        }
+        if not missing:
+            return None
+
+        dcp_path = os.path.abspath(dcp.path)
+        coverage = {}
+        for uuid, assets in self.find_assets(missing).items():
+            for package in {a["package"] for a in assets}:
+                if package != dcp_path:
+                    coverage[package] = coverage.get(package, 0) + 1
+
+        if not coverage:
+            return None
+
+        # Most assets found first, then path order for stable results
+        return min(coverage, key=lambda p: (-coverage[p], p))
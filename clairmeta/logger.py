@@ -3,7 +3,6 @@
 
 import os
 import logging
-from logging.handlers import RotatingFileHandler
 
 from clairmeta.settings import LOG_SETTINGS
 
@@ -42,6 +41,8 @@ def init_console(log, formatter):
 
 def init_file(log, formatter):
     """Initialize file handler."""
+    from logging.handlers import RotatingFileHandler
+
     try:
         log_dir = os.path.expanduser(LOG_SETTINGS["file_name"])
         log_file = log_dir
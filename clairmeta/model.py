@@ -0,0 +1,431 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import sys
+import enum
+
+
+# Strings up to this size are interned (UUID, enumerated values, etc...)
+INTERN_MAX_LENGTH = 64
+
+# Key tuples shared between all nodes with the same keys
+_KEYS = {}
+
+
+class EssenceType(str, enum.Enum):
+    PICTURE = "Picture"
+    SOUND = "Sound"
+    AUXDATA = "AuxData"
+    SUBTITLE = "Subtitle"
+    MARKERS = "Markers"
+    METADATA = "Metadata"
+    OPEN_CAPTION = "OpenCaption"
+    CLOSED_CAPTION = "ClosedCaption"
+
+
+class Schema(str, enum.Enum):
+    SMPTE = "SMPTE"
+    SMPTE_STEREOSCOPIC = "SMPTE Stereoscopic"
+    INTEROP = "Interop"
+    ATMOS = "Atmos"
+    UNKNOWN = "Unknown"
+
+
+class PackageType(str, enum.Enum):
+    OV = "OV"
+    VF = "VF"
+    UNKNOWN = "Unknown"
+
+
+def intern_keys(keys):
+    """Returns a shared tuple of interned keys.
+
+    >>> intern_keys(['Id', 'Path']) is intern_keys(('Id', 'Path'))
+    True
+
+    """
+    keys = tuple(sys.intern(k) if isinstance(k, str) else k for k in keys)
+    return _KEYS.setdefault(keys, keys)
+
+
+def compact(value):
+    """Convert a parsed value to its compact representation.
+
+    Dictionaries are converted to ``Node``, lists to ``NodeList`` and short
+    strings are interned.
+
+    """
+    if isinstance(value, dict):
+        return Node.from_dict(value)
+    if isinstance(value, list):
+        return NodeList(compact(v) for v in value)
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+def expand(value):
+    """Convert a compact value back to its parsed representation.
+
+    >>> expand(compact({'Id': 'abc', 'List': [1, {'Size': 2}]}))
+    {'Id': 'abc', 'List': [1, {'Size': 2}]}
+
+    """
+    if isinstance(value, (Node, Record)):
+        return value.to_dict()
+    if isinstance(value, NodeList):
+        return [expand(v) for v in value]
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class NodeList(tuple):
+    """Immutable list of compact values."""
+
+    __slots__ = ()
+
+
+class Node(object):
+    """Compact and immutable dictionary.
+
+    Keys tuple is shared between all nodes with the same keys, values are
+    stored in a tuple.
+
+    """
+
+    __slots__ = ("_keys", "_values")
+
+    @classmethod
+    def from_dict(cls, in_dict):
+        node = cls.__new__(cls)
+        node._keys = intern_keys(in_dict.keys())
+        node._values = tuple(compact(v) for v in in_dict.values())
+        return node
+
+    def to_dict(self):
+        return {k: expand(v) for k, v in zip(self._keys, self._values)}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._keys else default
+
+    def keys(self):
+        return self._keys
+
+    def items(self):
+        return zip(self._keys, self._values)
+
+
+def load_enum(enum_class):
+    def load(value):
+        try:
+            return enum_class(value)
+        except ValueError:
+            return compact(value)
+
+    return load
+
+
+def load_uuid(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def load_records(record_class):
+    def load(values):
+        return NodeList(record_class.from_dict(v) for v in values)
+
+    return load
+
+
+class Record(object):
+    """Compact typed representation of a parsed dictionary.
+
+    Keys listed in ``FIELDS`` are stored as typed attributes, other keys
+    are kept as compact values (see ``compact``). ``to_dict`` builds back
+    the exact same dictionary, with the same key order.
+
+    """
+
+    # Dictionary key : (attribute name, load function)
+    FIELDS = {}
+    __slots__ = ("_keys", "_extra")
+
+    @classmethod
+    def from_dict(cls, in_dict):
+        record = cls.__new__(cls)
+        for attr, _ in cls.FIELDS.values():
+            setattr(record, attr, None)
+
+        extra = []
+        for k, v in in_dict.items():
+            if k in cls.FIELDS:
+                attr, load = cls.FIELDS[k]
+                setattr(record, attr, load(v))
+            else:
+                extra.append(compact(v))
+
+        record._keys = intern_keys(in_dict.keys())
+        record._extra = tuple(extra)
+        return record
+
+    def to_dict(self):
+        out = {}
+        extra = iter(self._extra)
+        for k in self._keys:
+            if k in self.FIELDS:
+                out[k] = expand(getattr(self, self.FIELDS[k][0]))
+            else:
+                out[k] = expand(next(extra))
+        return out
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, self.FIELDS[key][0])
+
+        extra_keys = [k for k in self._keys if k not in self.FIELDS]
+        try:
+            return self._extra[extra_keys.index(key)]
+        except ValueError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def get(self, key, default=None):
+        return self[key] if key in self._keys else default
+
+
+class Probe(Record):
+    """MXF asset probe metadata, see ``probe_mxf``."""
+
+    FIELDS = {
+        "EditRate": ("edit_rate", compact),
+        "ContainerDuration": ("duration", compact),
+        "Resolution": ("resolution", compact),
+        "EncryptedEssence": ("encrypted", compact),
+    }
+    __slots__ = ("edit_rate", "duration", "resolution", "encrypted")
+
+
+class ReelAsset(Record):
+    """CPL reel asset (eg. MainPicture)."""
+
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "KeyId": ("key_id", load_uuid),
+        "EssenceType": ("essence", load_enum(EssenceType)),
+        "Schema": ("schema", load_enum(Schema)),
+        "Path": ("path", compact),
+        "AbsolutePath": ("absolute_path", compact),
+        "Encrypted": ("encrypted", compact),
+        "EditRate": ("edit_rate", compact),
+        "Duration": ("duration", compact),
+        "EntryPoint": ("entry_point", compact),
+        "Probe": ("probe", Probe.from_dict),
+    }
+    __slots__ = tuple(attr for attr, _ in FIELDS.values())
+
+
+def load_reel_assets(assets):
+    return NodeList(
+        (load_enum(EssenceType)(k), ReelAsset.from_dict(v)) for k, v in assets.items()
+    )
+
+
+class Reel(Record):
+    """CPL reel, see ``cpl_reels_parse``."""
+
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "Position": ("position", compact),
+        "Assets": ("assets", load_reel_assets),
+    }
+    __slots__ = ("id", "position", "assets")
+
+    def to_dict(self):
+        out = super(Reel, self).to_dict()
+        if "Assets" in out:
+            out["Assets"] = {expand(k): v.to_dict() for k, v in self.assets}
+        return out
+
+
+class CompositionPlaylist(Record):
+    """CPL root node, see ``cpl_parse``."""
+
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "PKLId": ("pkl_id", load_uuid),
+        "ContentTitleText": ("title", compact),
+        "Schema": ("schema", load_enum(Schema)),
+        "ReelList": ("reels", load_records(Reel)),
+    }
+    __slots__ = ("id", "pkl_id", "title", "schema", "reels")
+
+
+class PKLAsset(Record):
+    """PKL asset entry."""
+
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "Hash": ("hash", compact),
+        "Size": ("size", compact),
+        "Type": ("type", compact),
+        "Path": ("path", compact),
+    }
+    __slots__ = ("id", "hash", "size", "type", "path")
+
+
+class AssetMapEntry(Record):
+    """AssetMap asset entry."""
+
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "PackingList": ("packing_list", compact),
+        "ChunkList": ("chunks", compact),
+    }
+    __slots__ = ("id", "packing_list", "chunks")
+
+    @property
+    def path(self):
+        return self.chunks["Chunk"]["Path"]
+
+
+class AssetList(Record):
+    """AssetMap and PKL AssetList node."""
+
+    __slots__ = ("assets",)
+
+
+class AssetMapAssetList(AssetList):
+    FIELDS = {"Asset": ("assets", load_records(AssetMapEntry))}
+    __slots__ = ()
+
+
+class PKLAssetList(AssetList):
+    FIELDS = {"Asset": ("assets", load_records(PKLAsset))}
+    __slots__ = ()
+
+
+class AssetMapNode(Record):
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "Schema": ("schema", load_enum(Schema)),
+        "AssetList": ("asset_list", AssetMapAssetList.from_dict),
+    }
+    __slots__ = ("id", "schema", "asset_list")
+
+
+class PackingListNode(Record):
+    FIELDS = {
+        "Id": ("id", load_uuid),
+        "Schema": ("schema", load_enum(Schema)),
+        "AssetList": ("asset_list", PKLAssetList.from_dict),
+    }
+    __slots__ = ("id", "schema", "asset_list")
+
+
+def load_info(root_name, record_class):
+    """Load the ``Info`` node of a parsed XML file, see ``generic_parse``."""
+
+    def load(info):
+        if set(info.keys()) != {root_name}:
+            return compact(info)
+        return NodeList([record_class.from_dict(info[root_name])])
+
+    return load
+
+
+class XMLFile(Record):
+    """Parsed package XML file (AssetMap, PKL, CPL)."""
+
+    ROOT = ""
+    __slots__ = ("file_name", "file_path", "info")
+
+    @property
+    def node(self):
+        """Root node record."""
+        return self.info[0] if isinstance(self.info, NodeList) else None
+
+    def to_dict(self):
+        out = super(XMLFile, self).to_dict()
+        if self.node is not None:
+            out["Info"] = {self.ROOT: self.node.to_dict()}
+        return out
+
+
+class AssetMap(XMLFile):
+    ROOT = "AssetMap"
+    FIELDS = {
+        "FileName": ("file_name", compact),
+        "FilePath": ("file_path", compact),
+        "Info": ("info", load_info(ROOT, AssetMapNode)),
+    }
+    __slots__ = ()
+
+
+class PackingList(XMLFile):
+    ROOT = "PackingList"
+    FIELDS = {
+        "FileName": ("file_name", compact),
+        "FilePath": ("file_path", compact),
+        "Info": ("info", load_info(ROOT, PackingListNode)),
+    }
+    __slots__ = ()
+
+
+class CPL(XMLFile):
+    ROOT = "CompositionPlaylist"
+    FIELDS = {
+        "FileName": ("file_name", compact),
+        "FilePath": ("file_path", compact),
+        "Info": ("info", load_info(ROOT, CompositionPlaylist)),
+        "CPLType": ("cpl_type", load_enum(PackageType)),
+    }
+    __slots__ = ("cpl_type",)
+
+
+def load_asset_list(asset_list):
+    return NodeList((load_uuid(k), compact(v)) for k, v in asset_list.items())
+
+
+class Package(Record):
+    """Compact representation of DCP metadata, see ``DCP.metadata``.
+
+    Memory footprint is a fraction of the parsed dictionaries : repeated
+    keys and UUID are shared, enumerated values are stored as enums. Use
+    ``to_dict`` to build back the metadata dictionary.
+
+    """
+
+    FIELDS = {
+        "asset_list": ("assets", load_asset_list),
+        "assetmap_list": ("assetmaps", load_records(AssetMap)),
+        "cpl_list": ("cpls", load_records(CPL)),
+        "pkl_list": ("pkls", load_records(PackingList)),
+        "package_type": ("package_type", load_enum(PackageType)),
+        "path": ("path", compact),
+        "size_bytes": ("size", compact),
+        "schema": ("schema", load_enum(Schema)),
+    }
+    __slots__ = tuple(attr for attr, _ in FIELDS.values())
+
+    def to_dict(self):
+        out = super(Package, self).to_dict()
+        if "asset_list" in out:
+            out["asset_list"] = {k: expand(v) for k, v in self.assets}
+        return out
@@ -50,6 +50,31 @@ DCP_CHECK_PROFILE = {
     "bypass": [],
     # Allowed foreign files, paths are relative to the DCP root
     "allowed_foreign_files": [],
+    # Stop checking on the first ERROR level error found, the report is then
+    # partial and marked as aborted.
+    "fail_fast": False,
+    # Additional digests computed while checking PKL hashes, in the same
+    # read (eg. md5, or xxh64 with the optional xxhash package)
+    "digests": [],
+    # Library asset index (sqlite database) used to find the OV of a VF
+    # checked without OV path, see clairmeta.library.LibraryIndex
+    "library": "",
+    # I/O settings, to avoid disturbing a playback server while checking
+    # - read_limit : maximum read bandwidth in MB/s (0 for unlimited)
+    # - read_schedule : list of time of day windows with a specific limit,
+    #   eg. {"start": "14:00", "end": "02:00", "read_limit": 20}
+    # - read_mode : cached (regular reads), fadvise (evict pages already
+    #   read from the page cache) or direct (O_DIRECT, bypass page cache)
+    # - device_readers : number of files hashed concurrently on each device
+    #   (file system), distinct devices are always read in parallel
+    # - idle_priority : run external tools (asdcp, sox) at idle I/O priority
+    "io": {
+        "read_limit": 0,
+        "read_schedule": [],
+        "read_mode": "cached",
+        "device_readers": 1,
+        "idle_priority": False,
+    },
 }
 
 
@@ -8,6 +8,43 @@ from datetime import datetime
 from clairmeta.utils.file import human_size
 
 
+class CheckCriticality(object):
+    """Error criticality resolution according to a check profile."""
+
+    def __init__(self, profile):
+        """Constructor for CheckCriticality.
+
+        Args:
+            profile (dict): Checker profile.
+
+        """
+        levels = profile["criticality"]
+        self.default = levels.get("default", "ERROR")
+        # Translate Perl like syntax to Python
+        self.levels = [
+            (re.compile(k.replace("*", ".*")), len(k.replace("*", ".*")), v)
+            for k, v in levels.items()
+        ]
+
+    def error_criticality(self, error):
+        """Returns the criticality level for ``error``.
+
+        The best match (longest pattern) found in the profile is selected.
+
+        """
+        score_profile = {0: self.default}
+        for c_regex, c_score, c_level in self.levels:
+            if c_regex.search(error.full_name()):
+                score_profile[c_score] = c_level
+
+        return score_profile[max(score_profile.keys())]
+
+    def assign(self, check):
+        """Assign criticality for each errors of a check execution."""
+        for error in check.errors:
+            error.criticality = self.error_criticality(error)
+
+
 class CheckReport(object):
     """Check report listing all checks executions."""
 
@@ -27,17 +64,24 @@ class CheckReport(object):
         "BYPASS": "Bypass(s)",
     }
 
-    def __init__(self, dcp, profile):
+    def __init__(self, dcp, profile, aborted=False, digests=None):
         """Constructor for CheckReport.
 
         Args:
             dcp (clairmeta.DCP): DCP.
             profile (dict): Checker profile.
+            aborted (boolean, optional): Check process was aborted on the
+                first error (fail fast), the report is partial.
+            digests (dict, optional): Digests of the package files computed
+                during the check, relative path: dictionary of algorithm:
+                hexadecimal digest.
 
         """
         self.dcp = dcp
         self.checks = dcp.checks
         self.profile = profile
+        self.aborted = aborted
+        self.digests = digests or {}
         self.date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
         self.duration = sum([c.seconds_elapsed for c in self.checks])
 
@@ -86,6 +130,8 @@ class CheckReport(object):
         """Format the report in a human friendly way."""
         report = ""
         report += "Status : {}\n".format("Success" if self.is_valid() else "Fail")
+        if self.aborted:
+            report += "Aborted : partial report, stopped on first error\n"
         report += "Path : {}\n".format(self.dcp.path)
         report += "Size : {}\n".format(human_size(self.dcp.size))
         report += "Total check : {}\n".format(self.checks_count())
@@ -135,20 +181,9 @@ class CheckReport(object):
 
     def _detect_check_criticality(self):
         """Assign criticality for each errors."""
-        levels = self.profile["criticality"]
-        default = levels.get("default", "ERROR")
-        # Translate Perl like syntax to Python
-        levels = {k.replace("*", ".*"): v for k, v in levels.items()}
-
+        criticality = CheckCriticality(self.profile)
         for check in self.checks:
-            for error in check.errors:
-                score_profile = {0: default}
-                for c_name, c_level in levels.items():
-                    # Assumes python is internally caching regex compilation
-                    if re.search(c_name, error.full_name()):
-                        score_profile[len(c_name)] = c_level
-
-                error.criticality = score_profile[max(score_profile.keys())]
+            criticality.assign(check)
 
     def _dump_stack(self, out_str, key, values, indent_level):
         """Recursively iterate through the error message stack.
@@ -214,10 +249,38 @@ class CheckReport(object):
             "dcp_path": self.dcp.path,
             "dcp_size": self.dcp.size,
             "valid": self.is_valid(),
+            "aborted": self.aborted,
             "profile": self.profile,
             "date": self.date,
             "duration_seconds": self.duration,
             "message": self.pretty_str(),
             "unique_checks_count": self.checks_count(),
             "checks": [c.to_dict() for c in self.checks],
+            "digests": self.digests,
+        }
+
+    def summary_dict(self):
+        """Returns a dictionary summary, without checks details."""
+        return {
+            "dcp_path": self.dcp.path,
+            "dcp_size": self.dcp.size,
+            "valid": self.is_valid(),
+            "aborted": self.aborted,
+            "date": self.date,
+            "duration_seconds": self.duration,
+            "unique_checks_count": self.checks_count(),
+            "criticality": {
+                c: len(self.errors_by_criticality(c))
+                for c in self.ORDERED_STATUS
+                if c != "BYPASS"
+            },
+            "errors": [
+                {
+                    "name": error.full_name(),
+                    "criticality": error.criticality,
+                    "message": error.message,
+                }
+                for check in self.checks
+                for error in check.errors
+            ],
         }
@@ -3,9 +3,12 @@
 
 import os
 
-from clairmeta.sequence_check import check_sequence
+from clairmeta.sequence_check import list_sequence_errors
 from clairmeta.utils.sys import key_by_path_dict
 from clairmeta.utils.probe import probe_folder
+from clairmeta.sequence_manifest import make_manifest, verify_manifest
+from clairmeta.utils.sequence import scan_tree, summarize
+from clairmeta.settings import SEQUENCE_SETTINGS
 
 
 class Sequence(object):
@@ -25,7 +28,16 @@ class Sequence(object):
             raise ValueError("{} is not a valid folder".format(path))
 
         self.path = path
-        self.probe_folder = probe_folder(path)
+        # Single scan of the folder, shared by probe, check and manifests
+        self.tree = scan_tree(path, jobs=SEQUENCE_SETTINGS["ALL"]["scan_jobs"])
+        self._probe_folder = None
+
+    @property
+    def probe_folder(self):
+        """Sequences metadata, probed on first access."""
+        if self._probe_folder is None:
+            self._probe_folder = probe_folder(self.path, tree=self.tree)
+        return self._probe_folder
 
     def parse(self):
         """Extract metadata."""
@@ -35,18 +47,25 @@ class Sequence(object):
         """Check validity.
 
         Raises:
-            ValueError: Validity check failure.
+            ValueError: Validity check failure, errors found in all folders
+                and sequences are listed.
 
         """
-        check_sequence(
+        errors = list_sequence_errors(
             self.path,
             setting["allowed_extensions"],
             setting["file_white_list"],
             setting["directory_white_list"],
+            tree=self.tree,
         )
 
+        probe_errors = []
         for folder, seqs in self.probe_folder.items():
             for seq, keys in seqs.items():
+                probe_errors += [
+                    "{} - {}".format(folder, e) for e in keys.get("ProbeErrors", [])
+                ]
+
                 ext = keys.get("Extension")
                 check_keys = setting["allowed_extensions"].get("." + ext)
                 probe_keys = keys.get("Probe")
@@ -54,8 +73,100 @@ class Sequence(object):
                 if not probe_keys or not check_keys:
                     continue
 
-                self._check_keys(check_keys, probe_keys, folder)
+                try:
+                    self._check_keys(check_keys, probe_keys, folder)
+                except ValueError as e:
+                    errors.append(str(e))
+
+        max_errors = SEQUENCE_SETTINGS["ALL"]["max_errors"]
+        errors += summarize(probe_errors, len(probe_errors), max_errors)
+        if errors:
+            raise ValueError("\n".join(errors))
+
+        return True
+
+    def make_manifest(
+        self,
+        manifest_path,
+        setting=None,
+        algorithm="md5",
+        manifest_format="mhl",
+        callback=None,
+    ):
+        """Write a checksum manifest of all the sequence files.
+
+        Args:
+            manifest_path (str): Manifest file absolute path.
+            setting (dict, optional): Files and directories white list of
+                this setting are not part of the manifest.
+            algorithm (str, optional): Digest algorithm, one of md5, sha1
+                or xxh64.
+            manifest_format (str, optional): Either 'mhl' or 'text'.
+            callback (func, optional): Callback function, see
+                ``ConsoleProgress``.
+
+        Returns:
+            Dictionary of relative path : hexadecimal digest.
+
+        """
+        setting = setting or {}
+        return make_manifest(
+            self.path,
+            manifest_path,
+            algorithm=algorithm,
+            manifest_format=manifest_format,
+            ignore_files=setting.get("file_white_list"),
+            ignore_dirs=setting.get("directory_white_list"),
+            callback=callback,
+            jobs=SEQUENCE_SETTINGS["ALL"]["hash_jobs"],
+            tree=self.tree,
+        )
+
+    def verify_manifest(
+        self, manifest_path, setting=None, journal_path=None, callback=None
+    ):
+        """Verify the sequence files against a checksum manifest.
+
+        Args:
+            manifest_path (str): MHL or text manifest absolute path.
+            setting (dict, optional): Files and directories white list of
+                this setting are not verified.
+            journal_path (str, optional): Verification journal, an
+                interrupted verification is resumed from it.
+            callback (func, optional): Callback function, see
+                ``ConsoleProgress``.
+
+        Raises:
+            ValueError: Verification failure, all errors found are listed.
+
+        """
+        setting = setting or {}
+        result = verify_manifest(
+            self.path,
+            manifest_path,
+            journal_path=journal_path,
+            ignore_files=setting.get("file_white_list"),
+            ignore_dirs=setting.get("directory_white_list"),
+            callback=callback,
+            jobs=SEQUENCE_SETTINGS["ALL"]["hash_jobs"],
+            tree=self.tree,
+        )
 
+        max_errors = SEQUENCE_SETTINGS["ALL"]["max_errors"]
+        errors = []
+        for key, msg in [
+            ("mismatch", "checksum mismatch"),
+            ("missing", "file not found"),
+            ("extra", "file not listed in manifest"),
+        ]:
+            errors += summarize(
+                ["{} : {}".format(f, msg) for f in result[key][:max_errors]],
+                len(result[key]),
+                max_errors,
+            )
+
+        if errors:
+            raise ValueError("\n".join(errors))
         return True
 
     def _check_keys(self, check_keys, probe_keys, folder):
@@ -4,11 +4,12 @@
 import os
 
 from clairmeta.settings import SEQUENCE_SETTINGS
-from clairmeta.utils.sys import number_is_close
-from clairmeta.utils.file import parse_name
+from clairmeta.utils.sequence import scan_tree, filter_tree, sequence_errors
 
 
-def check_sequence(path, allowed_extensions, ignore_files=None, ignore_dirs=None):
+def check_sequence(
+    path, allowed_extensions, ignore_files=None, ignore_dirs=None, tree=None
+):
     """Check image file sequence coherence recursively.
 
     Args:
@@ -16,6 +17,32 @@ def check_sequence(path, allowed_extensions, ignore_files=None, ignore_dirs=None
         allowed_extensions (dict): Dictionary mapping extensions.
         ignore_files (list): List of files name to ignore.
         ignore_dirs (list): List of directory name to ignore.
+        tree (dict, optional): ``path`` already scanned, see
+            ``clairmeta.utils.sequence.scan_tree``.
+
+    Raises:
+        ValueError: If ``path`` is not a valid directory.
+        ValueError: If ``path`` is an empty directory.
+        ValueError: If ``allowed_extensions`` is not a dictionary.
+        ValueError: If image file sequence check failed, all errors found
+            are listed.
+
+    """
+    errors = list_sequence_errors(
+        path, allowed_extensions, ignore_files, ignore_dirs, tree
+    )
+    if errors:
+        raise ValueError("\n".join(errors))
+
+
+def list_sequence_errors(
+    path, allowed_extensions, ignore_files=None, ignore_dirs=None, tree=None
+):
+    """List image file sequence coherence errors, see ``check_sequence``.
+
+    Returns:
+        List of error messages, prefixed by the folder path relative to
+        ``path`` parent.
 
     Raises:
         ValueError: If ``path`` is not a valid directory.
@@ -30,22 +57,31 @@ def check_sequence(path, allowed_extensions, ignore_files=None, ignore_dirs=None
     if not isinstance(allowed_extensions, dict):
         raise ValueError("Wrong arguments, allowed_extensions must be a dict")
 
-    for dirpath, dirnames, filenames in os.walk(path, topdown=True):
-        # Filter out explicitly ignored files
-        if ignore_files:
-            filenames = [f for f in filenames if f not in ignore_files]
-        if ignore_dirs:
-            # Why dirnames[:] ? Quote from the documentation :
-            #   When topdown is True, the caller can modify the dirnames list
-            #   in-place (perhaps using del or slice assignment).
-            dirnames[:] = [d for d in dirnames if d not in ignore_dirs]
+    settings = SEQUENCE_SETTINGS["ALL"]
+    if tree is None:
+        tree = scan_tree(path, jobs=settings["scan_jobs"])
+    tree = filter_tree(tree, path, ignore_files, ignore_dirs)
 
+    errors = []
+    for dirpath, (filenames, sizes) in tree.items():
         # No files in folder, nothing to check..
         if not filenames:
             continue
 
-        # First file in folder is the reference
-        check_sequence_folder(dirpath, filenames, allowed_extensions)
+        folder = os.path.relpath(dirpath, os.path.dirname(path))
+        folder = folder.replace(os.sep, "/")
+        errors += [
+            "{} - {}".format(folder, e)
+            for e in sequence_errors(
+                filenames,
+                sizes,
+                allowed_extensions,
+                settings["size_diff_tol"],
+                settings["max_errors"],
+            )
+        ]
+
+    return errors
 
 
 def check_sequence_folder(dirpath, filenames, allowed_extensions):
@@ -65,57 +101,22 @@ def check_sequence_folder(dirpath, filenames, allowed_extensions):
         allowed_extensions (dict): Dictionary mapping extensions.
 
     Raises:
-        ValueError: If image file sequence check failed.
+        ValueError: If image file sequence check failed, all errors found
+            are listed.
 
     """
-    settings = SEQUENCE_SETTINGS["ALL"]
-    size_rtol = settings["size_diff_tol"] / 1e2
-
-    # First file in folder is the reference
-    fileref = filenames[0]
-    fullpath_ref = os.path.join(dirpath, fileref)
-    filename, idx = parse_name(fileref)
-    filesize = os.path.getsize(fullpath_ref)
-    extension = os.path.splitext(fileref)[-1]
-    sequence_idx = [idx]
-
-    # Check that this reference is conform
-    if extension not in allowed_extensions:
-        raise ValueError("extension {} not authorized".format(extension))
-
-    # Then check that all subsequent files are identical
-    for f in filenames[1:]:
-        fullpath = os.path.join(dirpath, f)
-        current_ext = os.path.splitext(f)[-1]
-        current_filename, current_idx = parse_name(f)
-        current_filesize = os.path.getsize(fullpath)
-        sequence_idx.append(current_idx)
-
-        if current_filename != filename:
-            raise ValueError(
-                "Filename difference, {} but expected {}".format(
-                    current_filename, filename
-                )
-            )
-        if current_ext != extension:
-            raise ValueError(
-                "File extension difference, {} but expected {}".format(
-                    current_filename, extension
-                )
-            )
-        if not number_is_close(current_filesize, filesize, rtol=size_rtol):
-            raise ValueError(
-                "{} : file size difference got {} but expected {}"
-                " - tolerance of {}%".format(
-                    current_filename,
-                    current_filesize,
-                    filesize,
-                    settings["size_diff_tol"],
-                )
-            )
+    import numpy as np
 
-    # Check for jump in sequence (ie. missing frame(s))
-    sequence_idx.sort()
-    for idx, fno in enumerate(sequence_idx, sequence_idx[0]):
-        if idx != fno:
-            raise ValueError("File sequence jump found, file {} not found".format(idx))
+    settings = SEQUENCE_SETTINGS["ALL"]
+    sizes = np.array(
+        [os.path.getsize(os.path.join(dirpath, f)) for f in filenames], dtype=np.int64
+    )
+    errors = sequence_errors(
+        filenames,
+        sizes,
+        allowed_extensions,
+        settings["size_diff_tol"],
+        settings["max_errors"],
+    )
+    if errors:
+        raise ValueError("\n".join(errors))
@@ -0,0 +1,446 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import time
+import socket
+import getpass
+import concurrent.futures
+from xml.sax.saxutils import escape
+from xml.etree import ElementTree
+
+from clairmeta.info import __version__
+from clairmeta.dcp_copy import CopyJournal, file_identity
+from clairmeta.exception import ManifestException
+from clairmeta.utils.file import (
+    AggregateProgress,
+    ConsoleProgress,
+    file_digests,
+    write_digest_manifest,
+)
+from clairmeta.utils.sequence import scan_tree, filter_tree
+
+
+MANIFEST_FORMATS = ["text", "mhl"]
+# Digest algorithm : MHL (v1.1) hash element
+MHL_HASH_TAGS = {"md5": "md5", "sha1": "sha1", "xxh64": "xxhash64be"}
+# Text manifest hexadecimal digest length : digest algorithm
+TEXT_DIGEST_LENGTHS = {32: "md5", 40: "sha1", 16: "xxh64"}
+
+# Files hashed concurrently, for each worker
+PENDING_PER_JOB = 4
+
+# Verification journal flushed to disk every N records or seconds
+JOURNAL_SYNC_RECORDS = 1000
+JOURNAL_SYNC_INTERVAL = 5
+
+
+def utc_date(timestamp=None):
+    """Format a timestamp as an UTC date (ISO 8601).
+
+    >>> utc_date(0)
+    '1970-01-01T00:00:00Z'
+
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def list_files(path, ignore_files=None, ignore_dirs=None, tree=None):
+    """List files of a folder tree.
+
+    Args:
+        path (str): Base folder path.
+        ignore_files (list, optional): List of files name to ignore.
+        ignore_dirs (list, optional): List of directory name to ignore.
+        tree (dict, optional): ``path`` already scanned, see
+            ``clairmeta.utils.sequence.scan_tree``.
+
+    Returns:
+        Dictionary of relative path (with '/' separator) : file size.
+
+    """
+    if tree is None:
+        tree = scan_tree(path)
+    tree = filter_tree(tree, path, ignore_files, ignore_dirs)
+
+    files = {}
+    for dirpath, (names, sizes) in tree.items():
+        folder = os.path.relpath(dirpath, path)
+        for name, size in zip(names, sizes.tolist()):
+            rel_path = os.path.normpath(os.path.join(folder, name))
+            files[rel_path.replace(os.sep, "/")] = size
+    return files
+
+
+def hash_files(path, files, algorithm, callback=None, jobs=8, on_done=None):
+    """Hash files concurrently.
+
+    A bounded number of files are read at once, this suits sequences made
+    of many medium sized files.
+
+    Args:
+        path (str): Base folder path.
+        files (dict): Dictionary of relative path : file size.
+        algorithm (str): Digest algorithm, see ``new_hasher``.
+        callback (func, optional): Callback function, see
+            ``ConsoleProgress``. When hashing concurrently, it is called
+            with the aggregate progression of ``path`` (see
+            ``AggregateProgress``).
+        jobs (int, optional): Number of files read concurrently.
+        on_done (func, optional): Called with (relative path, digest) as
+            soon as a file is hashed.
+
+    Returns:
+        Dictionary of relative path : hexadecimal digest.
+
+    """
+    total_size = sum(files.values())
+    if isinstance(callback, ConsoleProgress):
+        callback._total_size = max(1, total_size)
+
+    if callback and jobs > 1:
+        # Files hashed concurrently are reported as a whole
+        progress = AggregateProgress(callback, path, total_size)
+    else:
+        progress = callback
+
+    def digest(rel_path):
+        file_path = os.path.join(path, *rel_path.split("/"))
+        return file_digests(
+            file_path,
+            [algorithm],
+            callback=progress,
+            use_cache=False,
+        )[algorithm]
+
+    digests = {}
+    pending = {}
+    queue = iter(sorted(files))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while True:
+            for rel_path in queue:
+                pending[executor.submit(digest, rel_path)] = rel_path
+                if len(pending) >= jobs * PENDING_PER_JOB:
+                    break
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                rel_path = pending.pop(future)
+                digests[rel_path] = future.result()
+                if on_done:
+                    on_done(rel_path, digests[rel_path])
+
+    return digests
+
+
+def write_mhl(manifest_path, path, files, digests, algorithm, start_date):
+    """Write a MHL (v1.1) manifest.
+
+    Args:
+        manifest_path (str): Manifest file absolute path.
+        path (str): Base folder path.
+        files (dict): Dictionary of relative path : file size.
+        digests (dict): Dictionary of relative path : hexadecimal digest.
+        algorithm (str): Digest algorithm, one of ``MHL_HASH_TAGS``.
+        start_date (str): Manifest creation start date.
+
+    """
+    tag = MHL_HASH_TAGS[algorithm]
+    try:
+        username = getpass.getuser()
+    except Exception:
+        username = ""
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<hashlist version="1.1">\n')
+        f.write("  <creatorinfo>\n")
+        f.write("    <username>{}</username>\n".format(escape(username)))
+        f.write("    <hostname>{}</hostname>\n".format(escape(socket.gethostname())))
+        f.write("    <tool>Clairmeta {}</tool>\n".format(__version__))
+        f.write("    <startdate>{}</startdate>\n".format(start_date))
+        f.write("    <finishdate>{}</finishdate>\n".format(utc_date()))
+        f.write("  </creatorinfo>\n")
+
+        for rel_path in sorted(digests):
+            mtime = os.path.getmtime(os.path.join(path, *rel_path.split("/")))
+            f.write("  <hash>\n")
+            f.write("    <file>{}</file>\n".format(escape(rel_path)))
+            f.write("    <size>{}</size>\n".format(files[rel_path]))
+            f.write(
+                "    <lastmodificationdate>{}</lastmodificationdate>\n".format(
+                    utc_date(mtime)
+                )
+            )
+            f.write("    <{0}>{1}</{0}>\n".format(tag, digests[rel_path]))
+            f.write("    <hashdate>{}</hashdate>\n".format(start_date))
+            f.write("  </hash>\n")
+
+        f.write("</hashlist>\n")
+
+
+def read_mhl(manifest_path):
+    """Read a MHL (v1.1) manifest.
+
+    Returns:
+        Tuple (algorithm, dictionary of relative path : dictionary with
+        ``digest`` and ``size`` keys).
+
+    Raises:
+        ManifestException: If the manifest can't be read.
+
+    """
+    tags = {v: k for k, v in MHL_HASH_TAGS.items()}
+    algorithm = None
+    entries = {}
+
+    try:
+        for _, elem in ElementTree.iterparse(manifest_path):
+            if elem.tag != "hash":
+                continue
+
+            entry = {"digest": None, "size": None}
+            rel_path = elem.findtext("file")
+            if elem.findtext("size"):
+                entry["size"] = int(elem.findtext("size"))
+            for child in elem:
+                if child.tag in tags:
+                    algorithm = algorithm or tags[child.tag]
+                    if tags[child.tag] == algorithm:
+                        entry["digest"] = (child.text or "").strip().lower()
+
+            if not rel_path or not entry["digest"]:
+                raise ManifestException("Invalid hash entry : {}".format(rel_path))
+            entries[rel_path] = entry
+            elem.clear()
+    except (ElementTree.ParseError, ValueError) as e:
+        raise ManifestException("Invalid MHL manifest : {}".format(e))
+
+    return algorithm, entries
+
+
+def read_text_manifest(manifest_path):
+    """Read a text manifest, in the format of md5sum / sha1sum.
+
+    The digest algorithm is given by the manifest extension (eg. .md5) or
+    deduced from the digests length.
+
+    Returns:
+        Tuple (algorithm, dictionary of relative path : dictionary with
+        ``digest`` and ``size`` keys).
+
+    Raises:
+        ManifestException: If the manifest can't be read.
+
+    """
+    algorithm = os.path.splitext(manifest_path)[-1][1:].lower()
+    if algorithm not in MHL_HASH_TAGS:
+        algorithm = None
+
+    entries = {}
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+
+            digest, sep, rel_path = line.partition(" ")
+            # Binary mode marker
+            rel_path = rel_path[1:] if rel_path[:1] in [" ", "*"] else rel_path
+            if not sep or not rel_path:
+                raise ManifestException("Invalid manifest line : {}".format(line))
+
+            algorithm = algorithm or TEXT_DIGEST_LENGTHS.get(len(digest))
+            entries[rel_path] = {"digest": digest.lower(), "size": None}
+
+    if entries and not algorithm:
+        raise ManifestException("Unknown manifest digest algorithm")
+    return algorithm, entries
+
+
+def read_manifest(manifest_path):
+    """Read a MHL or text manifest, see ``read_mhl``."""
+    if not os.path.isfile(manifest_path):
+        raise ManifestException("Manifest not found : {}".format(manifest_path))
+
+    with open(manifest_path, "rb") as f:
+        is_xml = f.read(64).lstrip().startswith(b"<")
+    if is_xml:
+        return read_mhl(manifest_path)
+    return read_text_manifest(manifest_path)
+
+
+def make_manifest(
+    path,
+    manifest_path,
+    algorithm="md5",
+    manifest_format="mhl",
+    ignore_files=None,
+    ignore_dirs=None,
+    callback=None,
+    jobs=8,
+    tree=None,
+):
+    """Hash all files of a folder tree and write a manifest.
+
+    Args:
+        path (str): Base folder path.
+        manifest_path (str): Manifest file absolute path, excluded from the
+            manifest if found in ``path``.
+        algorithm (str, optional): Digest algorithm, one of
+            ``MHL_HASH_TAGS`` (xxh64 requires the xxhash package).
+        manifest_format (str, optional): One of ``MANIFEST_FORMATS``.
+        ignore_files (list, optional): List of files name to ignore.
+        ignore_dirs (list, optional): List of directory name to ignore.
+        callback (func, optional): Callback function, see
+            ``ConsoleProgress``.
+        jobs (int, optional): Number of files read concurrently.
+        tree (dict, optional): ``path`` already scanned, see
+            ``clairmeta.utils.sequence.scan_tree``.
+
+    Returns:
+        Dictionary of relative path : hexadecimal digest.
+
+    Raises:
+        ManifestException: If ``algorithm`` or ``manifest_format`` is not
+            supported.
+
+    """
+    if algorithm not in MHL_HASH_TAGS:
+        raise ManifestException("Unsupported digest algorithm : {}".format(algorithm))
+    if manifest_format not in MANIFEST_FORMATS:
+        raise ManifestException("Unknown manifest format : {}".format(manifest_format))
+
+    start_date = utc_date()
+    files = list_files(path, ignore_files, ignore_dirs, tree)
+    manifest_rel_path = os.path.relpath(os.path.abspath(manifest_path), path)
+    files.pop(manifest_rel_path.replace(os.sep, "/"), None)
+
+    try:
+        digests = hash_files(path, files, algorithm, callback, jobs)
+    except ValueError as e:
+        raise ManifestException(str(e))
+
+    if manifest_format == "mhl":
+        write_mhl(manifest_path, path, files, digests, algorithm, start_date)
+    else:
+        write_digest_manifest(
+            manifest_path, {k: {algorithm: v} for k, v in digests.items()}, algorithm
+        )
+    return digests
+
+
+def verify_manifest(
+    path,
+    manifest_path,
+    journal_path=None,
+    ignore_files=None,
+    ignore_dirs=None,
+    callback=None,
+    jobs=8,
+    tree=None,
+):
+    """Verify a folder tree against a manifest.
+
+    Verification is resumable : with ``journal_path`` every verified file
+    is recorded as soon as it is hashed, an interrupted verification
+    started again with the same journal only hash files not yet verified
+    (or modified since).
+
+    Args:
+        path (str): Base folder path.
+        manifest_path (str): MHL or text manifest absolute path.
+        journal_path (str, optional): Verification journal absolute path.
+        ignore_files (list, optional): List of files name to ignore.
+        ignore_dirs (list, optional): List of directory name to ignore.
+        callback (func, optional): Callback function, see
+            ``ConsoleProgress``.
+        jobs (int, optional): Number of files read concurrently.
+        tree (dict, optional): ``path`` already scanned, see
+            ``clairmeta.utils.sequence.scan_tree``.
+
+    Returns:
+        Dictionary with the number of files ``verified``, ``resumed`` (from
+        the journal) and lists of relative path : ``mismatch`` (digest or
+        size differs), ``missing`` (not found) and ``extra`` (not listed in
+        the manifest).
+
+    Raises:
+        ManifestException: If the manifest can't be read.
+
+    """
+    algorithm, entries = read_manifest(manifest_path)
+    files = list_files(path, ignore_files, ignore_dirs, tree)
+    manifest_rel_path = os.path.relpath(os.path.abspath(manifest_path), path)
+    files.pop(manifest_rel_path.replace(os.sep, "/"), None)
+    if journal_path:
+        journal_rel_path = os.path.relpath(os.path.abspath(journal_path), path)
+        files.pop(journal_rel_path.replace(os.sep, "/"), None)
+
+    result = {
+        "verified": 0,
+        "resumed": 0,
+        "mismatch": [],
+        "missing": sorted(set(entries) - set(files)),
+        "extra": sorted(set(files) - set(entries)),
+    }
+
+    journal = None
+    if journal_path:
+        # Verified files are re-hashed if the last records are lost
+        journal = CopyJournal(
+            journal_path,
+            sync_records=JOURNAL_SYNC_RECORDS,
+            sync_interval=JOURNAL_SYNC_INTERVAL,
+        )
+    to_hash = {}
+    identities = {}
+
+    for rel_path in sorted(set(entries) & set(files)):
+        expected = entries[rel_path]
+        if expected["size"] is not None and expected["size"] != files[rel_path]:
+            result["mismatch"].append(rel_path)
+            continue
+
+        file_path = os.path.join(path, *rel_path.split("/"))
+        identities[rel_path] = file_identity(file_path)
+        record = journal.done.get(rel_path) if journal else None
+        if (
+            record
+            and record.get("algorithm") == algorithm
+            and {k: record.get(k) for k in identities[rel_path]} == identities[rel_path]
+        ):
+            result["resumed"] += 1
+            if record["digest"] != expected["digest"]:
+                result["mismatch"].append(rel_path)
+            continue
+
+        to_hash[rel_path] = files[rel_path]
+
+    def on_done(rel_path, digest):
+        if journal:
+            record = {"type": "done", "path": rel_path, "algorithm": algorithm}
+            record.update(identities[rel_path])
+            record["digest"] = digest
+            journal.write(record)
+
+    try:
+        digests = hash_files(path, to_hash, algorithm, callback, jobs, on_done)
+    except ValueError as e:
+        raise ManifestException(str(e))
+    finally:
+        if journal:
+            journal.close()
+
+    for rel_path, digest in digests.items():
+        if digest != entries[rel_path]["digest"]:
+            result["mismatch"].append(rel_path)
+
+    result["verified"] = len(digests) + result["resumed"]
+    result["mismatch"].sort()
+    return result
@@ -0,0 +1,380 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import threading
+import importlib
+import collections
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from clairmeta.logger import get_log
+from clairmeta.settings import DCP_CHECK_SETTINGS
+from clairmeta.model import Package
+from clairmeta.profile import get_default_profile
+from clairmeta.utils.xml import preload_xsd_schemas
+from clairmeta.utils.file import enable_hash_cache, get_hash_cache
+from clairmeta.utils.crypto import load_der_certificate_b64
+from clairmeta.exception import ClairMetaException, JobQueueFullException
+
+
+JOB_TYPES = ["probe", "check"]
+
+
+class Job(object):
+    """Probe or check request executed by a ``JobServer`` worker."""
+
+    def __init__(self, job_type, params):
+        """Job constructor.
+
+        Args:
+            job_type (str): Job type, one of ``JOB_TYPES``.
+            params (dict): Job parameters, ``path`` is required and
+                ``kdm``, ``key``, ``ov_path`` and ``profile`` are optional.
+
+        Raises:
+            ClairMetaException: Invalid job type or parameters.
+
+        """
+        if job_type not in JOB_TYPES:
+            raise ClairMetaException("Unknown job type : {}".format(job_type))
+        if not isinstance(params.get("path"), str):
+            raise ClairMetaException("Job parameter path is required")
+        if not isinstance(params.get("profile", {}), dict):
+            raise ClairMetaException("Job parameter profile should be a dict")
+
+        self.id = str(uuid.uuid4())
+        self.type = job_type
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = ""
+        self.date_queued = time.time()
+        self.date_started = None
+        self.date_finished = None
+        self.done = threading.Event()
+
+    def run(self):
+        """Execute the job, results are stored in the job object."""
+        from clairmeta.dcp import DCP
+
+        self.status = "running"
+        self.date_started = time.time()
+
+        try:
+            dcp = DCP(
+                self.params["path"],
+                kdm=self.params.get("kdm"),
+                pkey=self.params.get("key"),
+            )
+
+            if self.type == "probe":
+                # Finished jobs are kept in memory, see ``JobServer``
+                dcp.parse()
+                self.result = dcp.compact()
+            elif self.type == "check":
+                profile = get_default_profile()
+                profile.update(self.params.get("profile", {}))
+                status, report = dcp.check(
+                    profile=profile, ov_path=self.params.get("ov_path")
+                )
+                self.result = {"status": status, "report": report.to_dict()}
+
+            self.status = "done"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.date_finished = time.time()
+            self.done.set()
+
+    def is_finished(self):
+        return self.done.is_set()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.type,
+            "params": self.params,
+            "status": self.status,
+            "result": (
+                self.result.to_dict()
+                if isinstance(self.result, Package)
+                else self.result
+            ),
+            "error": self.error,
+            "date_queued": self.date_queued,
+            "date_started": self.date_started,
+            "date_finished": self.date_finished,
+        }
+
+
+class JobServer(object):
+    """Bounded job queue executed by a pool of worker threads.
+
+    The server is meant to be long lived, check modules are imported and
+    XSD schemas compiled once at startup, decoded certificates and file
+    hashes are cached between jobs.
+
+    """
+
+    def __init__(self, jobs=2, queue_size=64, keep_jobs=1000, hash_cache_size=10000):
+        """JobServer constructor.
+
+        Args:
+            jobs (int, optional): Maximum number of jobs executed
+                concurrently.
+            queue_size (int, optional): Maximum number of pending jobs.
+            keep_jobs (int, optional): Maximum number of finished jobs kept
+                available for query.
+            hash_cache_size (int, optional): Maximum number of file hashes
+                kept in cache.
+
+        """
+        self.jobs = max(1, jobs)
+        self.queue_size = queue_size
+        self.keep_jobs = keep_jobs
+        self.hash_cache_size = hash_cache_size
+        self.log = get_log()
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def warm_up(self):
+        """Load check modules and fill caches that don't depend on jobs."""
+        prefix = DCP_CHECK_SETTINGS["module_prefix"]
+        for k in DCP_CHECK_SETTINGS["modules"]:
+            importlib.import_module("clairmeta." + prefix + k)
+
+        enable_hash_cache(self.hash_cache_size)
+        self.log.info("Server warm up done")
+
+    def start(self):
+        """Warm up caches and start worker threads."""
+        self.warm_up()
+
+        for i in range(self.jobs):
+            worker = threading.Thread(
+                target=self._worker, name="clairmeta-worker-{}".format(i), daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        """Stop worker threads once pending jobs are done."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def submit(self, job_type, params):
+        """Queue a new job.
+
+        Args:
+            job_type (str): Job type, one of ``JOB_TYPES``.
+            params (dict): Job parameters, see ``Job``.
+
+        Returns:
+            Job object.
+
+        Raises:
+            ClairMetaException: Invalid job type or parameters.
+            JobQueueFullException: Too many pending jobs.
+
+        """
+        job = Job(job_type, params)
+
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise JobQueueFullException(
+                    "Job queue full ({} pending jobs)".format(self.queue_size)
+                )
+
+            self._jobs[job.id] = job
+            self._prune_jobs()
+
+        self.log.info("Job queued {} : {} {}".format(job.id, job.type, job.params))
+        return job
+
+    def get(self, job_id):
+        """Returns Job object ``job_id`` or None if unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self):
+        """Returns a dictionary describing the server state."""
+        with self._lock:
+            count = collections.Counter([j.status for j in self._jobs.values()])
+
+        hash_cache = get_hash_cache()
+        return {
+            "jobs": self.jobs,
+            "queue_size": self.queue_size,
+            "queue_pending": self._queue.qsize(),
+            "jobs_status": dict(count),
+            "cache": {
+                "hash": hash_cache.stats() if hash_cache else {},
+                "certificate": load_der_certificate_b64.cache_info()._asdict(),
+            },
+        }
+
+    def _prune_jobs(self):
+        """Forget oldest finished jobs above ``keep_jobs`` limit."""
+        finished = [k for k, v in self._jobs.items() if v.is_finished()]
+        for job_id in finished[: max(0, len(self._jobs) - self.keep_jobs)]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        # XSD schemas are cached per thread
+        schemas = preload_xsd_schemas()
+        self.log.debug("Worker ready, {} XSD schemas loaded".format(schemas))
+
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            self.log.info("Job started {}".format(job.id))
+            job.run()
+            self.log.info("Job {} {}".format(job.status, job.id))
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP interface of a ``JobServer``.
+
+    Endpoints:
+        GET /status : server state.
+        POST /probe, POST /check : submit a job, the json body holds the
+            job parameters. With ``"wait": true`` the response is sent once
+            the job is finished.
+        GET /jobs/<id> : job state and result.
+
+    """
+
+    JOB_RE = re.compile(r"^/jobs/(?P<id>[\w-]+)$")
+
+    def do_GET(self):
+        if self.path == "/status":
+            return self.send_json(200, self.server.job_server.status())
+
+        match = self.JOB_RE.match(self.path)
+        job = self.server.job_server.get(match.group("id")) if match else None
+        if not job:
+            return self.send_json(404, {"error": "Not found : {}".format(self.path)})
+
+        self.send_json(200, job.to_dict())
+
+    def do_POST(self):
+        job_type = self.path.strip("/")
+        if job_type not in JOB_TYPES:
+            return self.send_json(404, {"error": "Not found : {}".format(self.path)})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or "{}")
+            if not isinstance(params, dict):
+                raise ClairMetaException("Job parameters should be a json object")
+
+            wait = params.pop("wait", False)
+            job = self.server.job_server.submit(job_type, params)
+        except JobQueueFullException as e:
+            return self.send_json(503, {"error": str(e)})
+        except (ValueError, ClairMetaException) as e:
+            return self.send_json(400, {"error": str(e)})
+
+        if wait:
+            job.done.wait()
+            return self.send_json(200, job.to_dict())
+
+        self.send_json(202, job.to_dict())
+
+    def send_json(self, code, content):
+        body = json.dumps(content, sort_keys=True).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        get_log().debug("{} - {}".format(self.address_string(), format % args))
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """HTTP server listening on a Unix domain socket."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super(UnixHTTPServer, self).server_bind()
+
+
+def make_server(job_server, host="127.0.0.1", port=8085, socket_path=None):
+    """Create the HTTP server front end of ``job_server``.
+
+    Args:
+        job_server (JobServer): Job server handling the requests.
+        host (str, optional): Listening address, ignored if ``socket_path``
+            is given.
+        port (int, optional): Listening port, 0 to select any free port.
+        socket_path (str, optional): Unix domain socket path, when given the
+            server listen on this socket instead of ``host``:``port``.
+
+    Returns:
+        socketserver.BaseServer object, see ``serve_forever``.
+
+    """
+    if socket_path:
+        server = UnixHTTPServer(socket_path, RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        server.daemon_threads = True
+
+    server.job_server = job_server
+    return server
+
+
+def serve(host="127.0.0.1", port=8085, socket_path=None, jobs=2, queue_size=64):
+    """Run a job server until interrupted.
+
+    Args:
+        host (str, optional): Listening address.
+        port (int, optional): Listening port.
+        socket_path (str, optional): Unix domain socket path, see
+            ``make_server``.
+        jobs (int, optional): Maximum number of jobs executed concurrently.
+        queue_size (int, optional): Maximum number of pending jobs.
+
+    """
+    log = get_log()
+    job_server = JobServer(jobs=jobs, queue_size=queue_size)
+    job_server.start()
+
+    server = make_server(job_server, host, port, socket_path)
+    log.info("Serving on {}".format(socket_path or "http://{}:{}".format(host, port)))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        job_server.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -109,9 +109,16 @@ DCP_SETTINGS = {
         "bitrate_tolerance": 0.05,
         # This is a percentage below max_bitrate
         "average_bitrate_margin": 2.0,
+        # Maximum number of frame ranges reported by the bitrate check
+        "bitrate_max_errors": 10,
         # As stated in SMPTE 429-2
         "dwt_levels_2k": 5,
         "dwt_levels_4k": 6,
+        # JPEG 2000 codestream headers analysis : number of evenly spaced
+        # frames sampled (in addition to the first and last) and number of
+        # frames read concurrently.
+        "j2k_sample_frames": 8,
+        "j2k_sample_jobs": 4,
     },
     "sound": {
         "sampling_rate": [48000, 96000],
@@ -180,6 +187,16 @@ SEQUENCE_SETTINGS = {
     "ALL": {
         # In percentage
         "size_diff_tol": 2.5,
+        # Maximum number of errors listed for each kind of error
+        "max_errors": 10,
+        # Number of folders listed / image headers read concurrently
+        "scan_jobs": 8,
+        # Number of evenly spaced frames probed in each sequence, in
+        # addition to the first and last one
+        "probe_samples": 8,
+        # Number of files hashed concurrently by manifest generation and
+        # verification
+        "hash_jobs": 8,
     },
     "SCAN": {
         "allowed_extensions": {
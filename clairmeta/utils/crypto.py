@@ -3,9 +3,7 @@
 
 import os
 import base64
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding
+import functools
 
 
 def decrypt_b64(cipher, key):
@@ -25,6 +23,10 @@ def decrypt_b64(cipher, key):
     if not os.path.isfile(key):
         raise ValueError("{} file not found".format(key))
 
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization, hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
     with open(key, "rb") as f:
         key = serialization.load_pem_private_key(
             f.read(), password=None, backend=default_backend()
@@ -38,3 +40,25 @@ def decrypt_b64(cipher, key):
                 label=None,
             ),
         )
+
+
+@functools.lru_cache(maxsize=512)
+def load_der_certificate_b64(cert_b64):
+    """Decode a base64 DER encoded X509 certificate.
+
+    Decoded certificates are cached, the same certificate chains are
+    usually found in many packages of a library.
+
+    Args:
+        cert_b64 (str): Base64 encoded DER certificate.
+
+    Returns:
+        cryptography.x509.Certificate object.
+
+    Raises:
+        ValueError: If ``cert_b64`` is not a valid certificate.
+
+    """
+    from cryptography import x509
+
+    return x509.load_der_x509_certificate(base64.b64decode(cert_b64))
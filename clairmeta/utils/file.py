@@ -12,6 +12,12 @@ import base64
 import hashlib
 import time
 import re
+import mmap
+import threading
+import collections
+
+from clairmeta.utils.throttle import throttle_read, get_read_mode
+from clairmeta.exception import CheckAbortedException
 
 
 def folder_size(folder):
@@ -144,8 +150,6 @@ class ConsoleProgress(object):
             )
             sys.stdout.flush()
         else:
-            file_size = os.path.getsize(file_path)
-
             speed_report = "{} in {:.2f} sec (at {:.2f} MBytes/s)".format(
                 human_size(file_size), file_elapsed, (file_size / 1e6) / file_elapsed
             )
@@ -162,39 +166,362 @@ class ConsoleProgress(object):
             self.total_elapsed += file_elapsed
 
 
-def shaone_b64(file_path, callback=None):
-    """Compute file hash using sha1 algorithm.
+class AggregateProgress(object):
+    """Report files processed concurrently as a single progression.
+
+    Thread safe adapter of a per file progression callback (see
+    ``ConsoleProgress``), called with (``name``, bytes processed for all
+    files, ``total_size``, seconds elapsed). Elapsed time is wall clock
+    time, the rate accounts for files processed concurrently.
+
+    """
+
+    def __init__(self, callback, name, total_size, interval=0.2):
+        """AggregateProgress constructor.
+
+        Args:
+            callback (func): Progression callback, see ``ConsoleProgress``.
+            name (str): Name reported in place of the file path.
+            total_size (int): Total number of bytes to process.
+            interval (float, optional): Minimum interval between callback
+                calls in seconds, the completion is always reported.
+
+        """
+        self.callback = callback
+        self.name = name
+        self.total_size = total_size
+        self.interval = interval
+        self.processed = 0
+        self.start = time.time()
+        self._last_call = 0
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, file_path, file_processed, file_size, file_elapsed):
+        with self._lock:
+            self.processed += file_processed - self._files.get(file_path, 0)
+            self._files[file_path] = file_processed
+
+            now = time.time()
+            complete = self.processed >= self.total_size
+            if not complete and now - self._last_call < self.interval:
+                return
+            self._last_call = now
+            self.callback(self.name, self.processed, self.total_size, now - self.start)
+
+
+class HashCache(object):
+    """Thread safe cache of file hashes.
+
+    Entries are keyed by file path, size and modification time so that a
+    modified file is always hashed again. Least recently used entries are
+    evicted first once ``max_entries`` is reached.
+
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(file_path):
+        """Build cache key of ``file_path``, None if not a file."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.realpath(file_path), st.st_size, st.st_mtime_ns)
+
+    def get(self, file_path, key=None):
+        """Returns the cached hash of ``file_path`` or None."""
+        key = key or self.key(file_path)
+        with self._lock:
+            value = self._entries.get(key) if key else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, file_path, value, key=None):
+        """Store ``value`` as the hash of ``file_path``.
+
+        Args:
+            file_path (str): File absolute path.
+            value (str): File hash.
+            key (tuple, optional): Cache key of ``file_path`` computed before
+                hashing, to avoid associating the hash with a file modified
+                in the meantime.
+
+        """
+        key = key or self.key(file_path)
+        if not key:
+            return
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns a dictionary of cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Process wide hash cache, disabled by default (see ``enable_hash_cache``).
+_HASH_CACHE = None
+
+
+def enable_hash_cache(max_entries=10000):
+    """Enable process wide caching of ``shaone_b64`` results.
+
+    Useful for long lived processes checking the same files multiple
+    times, a file is hashed again as soon as its size or modification time
+    changes.
+
+    Args:
+        max_entries (int, optional): Maximum number of cached hashes.
+
+    Returns:
+        HashCache object.
+
+    """
+    global _HASH_CACHE
+    if not _HASH_CACHE:
+        _HASH_CACHE = HashCache(max_entries)
+    return _HASH_CACHE
+
+
+def disable_hash_cache():
+    global _HASH_CACHE
+    _HASH_CACHE = None
+
+
+def get_hash_cache():
+    """Returns the process wide HashCache object, None if disabled."""
+    return _HASH_CACHE
+
+
+# Read buffer size bounds, see ``read_buffer_size``
+READ_BUFFER_MIN = 64 * 1024
+READ_BUFFER_MAX = 8 * 1024 * 1024
+# Page cache eviction interval for the fadvise read mode
+FADVISE_DROP_SIZE = 32 * 1024 * 1024
+
+
+def read_buffer_size(file_size):
+    """Returns a read buffer size adapted to a file size.
+
+    Small files are read with a small buffer, large essence files with a
+    buffer large enough to make the per read overhead negligible. The size
+    is always a power of two (thus a multiple of the page size).
+
+    >>> read_buffer_size(1000)
+    65536
+    >>> read_buffer_size(100 * 1024 * 1024)
+    524288
+    >>> read_buffer_size(10 * 1024 * 1024 * 1024)
+    8388608
+
+    """
+    size = READ_BUFFER_MIN
+    while size < READ_BUFFER_MAX and size * 256 < file_size:
+        size *= 2
+    return size
+
+
+def iter_file_chunks(file_path, read_mode=None, buffer_size=None):
+    """Iterate over a file content using a page cache friendly read mode.
+
+    Read modes :
+     - cached : regular reads, data stays in the page cache.
+     - fadvise : sequential access hint (larger read-ahead), pages already
+       read are evicted from the page cache as we go (posix_fadvise).
+     - direct : bypass the page cache (O_DIRECT) using a page aligned
+       buffer, fallback to fadvise if not supported by the platform or
+       file system.
 
     Args:
         file_path (str): File absolute path.
+        read_mode (str, optional): Read mode, default to the process wide
+          setting (see ``configure_io``).
+        buffer_size (int, optional): Read buffer size, default to
+          ``read_buffer_size``, must be a multiple of the page size.
+
+    Yields:
+        memoryview of the next chunk, only valid until the next iteration.
+
+    """
+    read_mode = read_mode or get_read_mode()
+    buffer_size = buffer_size or read_buffer_size(os.path.getsize(file_path))
+
+    # Windows file descriptors are opened in text mode by default
+    flags = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+    fd = None
+    if read_mode == "direct":
+        try:
+            fd = os.open(file_path, flags | os.O_DIRECT)
+        except (AttributeError, OSError):
+            read_mode = "fadvise"
+    if fd is None:
+        fd = os.open(file_path, flags)
+
+    fadvise = read_mode == "fadvise" and hasattr(os, "posix_fadvise")
+    # Anonymous memory map are page aligned, as required by O_DIRECT
+    buf = mmap.mmap(-1, buffer_size)
+    view = memoryview(buf)
+
+    try:
+        if fadvise:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_NOREUSE)
+
+        offset = 0
+        dropped = 0
+        with open(fd, "rb", buffering=0, closefd=False) as f:
+            while True:
+                size = f.readinto(buf)
+                if not size:
+                    break
+
+                chunk = view[:size]
+                try:
+                    yield chunk
+                finally:
+                    chunk.release()
+                offset += size
+
+                if fadvise and offset - dropped >= FADVISE_DROP_SIZE:
+                    os.posix_fadvise(
+                        fd, dropped, offset - dropped, os.POSIX_FADV_DONTNEED
+                    )
+                    dropped = offset
+
+        if fadvise:
+            os.posix_fadvise(fd, dropped, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+        view.release()
+        buf.close()
+
+
+# Digest algorithms provided by the optional xxhash package
+XXHASH_ALGORITHMS = ["xxh32", "xxh64", "xxh3_64", "xxh3_128", "xxh128"]
+
+
+def new_hasher(algorithm):
+    """Returns a new hash object.
+
+    Args:
+        algorithm (str): Any ``hashlib`` algorithm or one of
+          ``XXHASH_ALGORITHMS`` (requires the xxhash package).
+
+    Raises:
+        ValueError: If ``algorithm`` is unknown or not available.
+
+    """
+    if algorithm in XXHASH_ALGORITHMS:
+        try:
+            import xxhash
+        except ImportError:
+            raise ValueError("{} digest requires xxhash package".format(algorithm))
+        return getattr(xxhash, algorithm)()
+
+    try:
+        return hashlib.new(algorithm)
+    except ValueError:
+        raise ValueError("Unknown digest algorithm : {}".format(algorithm))
+
+
+def hex_to_b64(digest):
+    """Convert an hexadecimal digest to base 64.
+
+    >>> hex_to_b64('da39a3ee5e6b4b0d3255bfef95601890afd80709')
+    '2jmj7l5rSw0yVb/vlWAYkK/YBwk='
+
+    """
+    return base64.b64encode(bytes.fromhex(digest)).decode("utf-8")
+
+
+def b64_to_hex(digest):
+    """Convert a base 64 digest to hexadecimal.
+
+    >>> b64_to_hex('2jmj7l5rSw0yVb/vlWAYkK/YBwk=')
+    'da39a3ee5e6b4b0d3255bfef95601890afd80709'
+
+    """
+    return base64.b64decode(digest).hex()
+
+
+def file_digests(
+    file_path, algorithms=("sha1",), callback=None, cancel=None, use_cache=True
+):
+    """Compute several digests of a file in a single read.
+
+    All digests are updated from the same buffers, the file is read once
+    using the process wide read mode and read limit (see
+    ``iter_file_chunks`` and ``configure_io``).
+
+    Args:
+        file_path (str): File absolute path.
+        algorithms (list, optional): Digest algorithms, see ``new_hasher``.
         callback (func, optional): Callback function, see
-          ``console_progress_bar`` for an example implementation.
+          ``ConsoleProgress`` for an example implementation.
+        cancel (threading.Event, optional): Stop hashing when set.
+        use_cache (bool, optional): Lookup the hash cache (if enabled)
+          before reading the file.
 
     Returns:
-        String representation of ``file`` sha1 (encoded in base 64).
+        Dictionary of algorithm: hexadecimal digest.
 
     Raises:
         ValueError: If ``file_path`` is not a valid file.
+        ValueError: If one of ``algorithms`` is not available.
+        CheckAbortedException: If ``cancel`` was set.
 
     """
     if not os.path.isfile(file_path):
         raise ValueError("{} file not found".format(file_path))
 
-    BUF_SIZE = 65536
+    algorithms = list(dict.fromkeys(algorithms))
+    hashers = {a: new_hasher(a) for a in algorithms}
+
+    cache = _HASH_CACHE if use_cache else None
+    cache_key = cache.key(file_path) if cache else None
+    if cache_key:
+        cached = {a: _cache_get_digest(cache, file_path, cache_key, a) for a in hashers}
+        if all(cached.values()):
+            return cached
+
     file_size = os.path.getsize(file_path)
     run_size = 0
-    sha1 = hashlib.sha1()
     start = time.time()
     last_cb_time = start
 
-    with open(file_path, "rb") as f:
-        while True:
-            data = f.read(BUF_SIZE)
-            if not data:
-                break
+    with contextlib.closing(iter_file_chunks(file_path)) as chunks:
+        for data in chunks:
+            if cancel and cancel.is_set():
+                raise CheckAbortedException("Hash cancelled : {}".format(file_path))
 
             run_size += len(data)
-            sha1.update(data)
+            throttle_read(len(data), cancel)
+            for hasher in hashers.values():
+                hasher.update(data)
 
             time_cb = time.time()
             call_cb = time_cb - last_cb_time > 0.2
@@ -203,9 +530,181 @@ def shaone_b64(file_path, callback=None):
                 last_cb_time = time_cb
                 callback(file_path, run_size, file_size, time_cb - start)
 
-    # Encode base64 and remove carriage return
-    sha1b64 = base64.b64encode(sha1.digest())
-    return sha1b64.decode("utf-8")
+    digests = {a: h.hexdigest() for a, h in hashers.items()}
+
+    if cache_key:
+        for algorithm, digest in digests.items():
+            _cache_set_digest(cache, file_path, cache_key, algorithm, digest)
+    return digests
+
+
+def _cache_get_digest(cache, file_path, key, algorithm):
+    # sha1 is cached in base 64 (as found in PKL), see ``shaone_b64``
+    if algorithm == "sha1":
+        digest = cache.get(file_path, key)
+        return b64_to_hex(digest) if digest else None
+    return cache.get(file_path, key + (algorithm,))
+
+
+def _cache_set_digest(cache, file_path, key, algorithm, digest):
+    if algorithm == "sha1":
+        cache.set(file_path, hex_to_b64(digest), key)
+    else:
+        cache.set(file_path, digest, key + (algorithm,))
+
+
+def shaone_b64(file_path, callback=None, cancel=None, use_cache=True):
+    """Compute file hash using sha1 algorithm.
+
+    Args:
+        file_path (str): File absolute path.
+        callback (func, optional): Callback function, see
+          ``console_progress_bar`` for an example implementation.
+        cancel (threading.Event, optional): Stop hashing when set.
+        use_cache (bool, optional): Lookup the hash cache (if enabled)
+          before reading the file.
+
+    Returns:
+        String representation of ``file`` sha1 (encoded in base 64).
+
+    Raises:
+        ValueError: If ``file_path`` is not a valid file.
+        CheckAbortedException: If ``cancel`` was set.
+
+    """
+    digests = file_digests(file_path, ["sha1"], callback, cancel, use_cache)
+    return hex_to_b64(digests["sha1"])
+
+
+def write_digest_manifest(manifest_path, digests, algorithm):
+    """Write a digest manifest, in the format of md5sum / sha1sum.
+
+    Args:
+        manifest_path (str): Manifest file absolute path.
+        digests (dict): Dictionary of relative path: dictionary of
+          algorithm: hexadecimal digest, see ``file_digests``.
+        algorithm (str): Digest algorithm to write.
+
+    """
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        for path in sorted(digests):
+            if algorithm in digests[path]:
+                f.write("{}  {}\n".format(digests[path][algorithm], path))
+
+
+# Copy buffer size, a multiple of the page size
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+# Resumable copy checkpoint interval
+CHECKPOINT_SIZE = 256 * 1024 * 1024
+
+
+def copy_file(
+    src,
+    dst,
+    callback=None,
+    buffer_size=COPY_BUFFER_SIZE,
+    offset=0,
+    sha1=None,
+    checkpoint=None,
+    checkpoint_size=CHECKPOINT_SIZE,
+    sync=False,
+):
+    """Copy a file and compute its sha1 hash in a single pass.
+
+    Data is read in a page aligned buffer and hashed before being written,
+    ``src`` is thus read only once. The hash is stored in the hash cache
+    (if enabled) for ``dst``, a subsequent ``shaone_b64`` won't read it
+    again.
+
+    Args:
+        src (str): Source file absolute path.
+        dst (str): Destination file absolute path.
+        callback (func, optional): Callback function called with
+          (dst, bytes written, file size, seconds elapsed), see
+          ``ConsoleProgress``.
+        buffer_size (int, optional): Read / write buffer size in bytes.
+        offset (int, optional): Resume a partial copy, the first ``offset``
+          bytes of ``dst`` are kept.
+        sha1 (hashlib.sha1, optional): Hash object of the first ``offset``
+          bytes, required when resuming.
+        checkpoint (func, optional): Called with (dst, offset, prefix hash)
+          each time ``checkpoint_size`` bytes are written and flushed to
+          disk, prefix hash is the sha1 (base 64) of the first ``offset``
+          bytes.
+        checkpoint_size (int, optional): Checkpoint interval in bytes.
+        sync (bool, optional): Flush ``dst`` to disk before closing it.
+
+    Returns:
+        String representation of ``src`` sha1 (encoded in base 64).
+
+    Raises:
+        ValueError: If ``src`` is not a valid file.
+        ValueError: If ``offset`` is set without ``sha1``.
+
+    """
+    if not os.path.isfile(src):
+        raise ValueError("{} file not found".format(src))
+    if offset and not sha1:
+        raise ValueError("Resuming copy of {} requires a sha1 object".format(src))
+
+    file_size = os.path.getsize(src)
+    written = offset
+    last_checkpoint = offset
+    sha1 = sha1 or hashlib.sha1()
+    start = time.time()
+    last_cb_time = start
+
+    # Anonymous memory map are page aligned
+    buf = mmap.mmap(-1, buffer_size)
+    view = memoryview(buf)
+
+    try:
+        with open(src, "rb", buffering=0) as fin, open(
+            dst, "r+b" if offset else "wb", buffering=0
+        ) as fout:
+            if offset:
+                fin.seek(offset)
+                fout.truncate(offset)
+                fout.seek(offset)
+
+            while True:
+                size = fin.readinto(buf)
+                if not size:
+                    break
+                throttle_read(size)
+
+                chunk = view[:size]
+                sha1.update(chunk)
+
+                pos = 0
+                while pos < size:
+                    pos += fout.write(chunk[pos:])
+                written += size
+                chunk.release()
+
+                if checkpoint and written - last_checkpoint >= checkpoint_size:
+                    os.fsync(fout.fileno())
+                    last_checkpoint = written
+                    prefix = base64.b64encode(sha1.copy().digest()).decode("utf-8")
+                    checkpoint(dst, written, prefix)
+
+                time_cb = time.time()
+                if callback and (time_cb - last_cb_time > 0.2 or written == file_size):
+                    last_cb_time = time_cb
+                    callback(dst, written, file_size, time_cb - start)
+
+            if sync:
+                os.fsync(fout.fileno())
+    finally:
+        view.release()
+        buf.close()
+
+    shutil.copystat(src, dst)
+    sha1b64 = base64.b64encode(sha1.digest()).decode("utf-8")
+
+    if _HASH_CACHE:
+        _HASH_CACHE.set(dst, sha1b64)
+    return sha1b64
 
 
 IMAGENO_REGEX = re.compile(r"[\._]?(?P<Index>\d+)(?=[\._])")
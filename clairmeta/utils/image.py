@@ -0,0 +1,351 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import struct
+import concurrent.futures
+
+from clairmeta.exception import ImageException
+
+
+# Image file extensions with a native header reader
+IMAGE_EXTENSIONS = [".dpx", ".tif", ".tiff", ".exr"]
+
+# Initial read size of a header, doubled if needed
+HEADER_READ_SIZE = 4096
+HEADER_READ_MAX_SIZE = 65536
+
+# SMPTE ST 268 image element descriptor
+DPX_DESCRIPTORS = {
+    1: "R",
+    2: "G",
+    3: "B",
+    4: "A",
+    6: "Y",
+    50: "RGB",
+    51: "RGBA",
+    52: "ABGR",
+    100: "YUV",
+    101: "YUVA",
+    102: "YUV",
+    103: "YUVA",
+}
+# Up to the first image element data offset
+DPX_HEADER_SIZE = 812
+
+# TIFF 6.0 tags and photometric interpretation
+TIFF_WIDTH = 256
+TIFF_HEIGHT = 257
+TIFF_BITS_PER_SAMPLE = 258
+TIFF_PHOTOMETRIC = 262
+TIFF_SAMPLES_PER_PIXEL = 277
+TIFF_PHOTOMETRICS = {
+    0: "Y",
+    1: "Y",
+    2: "RGB",
+    3: "RGB",
+    5: "CMYK",
+    6: "YUV",
+    8: "CIELab",
+}
+# Field type : (struct format, size)
+TIFF_TYPES = {1: ("B", 1), 3: ("H", 2), 4: ("I", 4), 16: ("Q", 8)}
+# Maximum number of entries in an IFD
+TIFF_MAX_ENTRIES = 4096
+
+# OpenEXR channel pixel type : bit depth
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+EXR_BIT_DEPTHS = {0: 32, 1: 16, 2: 32}
+
+
+def parse_dpx_header(data):
+    """Parse a DPX file header.
+
+    >>> header = b'SDPX' + bytes(764) + struct.pack('>HHII', 0, 1, 2048, 1080)
+    >>> header += bytes(20) + bytes([50, 0, 0, 10]) + bytes(8)
+    >>> sorted(parse_dpx_header(header).items())
+    [('BitDepth', 10), ('ColorSpace', 'RGB'), ('Height', 1080), ('Width', 2048)]
+
+    """
+    if len(data) < DPX_HEADER_SIZE:
+        raise ImageException("Truncated DPX header")
+
+    endian = ">" if data[:4] == b"SDPX" else "<"
+    width, height = struct.unpack_from(endian + "II", data, 772)
+    descriptor, _, _, bitdepth = struct.unpack_from("BBBB", data, 800)
+
+    return {
+        "Width": width,
+        "Height": height,
+        "ColorSpace": DPX_DESCRIPTORS.get(descriptor, descriptor),
+        "BitDepth": bitdepth,
+    }
+
+
+def read_tiff_header(f):
+    """Read and parse the first image file directory of a (Big)TIFF file."""
+    data = f.read(16)
+    endian = "<" if data[:2] == b"II" else ">"
+    version = struct.unpack_from(endian + "H", data, 2)[0]
+
+    if version == 43:
+        count_fmt, entry_fmt, offset_fmt = "Q", "HHQ", "Q"
+        offset = struct.unpack_from(endian + offset_fmt, data, 8)[0]
+    else:
+        count_fmt, entry_fmt, offset_fmt = "H", "HHI", "I"
+        offset = struct.unpack_from(endian + offset_fmt, data, 4)[0]
+
+    value_size = struct.calcsize(endian + offset_fmt)
+    count_size = struct.calcsize(endian + count_fmt)
+    entry_size = struct.calcsize(endian + entry_fmt) + value_size
+
+    f.seek(offset)
+    data = f.read(count_size)
+    if len(data) < count_size:
+        raise ImageException("Truncated TIFF image file directory")
+    count = struct.unpack(endian + count_fmt, data)[0]
+    if count > TIFF_MAX_ENTRIES:
+        raise ImageException("Invalid TIFF image file directory")
+
+    data = f.read(count * entry_size)
+    if len(data) < count * entry_size:
+        raise ImageException("Truncated TIFF image file directory")
+
+    # Tag : first value, fields that don't fit in the entry are read from
+    # their offset.
+    tags = {}
+    for pos in range(0, len(data), entry_size):
+        tag, field_type, values = struct.unpack_from(endian + entry_fmt, data, pos)
+        if field_type not in TIFF_TYPES or not values:
+            continue
+
+        fmt, size = TIFF_TYPES[field_type]
+        value_pos = pos + entry_size - value_size
+        if size <= value_size and values * size > value_size:
+            (value_offset,) = struct.unpack_from(endian + offset_fmt, data, value_pos)
+            f.seek(value_offset)
+            value = f.read(size)
+            if len(value) < size:
+                raise ImageException("Truncated TIFF field {}".format(tag))
+            tags[tag] = struct.unpack(endian + fmt, value)[0]
+        else:
+            tags[tag] = struct.unpack_from(endian + fmt, data, value_pos)[0]
+
+    if TIFF_WIDTH not in tags or TIFF_HEIGHT not in tags:
+        raise ImageException("TIFF image dimensions not found")
+
+    photometric = tags.get(TIFF_PHOTOMETRIC)
+    colorspace = TIFF_PHOTOMETRICS.get(photometric, photometric)
+    if colorspace == "RGB" and tags.get(TIFF_SAMPLES_PER_PIXEL, 3) > 3:
+        colorspace = "RGBA"
+
+    return {
+        "Width": tags[TIFF_WIDTH],
+        "Height": tags[TIFF_HEIGHT],
+        "ColorSpace": colorspace,
+        "BitDepth": tags.get(TIFF_BITS_PER_SAMPLE, 1),
+    }
+
+
+def parse_exr_header(data):
+    """Parse the attributes of an OpenEXR (first part) header.
+
+    Args:
+        data (bytes): Beginning of the file.
+
+    Returns:
+        Dictionary of attribute name : (type, raw value), None if the
+        header is truncated.
+
+    Raises:
+        ImageException: If ``data`` is not an OpenEXR file.
+
+    """
+    if data[:4] != EXR_MAGIC:
+        raise ImageException("OpenEXR magic number not found")
+
+    attributes = {}
+    pos = 8
+
+    while pos < len(data):
+        if data[pos] == 0:
+            return attributes
+
+        name_end = data.find(b"\0", pos)
+        type_end = data.find(b"\0", name_end + 1)
+        if name_end < 0 or type_end < 0 or type_end + 5 > len(data):
+            return None
+
+        (size,) = struct.unpack_from("<i", data, type_end + 1)
+        value_pos = type_end + 5
+        if size < 0:
+            raise ImageException("Invalid OpenEXR attribute size")
+        if value_pos + size > len(data):
+            return None
+
+        name = data[pos:name_end].decode("latin-1")
+        attr_type = data[name_end + 1 : type_end].decode("latin-1")
+        attributes[name] = (attr_type, data[value_pos : value_pos + size])
+        pos = value_pos + size
+
+    return None
+
+
+def read_exr_header(f):
+    """Read and parse an OpenEXR header, see ``parse_exr_header``."""
+    size = HEADER_READ_SIZE
+    while True:
+        f.seek(0)
+        data = f.read(size)
+        attributes = parse_exr_header(data)
+        if attributes is not None:
+            break
+        if len(data) < size or size >= HEADER_READ_MAX_SIZE:
+            raise ImageException("Truncated OpenEXR header")
+        size *= 2
+
+    if "channels" not in attributes or "dataWindow" not in attributes:
+        raise ImageException("Missing OpenEXR channels or dataWindow attribute")
+
+    # Channel : name, pixel type, pLinear, reserved, x / y sampling
+    channels = {}
+    chlist = attributes["channels"][1]
+    pos = 0
+    while pos < len(chlist) and chlist[pos] != 0:
+        name_end = chlist.index(b"\0", pos)
+        name = chlist[pos:name_end].decode("latin-1").split(".")[-1]
+        (channels[name],) = struct.unpack_from("<i", chlist, name_end + 1)
+        pos = name_end + 17
+
+    if {"R", "G", "B"}.issubset(channels):
+        colorspace = "RGBA" if "A" in channels else "RGB"
+    elif {"Y", "RY", "BY"}.issubset(channels):
+        colorspace = "YUVA" if "A" in channels else "YUV"
+    elif "Y" in channels:
+        colorspace = "Y"
+    else:
+        colorspace = ",".join(sorted(channels))
+
+    xmin, ymin, xmax, ymax = struct.unpack_from("<iiii", attributes["dataWindow"][1])
+    bitdepths = [EXR_BIT_DEPTHS.get(t, t) for t in channels.values()]
+
+    return {
+        "Width": xmax - xmin + 1,
+        "Height": ymax - ymin + 1,
+        "ColorSpace": colorspace,
+        "BitDepth": max(bitdepths) if bitdepths else None,
+    }
+
+
+def probe_image(path):
+    """Probe an image file reading its header only.
+
+    Supported formats are DPX, TIFF and OpenEXR, detected from the file
+    content. Values are strings, as reported by mediainfo (see
+    ``clairmeta.utils.probe.probe_mediainfo``).
+
+    Args:
+        path (str): Image file path.
+
+    Returns:
+        Dictionary containing file metadata.
+
+    Raises:
+        ImageException: If ``path`` header can't be read or the format is
+            not supported.
+
+    """
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(4)
+            f.seek(0)
+
+            if magic in [b"SDPX", b"XPDS"]:
+                image_format = "DPX"
+                image = parse_dpx_header(f.read(DPX_HEADER_SIZE))
+            elif magic[:2] in [b"II", b"MM"]:
+                image_format = "TIFF"
+                image = read_tiff_header(f)
+            elif magic == EXR_MAGIC:
+                image_format = "EXR"
+                image = read_exr_header(f)
+            else:
+                raise ImageException("Unknown image format")
+    except OSError as e:
+        raise ImageException("Cannot read file : {}".format(e))
+    except (struct.error, ValueError, IndexError):
+        raise ImageException("Invalid {} header".format(image_format))
+
+    image = {"Format": image_format, **{k: str(v) for k, v in image.items()}}
+    return {
+        "Path": path,
+        "Type": "IMAGE",
+        "Probe": {"Format": image_format, "ProbeImage": image},
+    }
+
+
+def sample_frames(count, samples):
+    """Select the first, last and ``samples`` evenly spaced frames.
+
+    >>> sample_frames(100, 3)
+    [0, 25, 50, 74, 99]
+    >>> sample_frames(3, 8)
+    [0, 1, 2]
+
+    """
+    import numpy as np
+
+    if count <= 0:
+        return []
+    frames = np.linspace(0, count - 1, samples + 2).round().astype(int)
+    return np.unique(frames).tolist()
+
+
+def probe_image_sequence(paths, samples=8, jobs=4):
+    """Probe a sample of an image file sequence headers.
+
+    Sampled headers are read concurrently and compared to the first frame
+    one, to detect header changes in the middle of a sequence.
+
+    Args:
+        paths (list): Image files path, in sequence order.
+        samples (int, optional): Number of evenly spaced frames, in
+            addition to the first and last one.
+        jobs (int, optional): Number of headers read concurrently.
+
+    Returns:
+        Tuple (first frame metadata, list of error messages).
+
+    """
+    frames = [paths[i] for i in sample_frames(len(paths), samples)]
+
+    def read(path):
+        try:
+            return probe_image(path)["Probe"]
+        except ImageException as e:
+            return {"Error": str(e)}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        probes = list(executor.map(read, frames))
+
+    errors = []
+    reference = {}
+    for path, probe in zip(frames, probes):
+        name = os.path.basename(path)
+        if "Error" in probe:
+            errors.append("{} : {}".format(name, probe["Error"]))
+            continue
+        if not reference:
+            reference = probe
+            continue
+
+        for key, expected in reference["ProbeImage"].items():
+            value = probe["ProbeImage"].get(key)
+            if value != expected:
+                errors.append(
+                    "{} : header difference, {} got {} but expected {}".format(
+                        name, key, value, expected
+                    )
+                )
+
+    return reference, errors
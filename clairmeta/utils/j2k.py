@@ -0,0 +1,354 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import struct
+import functools
+import concurrent.futures
+
+from clairmeta.utils.mxf import MXFFile
+from clairmeta.utils.throttle import bind_io_context
+from clairmeta.exception import J2KException, MXFException
+
+
+# ISO/IEC 15444-1 Annex A markers
+SOC = 0xFF4F
+SOT = 0xFF90
+SIZ = 0xFF51
+COD = 0xFF52
+TLM = 0xFF55
+QCD = 0xFF5C
+POC = 0xFF5F
+
+PROGRESSION_ORDERS = ["LRCP", "RLCP", "RPCL", "PCRL", "CPRL"]
+
+# Initial read size of a codestream header, doubled if needed
+HEADER_READ_SIZE = 4096
+HEADER_READ_MAX_SIZE = 65536
+
+
+def parse_siz(data):
+    fields = struct.unpack_from(">HIIIIIIIIH", data)
+    siz = {
+        "Rsiz": fields[0],
+        "Xsiz": fields[1],
+        "Ysiz": fields[2],
+        "XOsiz": fields[3],
+        "YOsiz": fields[4],
+        "XTsiz": fields[5],
+        "YTsiz": fields[6],
+        "XTOsiz": fields[7],
+        "YTOsiz": fields[8],
+        "Csiz": fields[9],
+        "Components": [],
+    }
+    for c in range(siz["Csiz"]):
+        ssiz, xrsiz, yrsiz = struct.unpack_from(">BBB", data, 36 + c * 3)
+        siz["Components"].append(
+            {
+                "Precision": (ssiz & 0x7F) + 1,
+                "Signed": bool(ssiz & 0x80),
+                "XRsiz": xrsiz,
+                "YRsiz": yrsiz,
+            }
+        )
+    return siz
+
+
+def parse_cod(data):
+    scod, order, layers, mct = struct.unpack_from(">BBHB", data)
+    levels, xcb, ycb, style, transform = struct.unpack_from(">BBBBB", data, 5)
+    cod = {
+        "Scod": scod,
+        "ProgressionOrder": (
+            PROGRESSION_ORDERS[order] if order < len(PROGRESSION_ORDERS) else order
+        ),
+        "Layers": layers,
+        "MultipleComponentTransform": mct,
+        "DecompositionLevels": levels,
+        "CodeBlockWidth": 1 << (xcb + 2),
+        "CodeBlockHeight": 1 << (ycb + 2),
+        "CodeBlockStyle": style,
+        "Transform": "5-3 reversible" if transform else "9-7 irreversible",
+        "Precincts": [],
+    }
+    if scod & 0x01:
+        # One byte per resolution level, from the lowest one
+        for ppxy in data[10 : 10 + levels + 1]:
+            cod["Precincts"].append((1 << (ppxy & 0x0F), 1 << (ppxy >> 4)))
+    return cod
+
+
+def parse_qcd(data):
+    sqcd = data[0]
+    return {
+        "GuardBits": sqcd >> 5,
+        "Style": (
+            ["none", "scalar derived", "scalar expounded"][sqcd & 0x1F]
+            if (sqcd & 0x1F) < 3
+            else sqcd & 0x1F
+        ),
+    }
+
+
+def parse_poc(data, csiz):
+    component_size = 1 if csiz < 257 else 2
+    fmt = ">B{c}HB{c}B".format(c="B" if component_size == 1 else "H")
+    entry_size = struct.calcsize(fmt)
+    progressions = []
+    for pos in range(0, len(data) - entry_size + 1, entry_size):
+        rs, cs, lye, re, ce, order = struct.unpack_from(fmt, data, pos)
+        progressions.append(
+            {
+                "RSpoc": rs,
+                "CSpoc": cs,
+                "LYEpoc": lye,
+                "REpoc": re,
+                "CEpoc": ce,
+                "Ppoc": (
+                    PROGRESSION_ORDERS[order]
+                    if order < len(PROGRESSION_ORDERS)
+                    else order
+                ),
+            }
+        )
+    return progressions
+
+
+def parse_tlm(data):
+    """Returns the number of tile-parts listed in a TLM marker segment."""
+    stlm = data[1]
+    tile_size = (stlm >> 4) & 0x03
+    length_size = 4 if stlm & 0x40 else 2
+    return (len(data) - 2) // (tile_size + length_size)
+
+
+def parse_codestream_header(data):
+    """Parse a JPEG 2000 codestream main header.
+
+    Markers parsed are SIZ, COD, QCD, POC and TLM, along with the first
+    tile-part header (SOT). Other markers are ignored.
+
+    Args:
+        data (bytes): Beginning of the codestream.
+
+    Returns:
+        Dictionary describing the codestream.
+
+    Raises:
+        J2KException: If ``data`` is not a valid codestream or the main
+            header is truncated.
+
+    """
+    header = _parse_codestream_header(data)
+    if not header:
+        raise J2KException("Truncated codestream main header")
+    return header
+
+
+def _parse_codestream_header(data):
+    """Same as ``parse_codestream_header``, None if truncated."""
+    if len(data) < 2 or struct.unpack_from(">H", data)[0] != SOC:
+        raise J2KException("JPEG 2000 SOC marker not found")
+
+    header = {"SIZ": None, "COD": None, "QCD": None, "POC": [], "TLM": None}
+    pos = 2
+
+    while pos + 4 <= len(data):
+        marker, length = struct.unpack_from(">HH", data, pos)
+        if marker >> 8 != 0xFF or length < 2:
+            raise J2KException("Invalid marker at offset {}".format(pos))
+        if pos + 2 + length > len(data):
+            break
+
+        segment = data[pos + 4 : pos + 2 + length]
+        try:
+            if marker == SOT:
+                if header["SIZ"] is None or header["COD"] is None:
+                    raise J2KException("Missing SIZ or COD marker in main header")
+                # Number of tile-parts, TNsot is optional (0)
+                tile_parts = segment[7]
+                if header["TLM"] is not None:
+                    tile_parts = header["TLM"]
+                header["TileParts"] = tile_parts
+                return header
+            elif marker == SIZ:
+                header["SIZ"] = parse_siz(segment)
+            elif marker == COD:
+                header["COD"] = parse_cod(segment)
+            elif marker == QCD:
+                header["QCD"] = parse_qcd(segment)
+            elif marker == POC:
+                csiz = header["SIZ"]["Csiz"] if header["SIZ"] else 3
+                header["POC"] += parse_poc(segment, csiz)
+            elif marker == TLM:
+                header["TLM"] = (header["TLM"] or 0) + parse_tlm(segment)
+        except (struct.error, IndexError):
+            raise J2KException("Invalid marker segment at offset {}".format(pos))
+
+        pos += 2 + length
+
+    return None
+
+
+def read_codestream_header(mxf, edit_unit):
+    """Read and parse the codestream header of an edit unit.
+
+    Only the first few KB of the frame are read, more if needed.
+
+    Raises:
+        J2KException: If the codestream header is not valid.
+        MXFException: If the edit unit can't be read.
+
+    """
+    size = HEADER_READ_SIZE
+    while True:
+        data = mxf.read_edit_unit(edit_unit, size)
+        header = _parse_codestream_header(data)
+        if header:
+            return header
+        if len(data) < size or size >= HEADER_READ_MAX_SIZE:
+            raise J2KException("Truncated codestream main header")
+        size *= 2
+
+
+def sample_edit_units(count, samples):
+    """Select the first, last and ``samples`` evenly spaced edit units.
+
+    >>> sample_edit_units(100, 3)
+    [0, 25, 50, 74, 99]
+    >>> sample_edit_units(3, 8)
+    [0, 1, 2]
+
+    """
+    import numpy as np
+
+    if count <= 0:
+        return []
+    edit_units = np.linspace(0, count - 1, samples + 2).round().astype(int)
+    return np.unique(edit_units).tolist()
+
+
+@functools.lru_cache(maxsize=16)
+def _sample_codestreams(path, size, mtime_ns, samples, jobs):
+    with MXFFile(path) as mxf:
+        edit_units = sample_edit_units(len(mxf.read_index()["offsets"]), samples)
+
+        def read(edit_unit):
+            try:
+                return read_codestream_header(mxf, edit_unit)
+            except (J2KException, MXFException) as e:
+                return {"Error": str(e)}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            headers = list(executor.map(bind_io_context(read), edit_units))
+
+    return dict(zip(edit_units, headers))
+
+
+def sample_codestreams(path, samples=8, jobs=4):
+    """Parse the codestream header of a sample of frames of a MXF file.
+
+    Frames are located using the MXF index table and read concurrently,
+    results are cached.
+
+    Args:
+        path (str): JPEG 2000 picture MXF file path.
+        samples (int, optional): Number of evenly spaced frames, in
+            addition to the first and last one.
+        jobs (int, optional): Number of frames read concurrently.
+
+    Returns:
+        Dictionary of edit unit : codestream header (see
+        ``parse_codestream_header``), or a dictionary with an ``Error``
+        key if this frame header can't be read.
+
+    Raises:
+        MXFException: If the index table can't be read.
+
+    """
+    st = os.stat(path)
+    return _sample_codestreams(
+        os.path.realpath(path), st.st_size, st.st_mtime_ns, samples, jobs
+    )
+
+
+def dci_profile_errors(header, resolution, levels):
+    """Validate a codestream header against the DCI profile.
+
+    Args:
+        header (dict): Codestream header, see ``parse_codestream_header``.
+        resolution (str): Either '2K' or '4K'.
+        levels (int): Expected number of decomposition levels.
+
+    Returns:
+        List of error messages.
+
+    References:
+        ISO/IEC 15444-1:2019 Table A.10 and A.47
+        SMPTE ST 429-4:2006 5.3
+        DCI DCSS (v1.4) 4.3.3
+
+    """
+    errors = []
+    siz = header["SIZ"]
+    cod = header["COD"]
+    qcd = header["QCD"]
+
+    def expect(name, value, expected):
+        if value != expected:
+            errors.append(
+                "{} is {}, DCI profile requires {}".format(name, value, expected)
+            )
+
+    expect("Rsiz", siz["Rsiz"], 3 if resolution == "2K" else 4)
+    expect("Components", siz["Csiz"], 3)
+    for component in siz["Components"]:
+        expect("Component precision", component["Precision"], 12)
+        expect(
+            "Component subsampling",
+            (component["XRsiz"], component["YRsiz"]),
+            (1, 1),
+        )
+    if siz["XTsiz"] < siz["Xsiz"] or siz["YTsiz"] < siz["Ysiz"]:
+        errors.append("Multiple tiles, DCI profile requires a single tile")
+    expect(
+        "Image / tile offset",
+        (siz["XOsiz"], siz["YOsiz"], siz["XTOsiz"], siz["YTOsiz"]),
+        (0, 0, 0, 0),
+    )
+
+    expect("Decomposition levels", cod["DecompositionLevels"], levels)
+    expect("Progression order", cod["ProgressionOrder"], "CPRL")
+    expect("Quality layers", cod["Layers"], 1)
+    expect("Multiple component transform", cod["MultipleComponentTransform"], 1)
+    expect("Wavelet transform", cod["Transform"], "9-7 irreversible")
+    expect("Code-block size", (cod["CodeBlockWidth"], cod["CodeBlockHeight"]), (32, 32))
+    expect("Code-block style", cod["CodeBlockStyle"], 0)
+
+    precincts = [(128, 128)] + [(256, 256)] * cod["DecompositionLevels"]
+    expect("Precincts", cod["Precincts"], precincts)
+
+    if not qcd:
+        errors.append("QCD marker not found")
+    else:
+        expect("Quantization style", qcd["Style"], "scalar expounded")
+        expect("Quantization guard bits", qcd["GuardBits"], 1)
+
+    if header["TLM"] is None:
+        errors.append("TLM marker not found")
+    expect("Tile-parts", header.get("TileParts"), 3 if resolution == "2K" else 6)
+
+    if resolution == "4K":
+        # First progression up to 2K, second one the 4K resolution level
+        levels_2k = cod["DecompositionLevels"] - 1
+        progressions = [
+            (p["RSpoc"], p["REpoc"], p["CEpoc"], p["Ppoc"]) for p in header["POC"]
+        ]
+        expect(
+            "Progression order change",
+            progressions,
+            [(0, levels_2k + 1, 3, "CPRL"), (levels_2k + 1, levels_2k + 2, 3, "CPRL")],
+        )
+
+    return errors
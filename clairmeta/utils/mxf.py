@@ -0,0 +1,869 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import struct
+import functools
+import threading
+
+from clairmeta.utils.throttle import throttle_read
+from clairmeta.utils.time import frame_to_tc
+from clairmeta.exception import MXFException
+
+
+# SMPTE ST 377-1 Universal Labels, byte 7 (version) is ignored when matching
+UL_PREFIX = bytes.fromhex("060e2b34")
+PARTITION_UL = bytes.fromhex("060e2b34020501010d010201010000")
+RIP_UL = bytes.fromhex("060e2b34020501010d01020101110100")
+INDEX_SEGMENT_UL = bytes.fromhex("060e2b34025301010d01020101100100")
+FILL_UL = bytes.fromhex("060e2b34010101010301021001000000")
+# Generic container essence element and encrypted triplet (ST 429-6) share
+# this item designator (bytes 8 to 11).
+ESSENCE_DESIGNATOR = bytes.fromhex("0d010301")
+ENCRYPTED_TRIPLET_UL = bytes.fromhex("060e2b34020401070d010301027e0100")
+
+PARTITION_KINDS = {2: "header", 3: "body", 4: "footer"}
+PARTITION_STATUS = {
+    1: "open incomplete",
+    2: "closed incomplete",
+    3: "open complete",
+    4: "closed complete",
+}
+
+# Key (16) and longest BER length (9)
+KLV_HEADER_MAX_SIZE = 25
+# Maximum size of a run-in before the header partition
+RUN_IN_MAX_SIZE = 65536
+# Maximum number of errors listed by ``scan_mxf``
+SCAN_MAX_ERRORS = 10
+
+
+def match_ul(key, ul, length=16):
+    """Compare two Universal Labels, ignoring the version byte.
+
+    >>> match_ul(bytes.fromhex('060e2b34010101020301021001000000'), FILL_UL)
+    True
+
+    """
+    return key[:7] == ul[:7] and key[8:length] == ul[8:length]
+
+
+def is_partition_key(key):
+    return match_ul(key, PARTITION_UL, 13) and key[13] in PARTITION_KINDS
+
+
+def is_essence_key(key):
+    return key[:4] == UL_PREFIX and key[8:12] == ESSENCE_DESIGNATOR
+
+
+def decode_ber_length(data, pos=0):
+    """Decode a BER encoded length.
+
+    Args:
+        data (bytes): Input buffer.
+        pos (int, optional): Position of the length in ``data``.
+
+    Returns:
+        Tuple (length, size of the encoded length).
+
+    Raises:
+        MXFException: If the length can't be decoded.
+
+    >>> decode_ber_length(bytes([0x45]))
+    (69, 1)
+    >>> decode_ber_length(bytes([0x83, 0x01, 0x00, 0x00]))
+    (65536, 4)
+
+    """
+    if pos >= len(data):
+        raise MXFException("Truncated BER length")
+
+    first = data[pos]
+    if first < 0x80:
+        return first, 1
+
+    size = first & 0x7F
+    if size == 0 or size > 8 or pos + 1 + size > len(data):
+        raise MXFException("Invalid BER length")
+    return int.from_bytes(data[pos + 1 : pos + 1 + size], "big"), size + 1
+
+
+class MXFFile(object):
+    """Minimal MXF reader, partitions and index tables only.
+
+    Only the structural metadata needed to locate the essence is read, all
+    reads go through the process wide read limiter (see ``configure_io``).
+
+    """
+
+    def __init__(self, path):
+        """MXFFile constructor.
+
+        Args:
+            path (str): MXF file absolute path.
+
+        Raises:
+            ValueError: If ``path`` is not a valid file.
+
+        """
+        if not os.path.isfile(path):
+            raise ValueError("{} file not found".format(path))
+
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb", buffering=0)
+        self._lock = threading.Lock()
+        self._index = None
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read_at(self, offset, size):
+        """Read up to ``size`` bytes at ``offset``, thread safe."""
+        if hasattr(os, "pread"):
+            data = os.pread(self._file.fileno(), size, offset)
+        else:
+            with self._lock:
+                self._file.seek(offset)
+                data = self._file.read(size)
+        throttle_read(len(data))
+        return data
+
+    def read_klv_header(self, offset):
+        """Read a KLV key and length.
+
+        Returns:
+            Tuple (key, value length, key and length size).
+
+        Raises:
+            MXFException: If no valid KLV header is found at ``offset``.
+
+        """
+        data = self.read_at(offset, KLV_HEADER_MAX_SIZE)
+        if len(data) < 17:
+            raise MXFException("Truncated KLV at offset {}".format(offset))
+        if data[:4] != UL_PREFIX:
+            raise MXFException("Invalid KLV key at offset {}".format(offset))
+
+        length, length_size = decode_ber_length(data, 16)
+        return data[:16], length, 16 + length_size
+
+    def read_klv(self, offset):
+        """Read a KLV packet.
+
+        Returns:
+            Tuple (key, value, offset of the next KLV).
+
+        Raises:
+            MXFException: If the KLV is truncated.
+
+        """
+        key, length, header_size = self.read_klv_header(offset)
+        value = self.read_at(offset + header_size, length)
+        if len(value) != length:
+            raise MXFException("Truncated KLV at offset {}".format(offset))
+        return key, value, offset + header_size + length
+
+    def skip_fill(self, offset, end=None):
+        """Returns the offset of the first KLV after fill items."""
+        end = end or self.size
+        while offset < end:
+            key, length, header_size = self.read_klv_header(offset)
+            if not match_ul(key, FILL_UL):
+                break
+            offset += header_size + length
+        return offset
+
+    def find_header_partition(self):
+        """Returns the header partition offset, after an optional run-in."""
+        data = self.read_at(0, min(self.size, RUN_IN_MAX_SIZE + 16))
+        offset = data.find(PARTITION_UL[:4])
+        while offset != -1:
+            if is_partition_key(data[offset : offset + 16]):
+                return offset
+            offset = data.find(PARTITION_UL[:4], offset + 1)
+        raise MXFException("Header partition not found")
+
+    def read_partition(self, offset):
+        """Read a partition pack.
+
+        Returns:
+            Dictionary describing the partition.
+
+        Raises:
+            MXFException: If no valid partition pack is found at ``offset``.
+
+        """
+        if offset >= self.size:
+            raise MXFException(
+                "Partition offset {} beyond end of file ({} bytes)".format(
+                    offset, self.size
+                )
+            )
+
+        key, value, end = self.read_klv(offset)
+        if not is_partition_key(key) or len(value) < 64:
+            raise MXFException("Partition pack not found at offset {}".format(offset))
+
+        fields = struct.unpack_from(">HHIQQQQQIQI", value)
+        return {
+            "offset": offset,
+            "kind": PARTITION_KINDS[key[13]],
+            "status": PARTITION_STATUS.get(key[14], "unknown"),
+            "this_partition": fields[3],
+            "previous_partition": fields[4],
+            "footer_partition": fields[5],
+            "header_byte_count": fields[6],
+            "index_byte_count": fields[7],
+            "index_sid": fields[8],
+            "body_offset": fields[9],
+            "body_sid": fields[10],
+            "pack_end": end,
+        }
+
+    def read_rip(self):
+        """Read the Random Index Pack.
+
+        Returns:
+            List of (BodySID, partition offset) tuples.
+
+        Raises:
+            MXFException: If the Random Index Pack is not found.
+
+        """
+        if self.size < 24:
+            raise MXFException("Random Index Pack not found")
+
+        (rip_size,) = struct.unpack(">I", self.read_at(self.size - 4, 4))
+        if rip_size < 24 or rip_size > self.size:
+            raise MXFException("Random Index Pack not found")
+
+        offset = self.size - rip_size
+        key, value, end = self.read_klv(offset)
+        if not match_ul(key, RIP_UL) or end != self.size:
+            raise MXFException("Random Index Pack not found")
+
+        count = (len(value) - 4) // 12
+        return [struct.unpack_from(">IQ", value, i * 12) for i in range(count)]
+
+    def list_partitions(self):
+        """Returns the list of partitions, ordered by offset.
+
+        Partitions are located using the Random Index Pack, or by walking
+        back from the footer partition if there is none.
+
+        Raises:
+            MXFException: If partitions can't be located.
+
+        """
+        header = self.read_partition(self.find_header_partition())
+
+        try:
+            offsets = [offset for _, offset in self.read_rip()]
+        except MXFException:
+            offsets = []
+
+        if offsets:
+            partitions = [self.read_partition(o) for o in sorted(set(offsets))]
+        else:
+            if not header["footer_partition"]:
+                raise MXFException("Footer partition offset unknown")
+
+            partitions = []
+            offset = header["footer_partition"]
+            while offset and offset != header["offset"]:
+                partition = self.read_partition(offset)
+                partitions.append(partition)
+                if partition["previous_partition"] >= offset:
+                    raise MXFException("Invalid previous partition offset")
+                offset = partition["previous_partition"]
+            partitions.append(header)
+
+        partitions.sort(key=lambda p: p["offset"])
+        if partitions[0]["offset"] != header["offset"]:
+            partitions.insert(0, header)
+        return partitions
+
+    def read_index_segments(self, partition):
+        """Read the index table segments of a partition.
+
+        Returns:
+            List of dictionaries describing each segment.
+
+        """
+        start = partition["pack_end"] + partition["header_byte_count"]
+        end = start + partition["index_byte_count"]
+        segments = []
+
+        offset = start
+        while offset < end:
+            key, value, offset = self.read_klv(offset)
+            if match_ul(key, INDEX_SEGMENT_UL):
+                segments.append(parse_index_segment(value))
+
+        return segments
+
+    def essence_start(self, partition):
+        """Returns the offset of the first essence KLV of a partition."""
+        offset = (
+            partition["pack_end"]
+            + partition["header_byte_count"]
+            + partition["index_byte_count"]
+        )
+        return self.skip_fill(offset)
+
+    def read_index_table(self, partitions):
+        """Read the index table of the first indexed essence container.
+
+        Returns:
+            Tuple (list of index table segments ordered by start edit
+            unit, NumPy array of edit units stream offsets).
+
+        Raises:
+            MXFException: If no index table is found.
+
+        """
+        import numpy as np
+
+        segments = {}
+        for partition in partitions:
+            for segment in self.read_index_segments(partition):
+                key = (segment["index_sid"], segment["start"])
+                segments.setdefault(key, segment)
+        if not segments:
+            raise MXFException("Index table not found")
+
+        index_sid = min(sid for sid, _ in segments)
+        segments = sorted(
+            [v for k, v in segments.items() if k[0] == index_sid],
+            key=lambda s: s["start"],
+        )
+        offsets = np.concatenate([index_stream_offsets(s) for s in segments])
+        if not len(offsets):
+            raise MXFException("Index table is empty")
+
+        return segments, offsets
+
+    def edit_unit_sizes(self):
+        """Size of each edit unit, from the index table only.
+
+        Sizes exclude the KLV wrapping (and encryption overhead) measured
+        on the first edit unit, this is the size of the essence data (eg.
+        JPEG 2000 codestream). Only the last edit unit KLV headers are
+        read to find the end of the essence container.
+
+        Returns:
+            Tuple (NumPy array of edit unit sizes in bytes, edit rate
+            as a (numerator, denominator) tuple).
+
+        Raises:
+            MXFException: If the index table can't be read.
+
+        """
+        import numpy as np
+
+        index = self.read_index()
+        ranges = index["ranges"]
+        offsets = index["offsets"]
+
+        end = self.essence_end(ranges, int(offsets[-1]))
+        sizes = np.diff(offsets, append=end)
+        if (sizes <= 0).any():
+            raise MXFException("Index table stream offsets are not increasing")
+
+        overhead = self.edit_unit_overhead(ranges, int(offsets[0]), int(sizes[0]))
+        return sizes - overhead, index["edit_rate"]
+
+    def read_index(self):
+        """Read partitions and index table, the result is kept for reuse.
+
+        Returns:
+            Dictionary with ``partitions``, index table ``segments``,
+            essence container ``ranges`` (see ``essence_ranges``), edit
+            units stream ``offsets`` (NumPy array) and ``edit_rate``.
+
+        Raises:
+            MXFException: If the index table can't be read.
+
+        """
+        import numpy as np
+
+        if self._index:
+            return self._index
+
+        partitions = self.list_partitions()
+        segments, offsets = self.read_index_table(partitions)
+        edit_rate = segments[0]["edit_rate"]
+        if not edit_rate or edit_rate[0] <= 0 or edit_rate[1] <= 0:
+            raise MXFException("Index table edit rate not found")
+
+        ranges = essence_ranges(self, partitions, segments[0]["body_sid"])
+        if not ranges:
+            raise MXFException("Essence container not found")
+
+        self._index = {
+            "partitions": partitions,
+            "segments": segments,
+            "ranges": ranges,
+            "offsets": offsets.astype(np.int64),
+            "edit_rate": edit_rate,
+        }
+        return self._index
+
+    def read_edit_unit(self, edit_unit, size):
+        """Read the beginning of an edit unit essence data.
+
+        For stereoscopic essence, only the first (left eye) KLV is read.
+
+        Args:
+            edit_unit (int): Edit unit index, relative to the start of the
+                index table.
+            size (int): Maximum number of bytes to read.
+
+        Returns:
+            Up to ``size`` bytes of the essence KLV value.
+
+        Raises:
+            MXFException: If the edit unit can't be read or is encrypted.
+
+        """
+        index = self.read_index()
+        offsets = index["offsets"]
+        if not 0 <= edit_unit < len(offsets):
+            raise MXFException("Edit unit {} not indexed".format(edit_unit))
+
+        offset, _ = self.essence_offset(index["ranges"], int(offsets[edit_unit]))
+        key, length, header_size = self.read_klv_header(offset)
+        if match_ul(key, ENCRYPTED_TRIPLET_UL):
+            raise MXFException("Edit unit {} is encrypted".format(edit_unit))
+        if not is_essence_key(key):
+            raise MXFException("No essence KLV for edit unit {}".format(edit_unit))
+
+        return self.read_at(offset + header_size, min(size, length))
+
+    def essence_offset(self, ranges, stream_offset):
+        """Returns the file offset of a stream offset."""
+        matches = [r for r in ranges if r[0] <= stream_offset]
+        if not matches:
+            raise MXFException(
+                "Stream offset {} not in essence container".format(stream_offset)
+            )
+        stream_start, file_start, file_end = matches[-1]
+        return file_start + stream_offset - stream_start, file_end
+
+    def essence_end(self, ranges, stream_offset):
+        """Returns the stream offset at the end of the last edit unit.
+
+        Args:
+            ranges (list): Essence container ranges, see ``essence_ranges``.
+            stream_offset (int): Stream offset of the last edit unit.
+
+        """
+        offset, file_end = self.essence_offset(ranges, stream_offset)
+        start = offset
+
+        while offset < file_end:
+            key, length, header_size = self.read_klv_header(offset)
+            if not is_essence_key(key):
+                break
+            offset += header_size + length
+
+        return stream_offset + min(offset, file_end) - start
+
+    def edit_unit_overhead(self, ranges, stream_offset, size):
+        """Returns the KLV wrapping size of an edit unit, in bytes."""
+        offset, _ = self.essence_offset(ranges, stream_offset)
+        end = offset + size
+        payload = 0
+
+        while offset < end:
+            key, length, header_size = self.read_klv_header(offset)
+            if match_ul(key, ENCRYPTED_TRIPLET_UL):
+                payload += self.read_triplet_source_length(offset + header_size)
+            elif is_essence_key(key):
+                payload += length
+            offset += header_size + length
+
+        return size - payload
+
+    def read_triplet_source_length(self, offset):
+        """Returns the plaintext length of an encrypted triplet (ST 429-6)."""
+        data = self.read_at(offset, 128)
+        pos = 0
+        fields = []
+        # ContextID, PlaintextOffset, SourceKey, SourceLength
+        for _ in range(4):
+            length, length_size = decode_ber_length(data, pos)
+            pos += length_size
+            fields.append(data[pos : pos + length])
+            pos += length
+        return int.from_bytes(fields[3], "big")
+
+
+def parse_index_segment(value):
+    """Parse an index table segment local set (SMPTE ST 377-1 11.2).
+
+    Returns:
+        Dictionary describing the segment, ``entries`` is the raw index
+        entry array (``entry_count`` entries of ``entry_length`` bytes).
+
+    """
+    segment = {
+        "edit_rate": None,
+        "start": 0,
+        "duration": 0,
+        "edit_unit_byte_count": 0,
+        "index_sid": 0,
+        "body_sid": 0,
+        "slice_count": 0,
+        "entry_count": 0,
+        "entry_length": 0,
+        "entries": b"",
+    }
+
+    pos = 0
+    while pos + 4 <= len(value):
+        tag, length = struct.unpack_from(">HH", value, pos)
+        pos += 4
+
+        if tag == 0x3F0A:
+            count, entry_length = struct.unpack_from(">II", value, pos)
+            # Local set lengths are 16 bits, some writers overflow it for
+            # large entry arrays.
+            length = max(length, 8 + count * entry_length)
+            segment["entry_count"] = count
+            segment["entry_length"] = entry_length
+            segment["entries"] = value[pos + 8 : pos + length]
+        elif tag == 0x3F0B:
+            segment["edit_rate"] = struct.unpack_from(">ii", value, pos)
+        elif tag == 0x3F0C:
+            (segment["start"],) = struct.unpack_from(">q", value, pos)
+        elif tag == 0x3F0D:
+            (segment["duration"],) = struct.unpack_from(">q", value, pos)
+        elif tag == 0x3F05:
+            (segment["edit_unit_byte_count"],) = struct.unpack_from(">I", value, pos)
+        elif tag == 0x3F06:
+            (segment["index_sid"],) = struct.unpack_from(">I", value, pos)
+        elif tag == 0x3F07:
+            (segment["body_sid"],) = struct.unpack_from(">I", value, pos)
+        elif tag == 0x3F08:
+            segment["slice_count"] = value[pos]
+
+        pos += length
+
+    return segment
+
+
+def index_stream_offsets(segment):
+    """Returns the stream offset of each edit unit listed in a segment.
+
+    Returns:
+        NumPy array of unsigned 64 bits stream offsets.
+
+    """
+    import numpy as np
+
+    if segment["edit_unit_byte_count"]:
+        start = segment["start"]
+        edit_units = np.arange(start, start + segment["duration"], dtype=np.uint64)
+        return edit_units * np.uint64(segment["edit_unit_byte_count"])
+
+    entries = segment["entries"]
+    length = segment["entry_length"]
+    if length < 11:
+        return np.empty(0, dtype=np.uint64)
+
+    count = min(segment["entry_count"], len(entries) // length)
+    # Index entry : TemporalOffset, KeyFrameOffset, Flags, StreamOffset...
+    entry = np.dtype(
+        {"names": ["offset"], "formats": [">u8"], "offsets": [3], "itemsize": length}
+    )
+    offsets = np.frombuffer(entries, dtype=entry, count=count)["offset"]
+    return offsets.astype(np.uint64)
+
+
+@functools.lru_cache(maxsize=16)
+def _edit_unit_sizes(path, size, mtime_ns):
+    with MXFFile(path) as mxf:
+        sizes, edit_rate = mxf.edit_unit_sizes()
+    sizes.flags.writeable = False
+    return sizes, edit_rate
+
+
+def mxf_edit_unit_sizes(path):
+    """Size of each edit unit of a MXF file, see ``MXFFile.edit_unit_sizes``.
+
+    Results are cached, the index table of a file is only read once.
+
+    Raises:
+        MXFException: If the index table can't be read.
+
+    """
+    st = os.stat(path)
+    return _edit_unit_sizes(os.path.realpath(path), st.st_size, st.st_mtime_ns)
+
+
+def frame_bitrates(sizes, edit_rate):
+    """Convert edit unit sizes (bytes) to bitrates (Mb/s).
+
+    >>> import numpy as np
+    >>> frame_bitrates(np.array([1302083, 651042]), (24, 1)).round(2)
+    array([250., 125.])
+
+    """
+    return sizes * 8.0 * edit_rate[0] / edit_rate[1] / 1e6
+
+
+def sliding_average(values, window):
+    """Average of each ``window`` consecutive values.
+
+    >>> import numpy as np
+    >>> sliding_average(np.array([1.0, 2.0, 3.0, 6.0]), 2)
+    array([1.5, 2.5, 4.5])
+
+    """
+    import numpy as np
+
+    window = max(1, min(window, len(values)))
+    cumsum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def bitrate_violations(bitrates, threshold):
+    """List ranges of consecutive edit units above ``threshold``.
+
+    Returns:
+        List of (first edit unit, edit units count, maximum bitrate).
+
+    >>> import numpy as np
+    >>> bitrate_violations(np.array([1.0, 5.0, 6.0, 1.0, 7.0]), 4)
+    [(1, 2, 6.0), (4, 1, 7.0)]
+
+    """
+    import numpy as np
+
+    above = np.concatenate(([0], (bitrates > threshold).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(above))
+    return [
+        (int(start), int(end - start), float(bitrates[start:end].max()))
+        for start, end in zip(edges[::2], edges[1::2])
+    ]
+
+
+def bitrate_stats(sizes, edit_rate, percentiles=(50, 95, 99)):
+    """Bitrate statistics of an edit units size timeline.
+
+    Peaks are the highest average bitrate over a one second sliding
+    window, timecodes are relative to the start of the essence.
+
+    Args:
+        sizes (numpy.ndarray): Edit units size in bytes.
+        edit_rate (tuple): Edit rate (numerator, denominator).
+        percentiles (list, optional): Bitrate percentiles to compute.
+
+    Returns:
+        Dictionary of statistics, bitrates are in Mb/s.
+
+    """
+    import numpy as np
+
+    bitrates = frame_bitrates(sizes, edit_rate)
+    fps = int(round(edit_rate[0] / edit_rate[1]))
+    peaks = sliding_average(bitrates, fps)
+
+    return {
+        "FrameCount": len(sizes),
+        "MaxFrameSize": int(sizes.max()),
+        "MaxBitRate": round(float(bitrates.max()), 2),
+        "MaxBitRateTimeCode": frame_to_tc(int(bitrates.argmax()), fps),
+        "AverageBitRate": round(float(bitrates.mean()), 2),
+        "PercentileBitRate": {
+            "P{}".format(p): round(float(v), 2)
+            for p, v in zip(percentiles, np.percentile(bitrates, percentiles))
+        },
+        "PeakBitRate": round(float(peaks.max()), 2),
+        "PeakBitRateTimeCode": frame_to_tc(int(peaks.argmax()), fps),
+    }
+
+
+def probe_mxf_bitrate(path):
+    """Bitrate statistics of a MXF file, from its index table only.
+
+    Raises:
+        MXFException: If the index table can't be read.
+
+    """
+    sizes, edit_rate = mxf_edit_unit_sizes(path)
+    return bitrate_stats(sizes, edit_rate)
+
+
+def scan_mxf(path):
+    """Quick structural integrity check of a MXF file.
+
+    Partitions, Random Index Pack and index table segments are read and
+    each indexed edit unit KLV header is verified : it must lie in the
+    essence container of its partition with a length that does not
+    overflow the next edit unit nor the end of the file. Essence data is
+    never read, a truncated or partially copied file is detected without
+    hashing it.
+
+    For constant bytes per edit unit (CBR) indexes, only the first and
+    last edit units are read.
+
+    Args:
+        path (str): MXF file absolute path.
+
+    Returns:
+        Dictionary with ``valid`` status and a list of ``errors`` along with
+        some statistics.
+
+    Raises:
+        ValueError: If ``path`` is not a valid file.
+
+    """
+    result = {
+        "valid": False,
+        "errors": [],
+        "file_size": os.path.getsize(path) if os.path.isfile(path) else 0,
+        "partitions": 0,
+        "index_segments": 0,
+        "edit_units": 0,
+    }
+    errors = result["errors"]
+
+    with MXFFile(path) as mxf:
+        try:
+            partitions = mxf.list_partitions()
+        except MXFException as e:
+            errors.append("{}, file is truncated or corrupted".format(e))
+            return result
+
+        result["partitions"] = len(partitions)
+        header = partitions[0]
+        if header["status"] != "closed complete":
+            errors.append("Header partition is {}".format(header["status"]))
+        if partitions[-1]["kind"] != "footer":
+            errors.append("Footer partition not found")
+
+        segments = {}
+        for partition in partitions:
+            try:
+                for segment in mxf.read_index_segments(partition):
+                    key = (segment["index_sid"], segment["start"])
+                    segments.setdefault(key, segment)
+            except MXFException as e:
+                errors.append("Index table : {}".format(e))
+
+        result["index_segments"] = len(segments)
+        if not segments:
+            errors.append("Index table not found")
+
+        for segment in sorted(segments.values(), key=lambda s: s["start"]):
+            result["edit_units"] += scan_index_segment(mxf, partitions, segment, errors)
+
+    if len(errors) > SCAN_MAX_ERRORS:
+        errors[SCAN_MAX_ERRORS:] = [
+            "... {} more error(s)".format(len(errors) - SCAN_MAX_ERRORS)
+        ]
+    result["valid"] = not errors
+    return result
+
+
+def essence_ranges(mxf, partitions, body_sid):
+    """List essence container ranges of ``body_sid``.
+
+    Returns:
+        List of (stream offset, file start offset, file end offset).
+
+    """
+    ranges = []
+    for i, partition in enumerate(partitions):
+        if partition["body_sid"] != body_sid:
+            continue
+
+        if i + 1 < len(partitions):
+            end = partitions[i + 1]["offset"]
+        else:
+            end = mxf.size
+        try:
+            start = mxf.essence_start(partition)
+        except MXFException:
+            start = end
+        ranges.append((partition["body_offset"], start, end))
+
+    return ranges
+
+
+def scan_index_segment(mxf, partitions, segment, errors):
+    """Verify each edit unit KLV listed in an index segment.
+
+    Returns:
+        Number of edit units listed in ``segment``.
+
+    """
+    ranges = essence_ranges(mxf, partitions, segment["body_sid"])
+    if not ranges:
+        errors.append("Essence container {} not found".format(segment["body_sid"]))
+        return 0
+
+    offsets = index_stream_offsets(segment).tolist()
+    if segment["edit_unit_byte_count"] and len(offsets) > 2:
+        # Constant edit unit size, first and last edit units are enough
+        checked = [0, len(offsets) - 1]
+    else:
+        checked = range(len(offsets))
+
+    for i in checked:
+        edit_unit = segment["start"] + i
+        stream_offset = offsets[i]
+
+        try:
+            offset, file_end = mxf.essence_offset(ranges, stream_offset)
+        except MXFException as e:
+            errors.append("Edit unit {} : {}".format(edit_unit, e))
+            continue
+
+        if offset >= file_end:
+            errors.append(
+                "Edit unit {} : offset {} beyond end of essence container"
+                " ({}), file is truncated".format(edit_unit, offset, file_end)
+            )
+            continue
+
+        try:
+            key, length, header_size = mxf.read_klv_header(offset)
+        except MXFException as e:
+            errors.append("Edit unit {} : {}".format(edit_unit, e))
+            continue
+
+        if not is_essence_key(key):
+            errors.append(
+                "Edit unit {} : no essence KLV at offset {}".format(edit_unit, offset)
+            )
+            continue
+
+        klv_end = offset + header_size + length
+        if i + 1 < len(offsets):
+            limit = offset + offsets[i + 1] - stream_offset
+        else:
+            limit = file_end
+        limit = min(limit, file_end)
+
+        if klv_end > limit:
+            errors.append(
+                "Edit unit {} : KLV length {} overflows {} by {} bytes{}".format(
+                    edit_unit,
+                    length,
+                    "end of file" if limit == mxf.size else "next edit unit",
+                    klv_end - limit,
+                    ", file is truncated" if limit == mxf.size else "",
+                )
+            )
+
+    return len(offsets)
@@ -3,17 +3,21 @@
 
 import os
 import platform
+import functools
 import subprocess
-import xmltodict
 import contextlib
 from shutil import which
 
 from clairmeta.utils.sys import transform_keys_dict, try_convert_number, camelize
-from clairmeta.utils.file import temporary_dir, parse_name
+from clairmeta.utils.file import temporary_dir
+from clairmeta.utils.sequence import scan_tree, parse_names
+from clairmeta.utils.image import IMAGE_EXTENSIONS, probe_image_sequence
 from clairmeta.utils.time import format_ratio
-from clairmeta.settings import DCP_SETTINGS
+from clairmeta.utils.throttle import use_idle_priority
+from clairmeta.settings import DCP_SETTINGS, SEQUENCE_SETTINGS
 from clairmeta.logger import get_log
-from clairmeta.exception import CommandException
+from clairmeta.utils.mxf import probe_mxf_bitrate
+from clairmeta.exception import CommandException, MXFException
 
 
 win32 = platform.system() == "Windows"
@@ -22,9 +26,27 @@ ASDCP_INFO_CMD = "asdcp-info.exe" if win32 else "asdcp-info"
 ASDCP_UNWRAP_CMD = "asdcp-unwrap.exe" if win32 else "asdcp-unwrap"
 SOX_CMD = "sox.exe" if win32 else "sox"
 MEDIAINFO_CMD = "mediainfo.exe" if win32 else "mediainfo"
+IONICE_CMD = "ionice"
 PROBE_DEPS = [ASDCP_INFO_CMD, ASDCP_UNWRAP_CMD, SOX_CMD, MEDIAINFO_CMD]
 
 
+@functools.lru_cache(maxsize=None)
+def find_command(name):
+    """Locate a command, the result is cached for the process lifetime.
+
+    Args:
+        name (str): Command name.
+
+    Returns:
+        Absolute path of command ``name``, None if not found.
+
+    """
+    path = which(name)
+    if not path and name in PROBE_DEPS:
+        get_log().warning("Missing dependency : {}".format(name))
+    return path
+
+
 def check_command(name):
     """Check command is available on the system.
 
@@ -35,14 +57,28 @@ def check_command(name):
         True if command ``name`` was found on the system.
 
     """
-    return which(name) is not None
+    return find_command(name) is not None
+
 
+def get_capabilities():
+    """Returns a dictionary of external dependencies availability.
 
-def execute_command(cmd_args):
+    Tools are located on first use only, see ``find_command``.
+
+    """
+    return {d: check_command(d) for d in PROBE_DEPS}
+
+
+def execute_command(cmd_args, cancel=None):
     """Execute command and returns the result.
 
+    The command is run at idle I/O priority if configured (see
+    ``configure_io``) and supported by the platform (ionice).
+
     Args:
         cmd_args (list): Command argument list.
+        cancel (threading.Event, optional): When set, the running process
+            is killed.
 
     Returns:
         Tuple (stdout, stderr).
@@ -50,16 +86,28 @@ def execute_command(cmd_args):
     Raises:
         CommandException: If ``cmd_args`` is empty.
         CommandException: In case of non-zero return code.
+        CommandException: If the command was cancelled.
 
     """
     if not cmd_args:
         raise CommandException("Invalid arguments")
 
+    if use_idle_priority() and find_command(IONICE_CMD):
+        cmd_args = [IONICE_CMD, "-c", "3"] + list(cmd_args)
+
     p = subprocess.Popen(cmd_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     if p.returncode:
         raise CommandException("Error calling process : {}".format(cmd_args[0]))
 
-    stdout, stderr = p.communicate()
+    while True:
+        try:
+            stdout, stderr = p.communicate(timeout=0.2 if cancel else None)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel.is_set():
+                p.kill()
+                p.communicate()
+                raise CommandException("Cancelled process : {}".format(cmd_args[0]))
 
     get_log().debug(
         "Executed command with return code ({})\n{}".format(
@@ -72,13 +120,18 @@ def execute_command(cmd_args):
     return stdout, stderr
 
 
-def probe_mxf(path, stereoscopic=False):
+def probe_mxf(path, stereoscopic=False, cancel=None):
     """Probe MXF asset using asdcp-info.
 
+    Bitrates are computed from the MXF index table (see
+    ``probe_mxf_bitrate``), asdcp-info is only asked to scan the whole
+    file for them if the index table can't be read.
+
     Args:
         path (str): MXF file path.
         stereoscopic (boolean, optional): Must be True for Stereoscopic
             (3D) MXF picture asset.
+        cancel (threading.Event, optional): Cancel the probe when set.
 
     Returns:
         Dictionary containing MXF metadata as parsed by asdcp-info.
@@ -93,27 +146,34 @@ def probe_mxf(path, stereoscopic=False):
     if not check_command(ASDCP_INFO_CMD):
         raise CommandException("{} not available".format(ASDCP_INFO_CMD))
 
-    # We don't want asdcp-info to report error in case of bitrate exceeded
-    # We do our own check in Clairmeta.
-    bitrate_threshold = 1e6
+    try:
+        bitrate = probe_mxf_bitrate(path)
+    except MXFException as e:
+        get_log().warning("{} : {}".format(os.path.basename(path), e))
+        bitrate = None
+
     # Prepare command line...
     asdcp_args = [
         ASDCP_INFO_CMD,
         "-v",  # Verbose flag
         "-i",  # Show identity info
         "-d",  # Show essence descriptor info
-        "-r",  # Show bit-rate (Mb/s)
-        "-t",
-        str(bitrate_threshold),
-        path,
     ]
 
+    if not bitrate:
+        # We don't want asdcp-info to report error in case of bitrate
+        # exceeded, we do our own check in Clairmeta.
+        bitrate_threshold = 1e6
+        asdcp_args += ["-r", "-t", str(bitrate_threshold)]  # Bit-rate (Mb/s)
+
+    asdcp_args.append(path)
+
     if stereoscopic:
         # Force stereoscopic interpretation of a JP2K file
         asdcp_args.append("-3")
 
     # Execute asdcp-info and parse results
-    out, err = execute_command(asdcp_args)
+    out, err = execute_command(asdcp_args, cancel=cancel)
     if err:
         raise CommandException(err)
 
@@ -126,7 +186,13 @@ def probe_mxf(path, stereoscopic=False):
         k, v = line.replace(" ", "").split(":", 1)
         metadata[k] = v
 
-    return probe_mxf_clean(metadata)
+    metadata = probe_mxf_clean(metadata)
+    if bitrate:
+        metadata["MaxBitRate"] = bitrate["MaxBitRate"]
+        metadata["AverageBitRate"] = bitrate["AverageBitRate"]
+        metadata["BitRateStats"] = bitrate
+
+    return metadata
 
 
 def probe_mxf_clean(in_meta):
@@ -188,13 +254,14 @@ def probe_mxf_clean(in_meta):
 
 
 @contextlib.contextmanager
-def unwrap_mxf(path, prefix=None, args=[]):
+def unwrap_mxf(path, prefix=None, args=[], cancel=None):
     """Temporarily unwrap MXF asset in a temporary folder using asdcp-unwrap.
 
     Args:
         path (str): MXF file path.
         prefix (str, optional): Optional prefix for unwraped file names.
         args (list): Optional arguments to asdcp-unwrap.
+        cancel (threading.Event, optional): Cancel the unwrap when set.
 
     Yields:
         str: Path to the temporary folder containg unwraped resources.
@@ -219,11 +286,11 @@ def unwrap_mxf(path, prefix=None, args=[]):
         unwrap_args = [ASDCP_UNWRAP_CMD, path, unwrap_prefix]
         unwrap_args += args
 
-        execute_command(unwrap_args)
+        execute_command(unwrap_args, cancel=cancel)
         yield tmp
 
 
-def stat_mxf_audio(path, channels, entry_point, duration):
+def stat_mxf_audio(path, channels, entry_point, duration, cancel=None):
     """Gather audio statistics from MXF audio file using asdcp-unwrap and sox.
 
     Args:
@@ -231,6 +298,7 @@ def stat_mxf_audio(path, channels, entry_point, duration):
         channels (int): Number of audio channel.
         entry_point (int): Starting frame number from audio track.
         duration (int): Number of frames to process from audio track.
+        cancel (threading.Event, optional): Cancel the analysis when set.
 
     Returns:
         Dictionary containing global statistics for each audio channels.
@@ -255,7 +323,7 @@ def stat_mxf_audio(path, channels, entry_point, duration):
 
     prefix = "wav_track"
 
-    with unwrap_mxf(path, prefix=prefix, args=args) as folder:
+    with unwrap_mxf(path, prefix=prefix, args=args, cancel=cancel) as folder:
         wav_list = [
             "{}_{:02d}.wav".format(os.path.join(folder, prefix), c)
             for c in range(1, channels + 1)
@@ -270,7 +338,7 @@ def stat_mxf_audio(path, channels, entry_point, duration):
             ]
         )
 
-        out, err = execute_command(sox_args)
+        out, err = execute_command(sox_args, cancel=cancel)
         err = err.decode("UTF-8")
 
     statistics = {
@@ -330,6 +398,8 @@ def probe_mediainfo(path):
 
     out, err = execute_command(mediainfo_args)
 
+    import xmltodict
+
     probe = xmltodict.parse(
         out, force_list=("track",), process_namespaces=False, dict_constructor=dict
     )
@@ -362,15 +432,19 @@ def probe_mediainfo(path):
     return {"Path": path, "Type": "MEDIA", "Probe": metadata}
 
 
-def probe_folder(path):
-    """Probe a folder containing image file sequence using mediainfo.
+def probe_folder(path, tree=None):
+    """Probe a folder containing image file sequence.
 
     This will parse all the file in ``path`` (sub folder not considered)
     and construct a dictionary where metadata are grouped by file
-    extension.
+    extension. DPX, TIFF and OpenEXR headers are read natively on a sample
+    of each sequence frames, other formats are probed with mediainfo on
+    the first frame.
 
     Args:
         path (str): Folder path.
+        tree (dict, optional): ``path`` already scanned, see
+            ``clairmeta.utils.sequence.scan_tree``.
 
     Returns:
         Dictionary containing file sequences metadata.
@@ -379,12 +453,17 @@ def probe_folder(path):
         CommandException: If ``path`` is not a valid directory.
 
     """
+    import numpy as np
+
     if not os.path.isdir(path):
         raise CommandException("Directory not found : {}".format(path))
 
+    settings = SEQUENCE_SETTINGS["ALL"]
     metadata = {}
+    if tree is None:
+        tree = scan_tree(path, jobs=settings["scan_jobs"])
 
-    for dirpath, dirnames, filenames in os.walk(path):
+    for dirpath, (filenames, _) in tree.items():
         # Skip folder with no files
         if not filenames:
             continue
@@ -392,35 +471,41 @@ def probe_folder(path):
         metadata[dirpath] = {}
         meta = metadata[dirpath]
 
-        for f in filenames:
-            fullpath = os.path.join(dirpath, f)
-            ext = os.path.splitext(f)[-1][1:]
-
-            # Ignore files that don't contains index
-            try:
-                name, index = parse_name(f)
-            except ValueError:
+        # Ignore files that don't contains index
+        names, indexes, valid = parse_names(filenames)
+        names = np.array(names)
+        for i in np.flatnonzero(valid):
+            name = str(names[i])
+            if name in meta:
                 continue
 
-            # This is the first file for that sequence, initialize metadata
-            # dictionary with default values and perform a file based probe.
-            if name not in meta:
-                probe = probe_mediainfo(fullpath)["Probe"]
-                probe.pop("CompleteName", None)
+            # This is the first file for that sequence, probe a sample of
+            # the sequence files, sorted by index.
+            selected = np.flatnonzero((names == name) & valid)
+            seq_indexes = indexes[selected]
+            files = [
+                os.path.join(dirpath, filenames[j])
+                for j in selected[np.argsort(seq_indexes, kind="stable")]
+            ]
+            ext = os.path.splitext(filenames[i])[-1]
 
-                meta[name] = {
-                    "Folder": dirpath,
-                    "Extension": ext,
-                    "Count": 1,
-                    "StartIndex": index,
-                    "EndIndex": index,
-                    "Probe": probe,
-                }
-            # Already know this sequence, simply accumulating files
+            if ext.lower() in IMAGE_EXTENSIONS:
+                probe, errors = probe_image_sequence(
+                    files, settings["probe_samples"], settings["scan_jobs"]
+                )
             else:
-                meta[name]["Count"] += 1
-                meta[name]["StartIndex"] = min(index, meta[name]["StartIndex"])
-                meta[name]["EndIndex"] = max(index, meta[name]["EndIndex"])
+                probe, errors = probe_mediainfo(files[0])["Probe"], []
+                probe.pop("CompleteName", None)
+
+            meta[name] = {
+                "Folder": dirpath,
+                "Extension": ext[1:],
+                "Count": len(seq_indexes),
+                "StartIndex": int(seq_indexes.min()),
+                "EndIndex": int(seq_indexes.max()),
+                "Probe": probe,
+                "ProbeErrors": errors,
+            }
 
     # Remove base folder path from keys
     rootpath = os.path.dirname(path) + "/"
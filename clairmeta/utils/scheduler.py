@@ -0,0 +1,167 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import time
+import threading
+import concurrent.futures
+
+from clairmeta.utils.throttle import bind_io_context
+
+
+def device_of(path):
+    """Returns the device identifier of ``path`` (st_dev)."""
+    return os.stat(path).st_dev
+
+
+def mount_point(path):
+    """Returns the mount point of the file system containing ``path``.
+
+    >>> mount_point('/')
+    '/'
+
+    """
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class DeviceProgress(object):
+    """Aggregate progression of files processed concurrently, by device."""
+
+    def __init__(self, callback=None):
+        """DeviceProgress constructor.
+
+        Args:
+            callback (func, optional): Called with (device name, bytes
+                processed, device total size, seconds elapsed) each time
+                some data is processed, calls are serialized.
+
+        """
+        self.callback = callback
+        self.devices = {}
+        self.start = time.time()
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def add_device(self, device, name, total_size, files_count):
+        self.devices[device] = {
+            "name": name,
+            "files": files_count,
+            "size": total_size,
+            "processed": 0,
+            "elapsed": 0,
+        }
+
+    def update(self, device, file_path, file_processed):
+        with self._lock:
+            stats = self.devices[device]
+            stats["processed"] += file_processed - self._files.get(file_path, 0)
+            stats["elapsed"] = time.time() - self.start
+            self._files[file_path] = file_processed
+
+            if self.callback:
+                self.callback(
+                    stats["name"], stats["processed"], stats["size"], stats["elapsed"]
+                )
+
+
+class DeviceScheduler(object):
+    """Process files concurrently with a number of readers per device.
+
+    Files are grouped by device (``st_dev``, ie. file system / volume),
+    each device has its own pool of readers : concurrent reads on a single
+    spindle are avoided while distinct devices are read in parallel. Within
+    a device, larger files are processed first to shorten the tail.
+
+    """
+
+    def __init__(self, readers_per_device=1, file_callback=None, device_callback=None):
+        """DeviceScheduler constructor.
+
+        Args:
+            readers_per_device (int, optional): Number of files processed
+                concurrently on each device.
+            file_callback (func, optional): Per file progression callback,
+                see ``ConsoleProgress``, calls are serialized. Files are
+                processed concurrently, see ``AggregateProgress``.
+            device_callback (func, optional): Per device progression
+                callback, see ``DeviceProgress``.
+
+        """
+        self.readers_per_device = max(1, readers_per_device or 1)
+        self.file_callback = file_callback
+        self.progress = DeviceProgress(device_callback)
+        self._executors = {}
+        self._futures = []
+        self._callback_lock = threading.Lock()
+
+    def submit(self, func, paths):
+        """Schedule ``func`` to be called for each file path.
+
+        Args:
+            func (func): Called with (path, callback), ``callback`` expects
+                (file path, bytes processed, file size, seconds elapsed),
+                see ``ConsoleProgress``.
+            paths (list): List of file paths.
+
+        Returns:
+            Dictionary of path: concurrent.futures.Future.
+
+        """
+        groups = {}
+        for path in set(paths):
+            groups.setdefault(device_of(path), []).append(path)
+
+        futures = {}
+        for device, group in groups.items():
+            sizes = {p: os.path.getsize(p) for p in group}
+            group.sort(key=lambda p: sizes[p], reverse=True)
+
+            self.progress.add_device(
+                device, mount_point(group[0]), sum(sizes.values()), len(group)
+            )
+            if device not in self._executors:
+                self._executors[device] = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.readers_per_device
+                )
+
+            for path in group:
+                futures[path] = self._executors[device].submit(
+                    bind_io_context(func), path, self._file_callback(device)
+                )
+
+        self._futures.extend(futures.values())
+        return futures
+
+    def _file_callback(self, device):
+        def callback(file_path, file_processed, file_size, file_elapsed):
+            self.progress.update(device, file_path, file_processed)
+            if self.file_callback:
+                # Devices are processed concurrently
+                with self._callback_lock:
+                    self.file_callback(
+                        file_path, file_processed, file_size, file_elapsed
+                    )
+
+        return callback
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        # Executor.shutdown cancel_futures argument requires Python 3.9
+        if cancel_futures:
+            for future in self._futures:
+                future.cancel()
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
+        self._executors = {}
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True, cancel_futures=exc_type is not None)
@@ -0,0 +1,265 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import re
+import concurrent.futures
+
+from clairmeta.utils.file import parse_name
+
+
+# Same rule as ``IMAGENO_REGEX`` (last index found) applied to a whole line,
+# non matching lines have an empty index.
+IMAGENO_LINE_REGEX = re.compile(
+    r"^(?:(?P<Name>.*?)[\._]?(?P<Index>\d+)(?=[\._])(?!.*\d[\._]).*|.*)$", re.M
+)
+
+
+def parse_names(filenames):
+    """Extract image names and indexes from file names, see ``parse_name``.
+
+    Args:
+        filenames (list): Image file names.
+
+    Returns:
+        Tuple (names, indexes, valid) : list of image names, array of image
+        indexes and boolean array, False if the index was not found.
+
+    >>> names, indexes, valid = parse_names(['a.0001.tiff', 'a.tiff', '2.tif'])
+    >>> names, indexes.tolist(), valid.tolist()
+    (['a', '', ''], [1, 0, 2], [True, False, True])
+
+    """
+    import numpy as np
+
+    matches = IMAGENO_LINE_REGEX.findall("\n".join(filenames))
+
+    # Line based parsing is not possible with new lines in file names
+    if len(matches) != len(filenames):
+        matches = []
+        for f in filenames:
+            try:
+                name, index = parse_name(f)
+                matches.append((name, str(index)))
+            except ValueError:
+                matches.append(("", ""))
+
+    names = [m[0] for m in matches]
+    indexes = [m[1] for m in matches]
+    valid = np.array([i != "" for i in indexes], dtype=bool)
+    indexes = np.array([int(i) if i else 0 for i in indexes], dtype=np.int64)
+    return names, indexes, valid
+
+
+def scan_folder(path):
+    """List a folder in a single ``os.scandir`` pass.
+
+    Returns:
+        Tuple (files names, files sizes array, sub folders names), sorted
+        by name.
+
+    """
+    import numpy as np
+
+    names, sizes, subdirs = [], [], []
+
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                # Symbolic links to folders are not followed, like os.walk
+                if not entry.is_symlink():
+                    subdirs.append(entry.name)
+            else:
+                names.append(entry.name)
+                sizes.append(entry.stat().st_size)
+
+    order = sorted(range(len(names)), key=names.__getitem__)
+    names = [names[i] for i in order]
+    sizes = np.array(sizes, dtype=np.int64)[order]
+    return names, sizes, sorted(subdirs)
+
+
+def scan_tree(path, jobs=8):
+    """Scan a folder tree, folders are listed concurrently.
+
+    Args:
+        path (str): Base folder path.
+        jobs (int, optional): Number of folders listed concurrently.
+
+    Returns:
+        Dictionary of folder path : (files names, files sizes array), sorted
+        by path and including folders without files.
+
+    """
+    tree = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(scan_folder, path): path}
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                dirpath = pending.pop(future)
+                try:
+                    names, sizes, subdirs = future.result()
+                except OSError:
+                    continue
+
+                tree[dirpath] = (names, sizes)
+                for d in subdirs:
+                    subdir = os.path.join(dirpath, d)
+                    pending[executor.submit(scan_folder, subdir)] = subdir
+
+    return {k: tree[k] for k in sorted(tree)}
+
+
+def filter_tree(tree, path, ignore_files=None, ignore_dirs=None):
+    """Remove ignored files and folders from a scanned tree.
+
+    Args:
+        tree (dict): Scanned tree, see ``scan_tree``.
+        path (str): Base folder path of ``tree``.
+        ignore_files (list): List of files name to ignore.
+        ignore_dirs (list): List of directory name to ignore, including
+            their sub folders.
+
+    Returns:
+        Filtered tree dictionary.
+
+    """
+    ignore_files = set(ignore_files or [])
+    ignore_dirs = set(ignore_dirs or [])
+    filtered = {}
+
+    for dirpath, (names, sizes) in tree.items():
+        rel_path = os.path.relpath(dirpath, path)
+        if rel_path != "." and ignore_dirs.intersection(rel_path.split(os.sep)):
+            continue
+
+        if ignore_files:
+            keep = [i for i, n in enumerate(names) if n not in ignore_files]
+            names, sizes = [names[i] for i in keep], sizes[keep]
+        filtered[dirpath] = (names, sizes)
+
+    return filtered
+
+
+def summarize(messages, count, max_errors):
+    """Limit a list of messages, the last one gives the number omitted.
+
+    >>> summarize(['a', 'b'], 5, 2)
+    ['a', 'b', '3 more error(s)']
+
+    """
+    messages = messages[:max_errors]
+    if count > len(messages):
+        messages.append("{} more error(s)".format(count - len(messages)))
+    return messages
+
+
+def sequence_errors(names, sizes, allowed_extensions, size_tol, max_errors=10):
+    """Check an image file sequence coherence.
+
+    The first file with an image index is the reference, all files must
+    have the same name (excluding index), extension and size (within
+    tolerance) and indexes must be contiguous.
+
+    Args:
+        names (list): Files names.
+        sizes (numpy.ndarray): Files sizes.
+        allowed_extensions (dict): Dictionary mapping extensions.
+        size_tol (float): Size tolerance, in percentage.
+        max_errors (int, optional): Maximum number of errors listed for
+            each kind of error.
+
+    Returns:
+        List of error messages.
+
+    """
+    import numpy as np
+
+    errors = []
+    if not names:
+        return errors
+
+    image_names, indexes, valid = parse_names(names)
+    extensions = np.array([os.path.splitext(n)[-1] for n in names])
+
+    invalid = np.flatnonzero(~valid)
+    errors += summarize(
+        ["{} : image index not found".format(names[i]) for i in invalid[:max_errors]],
+        len(invalid),
+        max_errors,
+    )
+    if len(invalid) == len(names):
+        return errors
+
+    ref = np.flatnonzero(valid)[0]
+    if extensions[ref] not in allowed_extensions:
+        errors.append("extension {} not authorized".format(extensions[ref]))
+
+    image_names = np.array(image_names)
+    mismatch = np.flatnonzero(valid & (image_names != image_names[ref]))
+    errors += summarize(
+        [
+            "Filename difference, {} but expected {}".format(
+                image_names[i], image_names[ref]
+            )
+            for i in mismatch[:max_errors]
+        ],
+        len(mismatch),
+        max_errors,
+    )
+
+    mismatch = np.flatnonzero(valid & (extensions != extensions[ref]))
+    errors += summarize(
+        [
+            "File extension difference, {} but expected {}".format(
+                names[i], extensions[ref]
+            )
+            for i in mismatch[:max_errors]
+        ],
+        len(mismatch),
+        max_errors,
+    )
+
+    # Same rule as ``number_is_close``
+    ref_size = sizes[ref]
+    tolerance = np.maximum(size_tol / 1e2 * np.maximum(sizes, ref_size), 1e-08)
+    mismatch = np.flatnonzero(valid & (np.abs(sizes - ref_size) > tolerance))
+    errors += summarize(
+        [
+            "{} : file size difference got {} but expected {}"
+            " - tolerance of {}%".format(names[i], sizes[i], ref_size, size_tol)
+            for i in mismatch[:max_errors]
+        ],
+        len(mismatch),
+        max_errors,
+    )
+
+    # Jumps in sequence (ie. missing frame(s)) and duplicated indexes
+    unique, counts = np.unique(indexes[valid], return_counts=True)
+    duplicated = unique[counts > 1]
+    errors += summarize(
+        [
+            "File sequence index {} found multiple times".format(i)
+            for i in duplicated[:max_errors]
+        ],
+        len(duplicated),
+        max_errors,
+    )
+
+    jumps = np.flatnonzero(np.diff(unique) > 1)
+    messages = []
+    for i in jumps[:max_errors]:
+        first, last = unique[i] + 1, unique[i + 1] - 1
+        if first == last:
+            messages.append("File sequence jump found, file {} not found".format(first))
+        else:
+            messages.append(
+                "File sequence jump found, files {} to {} not found".format(first, last)
+            )
+    errors += summarize(messages, len(jumps), max_errors)
+
+    return errors
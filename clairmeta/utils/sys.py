@@ -220,14 +220,19 @@ def remove_key_dict(in_dict, patterns):
     {'mykey': 3}
 
     """
+    regex = re.compile("|".join("(?:{})".format(p) for p in patterns))
+    return _remove_key_dict(in_dict, regex.search)
+
+
+def _remove_key_dict(in_dict, match):
     if isinstance(in_dict, dict):
         in_dict = {
-            key: remove_key_dict(value, patterns)
+            key: _remove_key_dict(value, match)
             for key, value in in_dict.items()
-            if not any([re.search(p, key) for p in patterns])
+            if not match(key)
         }
     elif isinstance(in_dict, list):
-        in_dict = [remove_key_dict(item, patterns) for item in in_dict]
+        in_dict = [_remove_key_dict(item, match) for item in in_dict]
 
     return in_dict
 
@@ -0,0 +1,342 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import time
+import datetime
+import threading
+import contextlib
+import contextvars
+
+
+class TokenBucket(object):
+    """Thread safe token bucket rate limiter.
+
+    Tokens are bytes, the bucket is refilled at ``rate`` bytes per second up
+    to ``capacity``. Consumers are allowed to go in debt, they then sleep
+    the time needed to pay it back : concurrent consumers share the rate.
+
+    """
+
+    def __init__(self, rate, capacity=None):
+        """TokenBucket constructor.
+
+        Args:
+            rate (float): Refill rate in bytes per second.
+            capacity (float, optional): Maximum burst size in bytes, default
+                to one second worth of tokens.
+
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = rate
+            self.capacity = rate
+            self.tokens = min(self.tokens, self.capacity)
+
+    def consume(self, amount, cancel=None):
+        """Consume ``amount`` tokens, blocks until they are available.
+
+        Args:
+            amount (int): Number of tokens.
+            cancel (threading.Event, optional): Stop waiting when set.
+
+        Returns:
+            Number of seconds spent waiting.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.timestamp
+            self.timestamp = now
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            if cancel:
+                cancel.wait(wait)
+            else:
+                time.sleep(wait)
+        return wait
+
+
+def parse_schedule_time(value):
+    """Parse a schedule time of day (HH:MM).
+
+    >>> parse_schedule_time('08:30')
+    datetime.time(8, 30)
+
+    Raises:
+        ValueError: If ``value`` is not a valid time of day.
+
+    """
+    return datetime.datetime.strptime(value, "%H:%M").time()
+
+
+class ReadLimiter(object):
+    """Limit the bandwidth of file reads, with optional time of day schedule.
+
+    The schedule is a list of dictionaries with ``start``, ``end`` (HH:MM)
+    and ``read_limit`` (MB/s) keys, a window may wrap around midnight. The
+    first matching window is used, ``read_limit`` applies outside of any
+    window. A limit of 0 (or None) means unlimited.
+
+    >>> limiter = ReadLimiter(0, [
+    ...     {'start': '14:00', 'end': '02:00', 'read_limit': 20}])
+    >>> limiter.current_limit(datetime.time(20, 0))
+    20
+    >>> limiter.current_limit(datetime.time(8, 0))
+    0
+
+    """
+
+    def __init__(self, read_limit=None, read_schedule=None):
+        """ReadLimiter constructor.
+
+        Args:
+            read_limit (float, optional): Read limit in MB/s.
+            read_schedule (list, optional): List of time of day windows.
+
+        Raises:
+            ValueError: If ``read_schedule`` is not valid.
+
+        """
+        self.read_limit = read_limit or 0
+        self.schedule = [
+            (
+                parse_schedule_time(window["start"]),
+                parse_schedule_time(window["end"]),
+                window.get("read_limit") or 0,
+            )
+            for window in read_schedule or []
+        ]
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    def current_limit(self, now=None):
+        """Returns the read limit (MB/s) for time of day ``now``."""
+        now = now or datetime.datetime.now().time()
+
+        for start, end, limit in self.schedule:
+            if start <= end:
+                in_window = start <= now < end
+            else:
+                in_window = now >= start or now < end
+            if in_window:
+                return limit
+
+        return self.read_limit
+
+    def consume(self, nbytes, cancel=None):
+        """Account for ``nbytes`` read, blocks if the limit is exceeded.
+
+        Args:
+            nbytes (int): Number of bytes read.
+            cancel (threading.Event, optional): Stop waiting when set.
+
+        """
+        limit = self.current_limit() if self.schedule else self.read_limit
+        if not limit:
+            return
+
+        rate = limit * 1e6
+        with self._lock:
+            if not self._bucket:
+                self._bucket = TokenBucket(rate)
+            elif self._bucket.rate != rate:
+                self._bucket.set_rate(rate)
+            bucket = self._bucket
+
+        bucket.consume(nbytes, cancel)
+
+
+# File read modes, see ``clairmeta.utils.file.iter_file_chunks``
+READ_MODES = ["cached", "fadvise", "direct"]
+
+
+class IOSettings(object):
+    """I/O settings, see ``configure_io``."""
+
+    def __init__(self, settings=None):
+        """IOSettings constructor.
+
+        Args:
+            settings (dict, optional): I/O settings, see the ``io`` section
+              of the check profile. None is unlimited.
+
+        Raises:
+            ValueError: If ``settings`` read schedule is not valid.
+            ValueError: If ``settings`` read mode is unknown.
+
+        """
+        settings = settings or {}
+        read_limit = settings.get("read_limit")
+        read_schedule = settings.get("read_schedule")
+
+        self.read_mode = settings.get("read_mode") or "cached"
+        if self.read_mode not in READ_MODES:
+            raise ValueError("Unknown read mode : {}".format(self.read_mode))
+        self.device_readers = max(1, settings.get("device_readers") or 1)
+        self.idle_priority = bool(settings.get("idle_priority"))
+
+        if read_limit or read_schedule:
+            self.read_limiter = shared_read_limiter(read_limit, read_schedule)
+        else:
+            self.read_limiter = None
+
+
+# Read limiters by settings, shared by all checks of the process
+_READ_LIMITERS = {}
+_READ_LIMITERS_LOCK = threading.Lock()
+
+
+def shared_read_limiter(read_limit=None, read_schedule=None):
+    """Returns the process wide ReadLimiter for these settings.
+
+    Concurrent checks (eg. server jobs) using the same settings share the
+    bandwidth instead of each one being allowed ``read_limit``.
+
+    >>> shared_read_limiter(10) is shared_read_limiter(10)
+    True
+
+    Raises:
+        ValueError: If ``read_schedule`` is not valid.
+
+    """
+    key = (
+        read_limit or 0,
+        tuple(
+            (w.get("start"), w.get("end"), w.get("read_limit") or 0)
+            for w in read_schedule or []
+        ),
+    )
+    with _READ_LIMITERS_LOCK:
+        if key not in _READ_LIMITERS:
+            _READ_LIMITERS[key] = ReadLimiter(read_limit, read_schedule)
+        return _READ_LIMITERS[key]
+
+
+# Process wide settings, unlimited by default (see ``configure_io``), they
+# can be overridden in a given context (see ``io_context``).
+_PROCESS_IO = IOSettings()
+_CONTEXT_IO = contextvars.ContextVar("clairmeta_io", default=None)
+
+
+def _current_io():
+    return _CONTEXT_IO.get() or _PROCESS_IO
+
+
+def configure_io(settings=None):
+    """Configure process wide I/O settings.
+
+    Args:
+        settings (dict, optional): I/O settings, see the ``io`` section of
+          the check profile. Keys : ``read_limit`` (MB/s),
+          ``read_schedule`` (see ``ReadLimiter``), ``read_mode`` (see
+          ``READ_MODES``), ``device_readers`` (files read concurrently per
+          device, see ``DeviceScheduler``) and ``idle_priority`` (run
+          external tools at idle I/O priority). None reset to default
+          (unlimited).
+
+    Raises:
+        ValueError: If ``settings`` read schedule is not valid.
+        ValueError: If ``settings`` read mode is unknown.
+
+    """
+    global _PROCESS_IO
+    _PROCESS_IO = IOSettings(settings)
+
+
+@contextlib.contextmanager
+def io_context(settings=None):
+    """Context manager overriding I/O settings in the current context only.
+
+    Unlike ``configure_io``, concurrent contexts (eg. checks running in
+    different threads) don't interfere, settings are restored on exit. The
+    read limiter is still shared, see ``shared_read_limiter``.
+    Worker threads don't inherit the context, see ``bind_io_context``.
+
+    Args:
+        settings (dict, optional): I/O settings, see ``configure_io``.
+
+    """
+    token = _CONTEXT_IO.set(IOSettings(settings))
+    try:
+        yield
+    finally:
+        _CONTEXT_IO.reset(token)
+
+
+def bind_io_context(func):
+    """Returns ``func`` wrapped to run with the caller I/O settings.
+
+    To be used for functions submitted to a thread pool.
+
+    """
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        # A context can't be entered by several threads at once
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def split_io_settings(settings, count):
+    """Share I/O settings read limits between ``count`` processes.
+
+    Read limits are enforced per process, each of ``count`` concurrent
+    readers is given an equal share of the bandwidth.
+
+    >>> split_io_settings({'read_limit': 100, 'read_schedule': []}, 4)
+    {'read_limit': 25.0, 'read_schedule': []}
+
+    """
+    if not settings:
+        return settings
+
+    settings = dict(settings)
+    if settings.get("read_limit"):
+        settings["read_limit"] = settings["read_limit"] / count
+    settings["read_schedule"] = [
+        dict(w, read_limit=w["read_limit"] / count if w.get("read_limit") else 0)
+        for w in settings.get("read_schedule") or []
+    ]
+    return settings
+
+
+def get_read_limiter():
+    """Returns the current ReadLimiter object, None if unlimited."""
+    return _current_io().read_limiter
+
+
+def throttle_read(nbytes, cancel=None):
+    """Account for ``nbytes`` read from a file, see ``ReadLimiter``.
+
+    To be called by every file reading loop processing essence data, this
+    is a no-op if no read limit is configured.
+
+    """
+    limiter = _current_io().read_limiter
+    if limiter:
+        limiter.consume(nbytes, cancel)
+
+
+def get_read_mode():
+    """Returns the current file read mode, see ``READ_MODES``."""
+    return _current_io().read_mode
+
+
+def get_device_readers():
+    """Returns the number of files read concurrently on each device."""
+    return _current_io().device_readers
+
+
+def use_idle_priority():
+    """Returns True if external tools must run at idle I/O priority."""
+    return _current_io().idle_priority
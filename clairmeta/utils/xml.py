@@ -5,9 +5,7 @@ from __future__ import absolute_import
 import os
 import io
 import re
-import xmltodict
-from lxml import etree
-from xml.dom.minidom import parseString
+import threading
 from xml.parsers.expat import ExpatError
 
 from clairmeta.utils.sys import modified_dict, try_convert_number
@@ -15,6 +13,12 @@ from clairmeta.logger import get_log
 
 
 _DEFAULT_NS_SEP = " "
+# Compiled schemas are cached per thread, a schema object is not safe to
+# share between concurrent validations (shared error log).
+_XSD_LOCAL = threading.local()
+# Serialize schema compilation only, XML_CATALOG_FILES environment variable
+# is process wide.
+_XSD_COMPILE_LOCK = threading.Lock()
 
 
 def prettyprint_xml(xml_str):
@@ -27,6 +31,8 @@ def prettyprint_xml(xml_str):
         XML document string with pretty indentation / formating.
 
     """
+    from xml.dom.minidom import parseString
+
     parsed = parseString(xml_str)
     return parsed.toprettyxml(indent="  ")
 
@@ -188,6 +194,8 @@ def parse_xml(xml_path, namespaces={}, force_list=(), xml_attribs=True):
     if not os.path.isfile(xml_path):
         raise ValueError("{} is not a file".format(xml_path))
 
+    import xmltodict
+
     try:
         with open(xml_path, encoding="utf-8-sig") as file:
             readed_file = file.read()
@@ -215,23 +223,82 @@ def parse_xml(xml_path, namespaces={}, force_list=(), xml_attribs=True):
         get_log().error("Error parsing XML {} : {}".format(xml_path, str(e)))
 
 
-def validate_xml(xml_path, xsd_id):
-    """Validate a XML document with a XSD schema.
+def xml_root_name(xml_path, chunk_size=4096):
+    """Returns the root element name of a XML document.
+
+    Only the beginning of the document is read, up to the root element.
 
     Args:
         xml_path (str): XML file absolute path.
+        chunk_size (int, optional): Read size.
+
+    Returns:
+        Root element name without namespace, None if ``xml_path`` is not
+        a XML document.
+
+    """
+    from xml.parsers.expat import ParserCreate
+
+    root = []
+    parser = ParserCreate(namespace_separator=_DEFAULT_NS_SEP)
+    parser.StartElementHandler = lambda name, attrs: root.append(
+        name.split(_DEFAULT_NS_SEP)[-1]
+    )
+
+    try:
+        with open(xml_path, "rb") as file:
+            while not root:
+                chunk = file.read(chunk_size)
+                parser.Parse(chunk, not chunk)
+                if not chunk:
+                    break
+    except (OSError, ExpatError):
+        pass
+
+    return root[0] if root else None
+
+
+def _xsd_catalog_path():
+    root_path = os.path.dirname(os.path.dirname(__file__))
+    return os.path.join(root_path, "xsd/catalog.xml")
+
+
+def get_xsd_schema(xsd_id):
+    """Returns the compiled XSD schema for a given identifier.
+
+    Compiled schemas are cached for the lifetime of the calling thread,
+    compiling the DCP schemas (and their imports) is much more expensive
+    than the validation itself.
+
+    Args:
         xsd_id (str): XSD Schema identifier, as found in the catalog file.
 
+    Returns:
+        lxml.etree.XMLSchema object.
+
     Raises:
-        ValueError: If ``xml_path`` is not a valid file.
         LookupError: If XSD Schema could not be found for various raisons.
 
     """
-    if not os.path.isfile(xml_path):
-        raise ValueError("{} is not a file".format(xml_path))
+    cache = _xsd_schema_cache()
+    if xsd_id not in cache:
+        cache[xsd_id] = _compile_xsd_schema(xsd_id)
+    return cache[xsd_id]
+
+
+def _xsd_schema_cache():
+    """Returns the calling thread compiled XSD schemas dictionary."""
+    if not hasattr(_XSD_LOCAL, "schemas"):
+        _XSD_LOCAL.schemas = {}
+    return _XSD_LOCAL.schemas
+
+
+def _compile_xsd_schema(xsd_id):
+    """Compile XSD schema ``xsd_id``, see ``get_xsd_schema``."""
+    from lxml import etree
 
     root_path = os.path.dirname(os.path.dirname(__file__))
-    catalog_path = os.path.join(root_path, "xsd/catalog.xml")
+    catalog_path = _xsd_catalog_path()
 
     # Find schema location using catalog
     catalog = etree.parse(catalog_path).getroot()
@@ -247,11 +314,57 @@ def validate_xml(xml_path, xsd_id):
 
     xsd_path = os.path.join(root_path, "xsd/{}".format(match[0].attrib["uri"]))
 
-    # Validation
-    with modified_dict(os.environ, XML_CATALOG_FILES=catalog_path):
-        doc = etree.parse(xml_path)
-        schema = etree.XMLSchema(file=xsd_path)
-        schema.assertValid(doc)
+    with _XSD_COMPILE_LOCK:
+        with modified_dict(os.environ, XML_CATALOG_FILES=catalog_path):
+            return etree.XMLSchema(file=xsd_path)
+
+
+def preload_xsd_schemas():
+    """Compile and cache all XSD schemas listed in the catalog file.
+
+    Schemas are cached for the calling thread only, see ``get_xsd_schema``.
+
+    Schemas that can't be compiled on their own (only meant to be imported
+    by another schema) are skipped.
+
+    Returns:
+        Number of schemas available in cache.
+
+    """
+    from lxml import etree
+
+    catalog = etree.parse(_xsd_catalog_path()).getroot()
+    nsmap = {"ns": catalog.nsmap[None]}
+
+    for node in catalog.findall(".//ns:public", namespaces=nsmap):
+        try:
+            get_xsd_schema(node.attrib["publicId"])
+        except etree.XMLSchemaParseError:
+            pass
+
+    return len(_xsd_schema_cache())
+
+
+def validate_xml(xml_path, xsd_id):
+    """Validate a XML document with a XSD schema.
+
+    Args:
+        xml_path (str): XML file absolute path.
+        xsd_id (str): XSD Schema identifier, as found in the catalog file.
+
+    Raises:
+        ValueError: If ``xml_path`` is not a valid file.
+        LookupError: If XSD Schema could not be found for various raisons.
+
+    """
+    if not os.path.isfile(xml_path):
+        raise ValueError("{} is not a file".format(xml_path))
+
+    from lxml import etree
+
+    schema = get_xsd_schema(xsd_id)
+    doc = etree.parse(xml_path)
+    schema.assertValid(doc)
 
 
 def canonicalize_xml(xml_path, root=None, ns=None, strip=None):
@@ -278,6 +391,8 @@ def canonicalize_xml(xml_path, root=None, ns=None, strip=None):
     if not os.path.isfile(xml_path):
         raise ValueError("{} is not a file".format(xml_path))
 
+    from lxml import etree
+
     doc = etree.parse(xml_path)
     nsmap = {"ns": ns}
 
@@ -0,0 +1,399 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import concurrent.futures
+
+from clairmeta.logger import get_log
+from clairmeta.batch import ASSETMAP_NAMES, report_name
+from clairmeta.profile import DCP_CHECK_PROFILE
+from clairmeta.utils.file import shaone_b64, enable_hash_cache
+from clairmeta.exception import ClairMetaException
+
+
+class Inotify(object):
+    """Minimal recursive directory watcher using Linux inotify."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (
+        IN_MODIFY
+        | IN_ATTRIB
+        | IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+        | IN_DELETE_SELF
+    )
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, root):
+        """Inotify constructor.
+
+        Args:
+            root (str): Directory to watch, including all sub directories.
+
+        Raises:
+            OSError: If inotify is not available or the watch limit is
+                reached.
+
+        """
+        self.root = root
+        self._watches = {}
+
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify not available")
+
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify not available")
+
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.add_tree(root)
+
+    def add_tree(self, path):
+        """Watch ``path`` and all its sub directories."""
+        for dirpath, _, _ in os.walk(path):
+            wd = self._libc.inotify_add_watch(
+                self.fd, os.fsencode(dirpath), self.WATCH_MASK
+            )
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(err, "inotify_add_watch failed : {}".format(dirpath))
+            self._watches[wd] = dirpath
+
+    def read(self, timeout):
+        """Wait at most ``timeout`` seconds for events.
+
+        Returns:
+            Set of paths modified, None if some events were lost (queue
+            overflow) meaning that everything should be considered modified.
+
+        """
+        paths = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return paths
+
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(buf, offset)
+                offset += self.EVENT_HEADER.size
+                name = buf[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                if mask & self.IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+
+                dirpath = self._watches.get(wd)
+                if not dirpath:
+                    continue
+
+                path = os.path.join(dirpath, os.fsdecode(name)) if name else dirpath
+                paths.add(path)
+
+                created = mask & (self.IN_CREATE | self.IN_MOVED_TO)
+                if created and mask & self.IN_ISDIR:
+                    self.add_tree(path)
+
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PackageState(object):
+    """Files stability tracking of one package being received."""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.hashes = {}
+        self.last_change = time.time()
+        self.last_update = None
+        self.checked = False
+
+    def update(self, now):
+        """Refresh files size and modification time.
+
+        Returns:
+            Boolean, True if the package content changed.
+
+        """
+        snapshot = {}
+        for dirpath, _, filenames in os.walk(self.path):
+            for f in filenames:
+                path = os.path.join(dirpath, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+
+        self.last_update = now
+        changed = False
+        for path, stat in snapshot.items():
+            previous = self.files.get(path)
+            if not previous or previous[0] != stat:
+                self.files[path] = (stat, now)
+                self.hashes.pop(path, None)
+                changed = True
+
+        for path in set(self.files) - set(snapshot):
+            del self.files[path]
+            self.hashes.pop(path, None)
+            changed = True
+
+        if changed:
+            self.last_change = now
+            self.checked = False
+        return changed
+
+    def settled_files(self, now, settle_time):
+        """List files that did not change for ``settle_time`` seconds."""
+        return [
+            path
+            for path, (_, since) in self.files.items()
+            if now - since >= settle_time
+        ]
+
+    def is_settled(self, now, settle_time):
+        return bool(self.files) and now - self.last_change >= settle_time
+
+    def has_assetmap(self):
+        return any(os.path.join(self.path, n) in self.files for n in ASSETMAP_NAMES)
+
+
+class FolderWatcher(object):
+    """Check packages copied in a folder as soon as they are complete.
+
+    Each sub directory of the watched folder is considered as a package.
+    Files are hashed as soon as they stop changing for ``settle_time``
+    seconds while the rest of the package is still being received, the
+    package is checked once all its files are settled, previously computed
+    hashes are then retrieved from the hash cache.
+
+    Changes are detected using inotify when available, polling the folder
+    every ``poll_interval`` seconds otherwise.
+
+    """
+
+    def __init__(
+        self,
+        root,
+        callback=None,
+        profile=DCP_CHECK_PROFILE,
+        settle_time=10,
+        poll_interval=2,
+        hash_jobs=2,
+        use_inotify=True,
+    ):
+        """FolderWatcher constructor.
+
+        Args:
+            root (str): Watched directory path.
+            callback (function, optional): Called with (path, status, report)
+                for each package checked, report is None if the check could
+                not complete (status is then the exception raised).
+            profile (dict, optional): Checker profile.
+            settle_time (float, optional): Number of seconds a file (or a
+                whole package) must stay unchanged to be considered complete.
+            poll_interval (float, optional): Scanning interval in seconds.
+            hash_jobs (int, optional): Number of files hashed concurrently.
+            use_inotify (bool, optional): Use inotify if available.
+
+        Raises:
+            ClairMetaException: If ``root`` is not a valid directory.
+
+        """
+        if not os.path.isdir(root):
+            raise ClairMetaException("{} is not a valid folder".format(root))
+
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.profile = profile
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.log = get_log()
+        self.packages = {}
+        self._stopped = False
+        self._dirty = set()
+
+        enable_hash_cache()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=hash_jobs)
+
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify(self.root)
+            except (OSError, AttributeError, TypeError) as e:
+                self.log.warning("Inotify unavailable, polling : {}".format(e))
+
+    def run(self):
+        """Watch until ``stop`` is called."""
+        self.log.info("Watching {}".format(self.root))
+        try:
+            while not self._stopped:
+                self.wait()
+                self.step()
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stopped = True
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+    def wait(self):
+        """Wait for changes, or the next polling time."""
+        if not self.inotify:
+            time.sleep(self.poll_interval)
+            return
+
+        # Events keep coming while a package is received, drain them until
+        # the next polling time instead of stepping on each of them.
+        deadline = time.monotonic() + self.poll_interval
+        paths = self.inotify.read(self.poll_interval)
+        while paths:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            more = self.inotify.read(timeout)
+            if more is None:
+                paths = None
+            elif not more:
+                break
+            else:
+                paths |= more
+
+        if paths is None:
+            self._dirty.update(self.packages)
+            return
+
+        for path in paths:
+            rel = os.path.relpath(path, self.root)
+            if not rel.startswith(os.pardir):
+                self._dirty.add(os.path.join(self.root, rel.split(os.sep)[0]))
+
+    def step(self):
+        """Update packages state, start hashes and checks when possible."""
+        now = time.time()
+
+        with os.scandir(self.root) as it:
+            paths = [
+                e.path
+                for e in it
+                if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")
+            ]
+
+        for path in set(self.packages) - set(paths):
+            del self.packages[path]
+        for path in set(paths) - set(self.packages):
+            self.packages[path] = PackageState(path)
+            self._dirty.add(path)
+
+        for path, state in self.packages.items():
+            # Without inotify all packages must be scanned, otherwise only
+            # the ones modified. Unchecked packages are scanned again once
+            # per settle time, in case some events were missed (eg. files
+            # created before their directory watch is added).
+            if not self.inotify or path in self._dirty:
+                state.update(now)
+            elif not state.checked and now - state.last_update >= self.settle_time:
+                state.update(now)
+            self._dirty.discard(path)
+
+            if not state.checked:
+                self.hash_settled(state, now)
+                self.check_settled(state, now)
+
+    def hash_settled(self, state, now):
+        """Start hashing files that stopped changing."""
+        for path in state.settled_files(now, self.settle_time):
+            if path in state.hashes or os.path.basename(path).startswith("."):
+                continue
+            state.hashes[path] = self._executor.submit(shaone_b64, path)
+
+    def check_settled(self, state, now):
+        """Check package once all files are settled and hashed."""
+        if not state.is_settled(now, self.settle_time) or not state.has_assetmap():
+            return
+        if not all(f.done() for f in state.hashes.values()):
+            return
+
+        state.checked = True
+        self.log.info("Package complete : {}".format(state.path))
+
+        from clairmeta.dcp import DCP
+
+        try:
+            status, report = DCP(state.path).check(profile=self.profile)
+        except Exception as e:
+            status, report = e, None
+
+        if self.callback:
+            self.callback(state.path, status, report)
+
+
+def watch_folder(root, output, profile=DCP_CHECK_PROFILE, callback=None, **kwargs):
+    """Watch a folder and write a report for each package received.
+
+    Args:
+        root (str): Watched directory path.
+        output (str): Reports output directory, created if needed.
+        profile (dict, optional): Checker profile.
+        callback (function, optional): Called with (path, status, report)
+            for each package checked.
+        **kwargs: Extra ``FolderWatcher`` keyword arguments.
+
+    """
+    if not os.path.isdir(output):
+        os.makedirs(output)
+
+    def on_checked(path, status, report):
+        if report:
+            report_path = os.path.join(output, report_name(root, path))
+            with open(report_path, "w") as f:
+                json.dump(report.to_dict(), f, sort_keys=True, indent=2)
+        if callback:
+            callback(path, status, report)
+
+    FolderWatcher(root, on_checked, profile, **kwargs).run()
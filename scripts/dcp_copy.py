@@ -1,54 +1,76 @@
 """
 Implement DCP copy and subsequent check.
 
-Require python 3.8 for shutil.copytree() dirs_exist_ok kwargs.
-Require python 3.2 for concurrent.futures.ThreadPoolExecutor.
+Files are hashed while being copied, the check then reuses these hashes
+instead of reading the whole package again. Progression is recorded in a
+journal next to the destination folder, running the same command again
+after an interruption resume the copy.
 """
 
 import argparse
-import concurrent.futures
+import os
 import time
-import shutil
 import sys
 
 import clairmeta
 from clairmeta import DCP
+from clairmeta.dcp_copy import copy_dcp
 from clairmeta.logger import get_log
-from clairmeta.utils.file import ConsoleProgress, folder_size
+from clairmeta.utils.file import enable_hash_cache, human_size
+
+
+def print_progress(written, total_size, elapsed):
+    speed = (written / 1e6) / max(elapsed, sys.float_info.epsilon)
+    sys.stdout.write(
+        "{:.2f}% - {} / {} ({:.2f} MBytes/s)\r".format(
+            100.0 * written / max(total_size, 1),
+            human_size(written),
+            human_size(total_size),
+            speed,
+        )
+    )
+    sys.stdout.flush()
 
 
 def cli_copy(args):
-    dcp = DCP(args.source)
-    dcp_size = dcp.size
-
     try:
         log = get_log()
         log.info("Copy {} to {}".format(args.source, args.dest))
 
-        start = time.time()
-        progress = ConsoleProgress()
-        progress._total_size = dcp_size
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(
-                shutil.copytree, args.source, args.dest, dirs_exist_ok=args.overwrite
-            )
-
-            while future.running():
-                copy_size = folder_size(args.dest)
-                elapsed = time.time() - start
-                progress(args.source, copy_size, dcp_size, elapsed)
-                time.sleep(1.0)
+        # Hashes computed while copying are reused by the check
+        enable_hash_cache()
 
-            future.result()
+        journal = None
+        if not args.no_journal:
+            journal = args.journal or os.path.normpath(args.dest) + ".journal"
+            if os.path.isfile(journal):
+                log.info("Resume copy from journal {}".format(journal))
 
-        progress(args.source, dcp_size, dcp_size, elapsed)
-        log.info("Total time : {:.2f} sec".format(time.time() - start))
+        start = time.time()
+        status, results = copy_dcp(
+            args.source,
+            args.dest,
+            jobs=args.jobs,
+            verify=args.verify,
+            overwrite=args.overwrite,
+            callback=print_progress if args.progress else None,
+            journal=journal,
+        )
+        if args.progress:
+            sys.stdout.write("\n")
+
+        elapsed = time.time() - start
+        copy_size = sum([r["size"] - r["resumed"] for r in results])
+        log.info(
+            "Total time : {:.2f} sec ({:.2f} MBytes/s)".format(
+                elapsed, (copy_size / 1e6) / max(elapsed, sys.float_info.epsilon)
+            )
+        )
 
-        DCP(args.dest)
-        status, _ = dcp.check(hash_callback=ConsoleProgress())
+        dcp = DCP(args.dest)
+        check_status, _ = dcp.check()
 
-        return status
+        return status and check_status
 
     except Exception as e:
         print(str(e))
@@ -64,6 +86,18 @@ def get_parser():
     parser.add_argument("dest", help="absolute destination copy path")
     parser.add_argument("-progress", action="store_true", help="progress bar")
     parser.add_argument("-overwrite", action="store_true", help="overwrite dst")
+    parser.add_argument(
+        "-verify", action="store_true", help="read back and hash copied files"
+    )
+    parser.add_argument(
+        "-jobs", type=int, default=4, help="number of files copied concurrently"
+    )
+    parser.add_argument(
+        "-journal", default=None, help="checkpoint journal path (default dest.journal)"
+    )
+    parser.add_argument(
+        "-no_journal", action="store_true", help="disable copy checkpoints"
+    )
     parser.set_defaults(func=cli_copy)
 
     return parser
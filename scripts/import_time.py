@@ -0,0 +1,85 @@
+"""
+Measure Clairmeta command line startup time.
+
+Each command is executed in a fresh interpreter several times, the median
+wall clock time is reported. Heavy optional modules that should only be
+imported when actually needed are listed for each import.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = [
+    "cryptography",
+    "lxml",
+    "freetype",
+    "pycountry",
+    "dateutil",
+    "dicttoxml",
+    "xmltodict",
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def heavy_modules(module):
+    code = "import sys, {}; print(' '.join(m for m in {} if m in sys.modules))"
+    res = subprocess.run(
+        [sys.executable, "-c", code.format(module, HEAVY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return res.stdout.strip() or "-"
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="Clairmeta startup benchmark")
+    parser.add_argument("-dcp", default=None, help="package path to probe")
+    parser.add_argument("-runs", type=int, default=20, help="number of runs")
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    env = {"CLAIRMETA_LOG_CONSOLE": "OFF"}
+    os.environ.update(env)
+
+    commands = [
+        ("python", [sys.executable, "-c", "pass"], None),
+        ("import clairmeta", [sys.executable, "-c", "import clairmeta"], "clairmeta"),
+        (
+            "import clairmeta.cli",
+            [sys.executable, "-c", "import clairmeta.cli"],
+            "clairmeta.cli",
+        ),
+        (
+            "import clairmeta.dcp",
+            [sys.executable, "-c", "import clairmeta.dcp"],
+            "clairmeta.dcp",
+        ),
+    ]
+    if args.dcp:
+        probe = ["probe", "-type", "dcp", os.path.abspath(args.dcp), "-format", "json"]
+        commands.append(
+            ("clairmeta probe", [sys.executable, "-m", "clairmeta.cli"] + probe, None)
+        )
+
+    print("{:<24} {:>10}  {}".format("Command", "Time (ms)", "Heavy modules"))
+    for name, cmd, module in commands:
+        elapsed = run(cmd, args.runs)
+        heavy = heavy_modules(module) if module else ""
+        print("{:<24} {:>10.1f}  {}".format(name, elapsed, heavy))
@@ -0,0 +1,98 @@
+"""
+Compare file read modes used for hashing.
+
+Each file is hashed once per read mode, starting with a cold page cache.
+Throughput and the fraction of the file still resident in the page cache
+afterward are reported : the less essence data left in cache, the less
+the hot data of a playback server is evicted.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import mmap
+import os
+import sys
+import time
+
+from clairmeta.utils.file import iter_file_chunks, human_size, read_buffer_size
+from clairmeta.utils.throttle import READ_MODES
+
+
+def drop_cache(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def cached_ratio(path):
+    """Fraction of ``path`` pages resident in the page cache (mincore)."""
+    size = os.path.getsize(path)
+    if not size:
+        return 0.0
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+    vec = (ctypes.c_ubyte * pages)()
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            addr = ctypes.addressof(ctypes.c_char.from_buffer(mm))
+            if libc.mincore(ctypes.c_void_p(addr), ctypes.c_size_t(size), vec):
+                return float("nan")
+            return sum(v & 1 for v in vec) / pages
+        finally:
+            mm.close()
+
+
+def bench(path, mode, buffer_size):
+    drop_cache(path)
+
+    start = time.perf_counter()
+    sha1 = hashlib.sha1()
+    for chunk in iter_file_chunks(path, mode, buffer_size):
+        sha1.update(chunk)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, cached_ratio(path)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="Clairmeta read modes benchmark")
+    parser.add_argument("files", nargs="+", help="files to hash (eg. MXF assets)")
+    parser.add_argument("-runs", type=int, default=3, help="number of runs")
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+
+    print(
+        "{:<32} {:<8} {:>10} {:>10} {:>8}".format(
+            "File", "Mode", "Buffer", "MB/s", "Cached"
+        )
+    )
+    for path in args.files:
+        size = os.path.getsize(path)
+        # Fixed 64 KiB buffer (previous behaviour) then adaptive buffer size
+        adaptive = read_buffer_size(size)
+        configs = [("cached", 64 * 1024)] + [(m, adaptive) for m in READ_MODES]
+
+        for mode, buffer_size in configs:
+            runs = [bench(path, mode, buffer_size) for _ in range(args.runs)]
+            elapsed = min(r[0] for r in runs)
+            ratio = runs[-1][1]
+            print(
+                "{:<32} {:<8} {:>10} {:>10.1f} {:>7.1f}%".format(
+                    os.path.basename(path)[:32],
+                    mode,
+                    human_size(buffer_size),
+                    (size / 1e6) / max(elapsed, sys.float_info.epsilon),
+                    100 * ratio,
+                )
+            )
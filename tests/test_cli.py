@@ -2,6 +2,8 @@
 # See LICENSE for more information
 
 import collections
+import contextlib
+import io
 import platform
 import unittest
 import os
@@ -12,6 +14,7 @@ from xml.etree import ElementTree as ET
 from tests import DCP_MAP
 from clairmeta.logger import disable_log
 from clairmeta.cli import get_parser
+from clairmeta.utils.file import temporary_dir
 
 
 class CliTest(unittest.TestCase):
@@ -94,6 +97,21 @@ class CliTest(unittest.TestCase):
         )
         json.loads(msg, object_pairs_hook=OrderedDict)
 
+    def test_dcp_check_formating_ndjson(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            status, msg = self.launch_command(
+                ["check", self.get_dcp_path(1), "-type", "dcp", "-format", "ndjson"]
+            )
+
+        checks = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertTrue(len(checks) > 0)
+        self.assertTrue(all(["name" in c for c in checks]))
+
+        summary = json.loads(msg)["summary"]
+        self.assertEqual(summary["valid"], status)
+        self.assertEqual(summary["criticality"]["ERROR"], 0)
+
     def test_dcp_check_good(self):
         status, msg = self.launch_command(
             ["check", self.get_dcp_path(1), "-type", "dcp", "-log", "CRITICAL"]
@@ -150,6 +168,30 @@ class CliTest(unittest.TestCase):
         )
         self.assertFalse(status)
 
+    def test_dcp_check_batch(self):
+        dcp_folder = os.path.dirname(self.get_dcp_path(1))
+
+        with temporary_dir() as output:
+            status, msg = self.launch_command(
+                [
+                    "check-batch",
+                    dcp_folder,
+                    "-output",
+                    output,
+                    "-profile",
+                    self.get_file_path("myprofile.json"),
+                    "-jobs",
+                    "2",
+                ]
+            )
+            self.assertFalse(status)
+
+            with open(os.path.join(output, "summary.json")) as f:
+                summary = json.load(f)
+            self.assertGreaterEqual(summary["packages_count"], len(DCP_MAP))
+            for package in summary["packages"]:
+                self.assertTrue(os.path.isfile(package["report"]))
+
     def test_dsm_probe(self):
         status, msg = self.launch_command(
             ["probe", "-type", "dsm", self.get_dsm_path("DSM_PKG/MINI_DSM1")]
@@ -168,6 +210,27 @@ class CliTest(unittest.TestCase):
         )
         self.assertFalse(status)
 
+    def test_scan_manifest(self):
+        # No probe (mediainfo for CRI files) is needed to hash a sequence
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "SCAN")
+            os.makedirs(os.path.join(path, "R1"))
+            for i in range(5):
+                with open(
+                    os.path.join(path, "R1", "scan.{:04d}.cri".format(i)), "wb"
+                ) as f:
+                    f.write(os.urandom(1000))
+
+            manifest = os.path.join(tmp, "SCAN.mhl")
+            status, msg = self.launch_command(
+                ["manifest", "-type", "scan", path, "-output", manifest]
+            )
+            self.assertTrue(status, msg=msg)
+            status, msg = self.launch_command(
+                ["manifest", "-type", "scan", path, "-verify", manifest]
+            )
+            self.assertTrue(status, msg=msg)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,12 +4,18 @@
 import unittest
 import os
 import platform
+import hashlib
+import threading
+from unittest import mock
 from datetime import datetime
+import numpy as np
 
 from tests import DCP_MAP, KDM_MAP, KEY
 from clairmeta.logger import disable_log
 from clairmeta.profile import get_default_profile
 from clairmeta.dcp import DCP
+from clairmeta.dcp_ov import OVResolver
+from clairmeta.exception import CheckException
 
 # ruff: noqa: E501
 
@@ -70,6 +76,36 @@ class DCPCheckTest(CheckerTestBase):
         self.assertTrue(self.check(2, ov_id=1))
         self.assertFalse(self.has_failed(DCPCheckTest.vf_missing))
 
+    def test_ov_resolver(self):
+        resolver = OVResolver()
+        for _ in range(2):
+            status, _ = DCP(self.get_dcp_path(2)).check(
+                ov_path=self.get_dcp_path(1), ov_resolver=resolver
+            )
+            self.assertTrue(status)
+
+        # OV is parsed once and its assets are not probed
+        ov_dcp = resolver.resolve(self.get_dcp_path(1))
+        self.assertIs(ov_dcp, resolver.resolve(self.get_dcp_path(1)))
+        self.assertFalse(ov_dcp._probeb)
+
+    def test_ov_resolver_probe_error(self):
+        resolver = OVResolver()
+        ov_dcp = threading.Event()
+        results = [{"ProbeError": "mediainfo failed"}, {"Probe": {"Duration": 24}}]
+
+        def probe(asset, essence, path, cancel=None):
+            asset.update(results.pop(0))
+
+        with mock.patch("clairmeta.dcp_ov.cpl_probe_asset", side_effect=probe):
+            for expected in ["ProbeError", "Probe", "Probe"]:
+                asset = {"Duration": 24}
+                resolver.probe_asset(ov_dcp, asset, "Picture", "/ov/picture.mxf")
+                self.assertIn(expected, asset)
+
+        # Failed probe is done again, successful one is cached
+        self.assertEqual(results, [])
+
     def test_smpte_ov(self):
         self.assertTrue(self.check(7))
         self.assertTrue(self.check(9))
@@ -107,6 +143,39 @@ class DCPCheckTest(CheckerTestBase):
         self.assertTrue(self.has_failed("check_picture_cpl_max_bitrate"))
         self.assertTrue(self.has_failed("check_picture_cpl_avg_bitrate"))
 
+    def test_over_bitrate_entry_point(self):
+        from clairmeta.dcp_check_picture import Checker
+        from clairmeta.utils.file import temporary_dir
+
+        sizes = np.full(96, 1000000)
+        sizes[[10, 60]] = 2000000
+        asset = {
+            "EntryPoint": 48,
+            "Duration": 24,
+            "AbsolutePath": "picture.mxf",
+            "Probe": {"MaxBitRate": 384.0, "BitRateStats": {}},
+        }
+
+        with temporary_dir() as tmp:
+            checker = Checker(DCP(tmp))
+            with mock.patch(
+                "clairmeta.dcp_check_picture.mxf_edit_unit_sizes",
+                return_value=(sizes, (24, 1)),
+            ), mock.patch.object(checker, "get_picture_max_bitrate", return_value=250):
+                bitrates, _ = checker.get_picture_bitrates(asset)
+                self.assertEqual(len(bitrates), 24)
+                checker.check_picture_cpl_max_bitrate(None, ("Picture", asset))
+
+                # Timecodes are relative to the reel start
+                self.assertEqual(len(checker.errors), 1)
+                self.assertIn("at 00:00:00:12 (1 frame(s))", checker.errors[0].message)
+
+                # Frames outside of the reel are not located
+                asset["EntryPoint"] = 72
+                checker.errors = []
+                checker.check_picture_cpl_max_bitrate(None, ("Picture", asset))
+                self.assertIn("outside of the frames", checker.errors[0].message)
+
     def test_nondci_resolution(self):
         self.assertTrue(self.check(26))
         self.assertTrue(self.has_failed("check_picture_cpl_resolution"))
@@ -214,5 +283,49 @@ class DCPCheckReportTest(CheckerTestBase):
         self.assertTrue(self.report.to_dict())
 
 
+class DCPCheckFailFastTest(CheckerTestBase):
+    def __init__(self, *args, **kwargs):
+        super(DCPCheckFailFastTest, self).__init__(*args, **kwargs)
+        self.profile["fail_fast"] = True
+
+    def test_fail_fast(self):
+        self.assertFalse(self.check(25))
+        self.assertTrue(self.report.aborted)
+        self.assertTrue(self.report.to_dict()["aborted"])
+
+        failed = self.report.checks_failed()
+        self.assertTrue(failed)
+        self.assertEqual(failed[-1].name, "check_picture_cpl_max_bitrate")
+
+    def test_fail_fast_valid(self):
+        self.assertTrue(self.check(1))
+        self.assertFalse(self.report.aborted)
+
+
+class DCPCheckDigestsTest(CheckerTestBase):
+    def __init__(self, *args, **kwargs):
+        super(DCPCheckDigestsTest, self).__init__(*args, **kwargs)
+        self.profile["bypass"] = []
+        self.profile["digests"] = ["md5"]
+
+    def test_digests(self):
+        self.assertTrue(self.check(1))
+
+        digests = self.report.to_dict()["digests"]
+        self.assertTrue(digests)
+        for path, digest in digests.items():
+            self.assertEqual(sorted(digest.keys()), ["md5", "sha1"])
+
+            with open(os.path.join(self.dcp.path, path), "rb") as f:
+                content = f.read()
+            self.assertEqual(digest["md5"], hashlib.md5(content).hexdigest())
+            self.assertEqual(digest["sha1"], hashlib.sha1(content).hexdigest())
+
+    def test_digests_invalid(self):
+        self.profile["digests"] = ["nodigest"]
+        with self.assertRaises(CheckException):
+            self.check(1)
+
+
 if __name__ == "__main__":
     unittest.main()
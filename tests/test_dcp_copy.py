@@ -0,0 +1,224 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import shutil
+import filecmp
+from unittest import mock
+
+from tests import DCP_MAP
+from clairmeta import dcp_copy
+from clairmeta.logger import disable_log
+from clairmeta.dcp_copy import copy_dcp, hash_file_prefix, drop_file_cache
+from clairmeta.exception import ClairMetaException
+from clairmeta.utils.file import (
+    copy_file,
+    shaone_b64,
+    temporary_dir,
+    enable_hash_cache,
+    disable_hash_cache,
+)
+
+
+class CopyTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(CopyTest, self).__init__(*args, **kwargs)
+        disable_log()
+
+    def tearDown(self):
+        disable_hash_cache()
+
+    def get_dcp_path(self, dcp_id):
+        if dcp_id in DCP_MAP:
+            dcp_folder = os.path.join(
+                os.path.dirname(__file__), "resources", "DCP", "ECL-SET"
+            )
+            folder_path = os.path.join(dcp_folder, DCP_MAP[dcp_id])
+            self.assertTrue(os.path.exists(folder_path))
+            return folder_path
+
+    def test_copy_file(self):
+        with temporary_dir() as tmp:
+            src = os.path.join(tmp, "src")
+            dst = os.path.join(tmp, "dst")
+            with open(src, "wb") as f:
+                f.write(os.urandom(3 * 1024 * 1024 + 17))
+
+            progress = []
+            cache = enable_hash_cache()
+            sha1 = copy_file(
+                src, dst, lambda *args: progress.append(args), buffer_size=1024 * 1024
+            )
+
+            self.assertTrue(filecmp.cmp(src, dst, shallow=False))
+            self.assertEqual(sha1, shaone_b64(src, use_cache=False))
+            self.assertEqual(cache.get(dst), sha1)
+            self.assertEqual(progress[-1][1], os.path.getsize(src))
+
+    def test_copy_file_sync(self):
+        with temporary_dir() as tmp:
+            src = os.path.join(tmp, "src")
+            dst = os.path.join(tmp, "dst")
+            with open(src, "wb") as f:
+                f.write(os.urandom(1024))
+
+            # Flushed through the write handle only
+            with mock.patch("os.fsync", wraps=os.fsync) as fsync:
+                copy_file(src, dst, sync=True)
+                drop_file_cache(dst)
+            self.assertEqual(fsync.call_count, 1)
+
+            # Not supported (eg. Windows)
+            with mock.patch.object(dcp_copy.os, "posix_fadvise", create=True):
+                del dcp_copy.os.posix_fadvise
+                drop_file_cache(dst)
+            self.assertTrue(filecmp.cmp(src, dst, shallow=False))
+
+    def test_copy_file_resume(self):
+        with temporary_dir() as tmp:
+            src = os.path.join(tmp, "src")
+            dst = os.path.join(tmp, "dst")
+            with open(src, "wb") as f:
+                f.write(os.urandom(3 * 1024 * 1024 + 17))
+
+            checkpoints = []
+
+            def interrupt(dst, offset, prefix_hash):
+                checkpoints.append((offset, prefix_hash))
+                raise KeyboardInterrupt()
+
+            with self.assertRaises(KeyboardInterrupt):
+                copy_file(
+                    src,
+                    dst,
+                    buffer_size=1024 * 1024,
+                    checkpoint=interrupt,
+                    checkpoint_size=1024 * 1024,
+                )
+
+            offset, prefix_hash = checkpoints[-1]
+            sha1 = hash_file_prefix(dst, offset)
+            self.assertEqual(offset, 1024 * 1024)
+            self.assertEqual(prefix_hash, shaone_b64(dst, use_cache=False))
+
+            sha1 = copy_file(src, dst, offset=offset, sha1=sha1)
+            self.assertTrue(filecmp.cmp(src, dst, shallow=False))
+            self.assertEqual(sha1, shaone_b64(src, use_cache=False))
+
+    def test_copy_dcp_resume(self):
+        source = self.get_dcp_path(11)
+        largest = max(
+            os.listdir(source), key=lambda f: os.path.getsize(os.path.join(source, f))
+        )
+        copy_file_orig = dcp_copy.copy_file
+
+        def copy_file_interrupted(src, dst, *args, **kwargs):
+            checkpoint = kwargs["checkpoint"]
+
+            def interrupt(dst, offset, prefix_hash):
+                checkpoint(dst, offset, prefix_hash)
+                if os.path.basename(dst) == largest:
+                    raise KeyboardInterrupt()
+
+            kwargs["checkpoint"] = interrupt
+            return copy_file_orig(src, dst, *args, **kwargs)
+
+        with temporary_dir() as tmp:
+            dest = os.path.join(tmp, "copy")
+            journal = os.path.join(tmp, "copy.journal")
+            kwargs = {
+                "jobs": 1,
+                "journal": journal,
+                "buffer_size": 4096,
+                "checkpoint_size": 4096,
+            }
+
+            with mock.patch.object(dcp_copy, "copy_file", copy_file_interrupted):
+                with self.assertRaises(KeyboardInterrupt):
+                    copy_dcp(source, dest, **kwargs)
+            self.assertTrue(os.path.isfile(journal))
+
+            # Largest file copied first, interrupted after one checkpoint
+            cache = enable_hash_cache()
+            status, results = copy_dcp(source, dest, **kwargs)
+            self.assertTrue(status)
+            self.assertFalse(os.path.isfile(journal))
+            resumed = {r["path"]: r["resumed"] for r in results}
+            self.assertEqual(resumed[largest], 4096)
+
+            for r in results:
+                self.assertTrue(
+                    filecmp.cmp(
+                        os.path.join(source, r["path"]),
+                        os.path.join(dest, r["path"]),
+                        shallow=False,
+                    )
+                )
+                self.assertEqual(cache.get(os.path.join(dest, r["path"])), r["hash"])
+
+    def test_copy_dcp_skip_done(self):
+        with temporary_dir() as tmp:
+            source = os.path.join(tmp, "source")
+            shutil.copytree(self.get_dcp_path(11), source)
+
+            mxf = [f for f in os.listdir(source) if f.endswith(".mxf")][0]
+            with open(os.path.join(source, mxf), "ab") as f:
+                f.write(b"\0")
+
+            dest = os.path.join(tmp, "copy")
+            journal = os.path.join(tmp, "copy.journal")
+            status, _ = copy_dcp(source, dest, journal=journal)
+            self.assertFalse(status)
+            self.assertTrue(os.path.isfile(journal))
+
+            # Only the invalid file is copied again
+            status, results = copy_dcp(source, dest, journal=journal)
+            self.assertFalse(status)
+            for r in results:
+                if r["path"] == mxf:
+                    self.assertEqual(r["resumed"], 0)
+                else:
+                    self.assertEqual(r["resumed"], r["size"])
+
+    def test_copy_dcp(self):
+        source = self.get_dcp_path(11)
+
+        with temporary_dir() as tmp:
+            dest = os.path.join(tmp, "copy")
+            status, results = copy_dcp(source, dest, jobs=2, verify=True)
+
+            self.assertTrue(status)
+            self.assertEqual(len(results), len(os.listdir(source)))
+            self.assertTrue(any([r["expected_hash"] for r in results]))
+            self.assertTrue(all([r["verified"] for r in results]))
+            for r in results:
+                self.assertTrue(
+                    filecmp.cmp(
+                        os.path.join(source, r["path"]),
+                        os.path.join(dest, r["path"]),
+                        shallow=False,
+                    )
+                )
+
+            with self.assertRaises(ClairMetaException):
+                copy_dcp(source, dest)
+
+    def test_copy_dcp_corrupted(self):
+        with temporary_dir() as tmp:
+            source = os.path.join(tmp, "source")
+            shutil.copytree(self.get_dcp_path(11), source)
+
+            mxf = [f for f in os.listdir(source) if f.endswith(".mxf")][0]
+            with open(os.path.join(source, mxf), "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b"\0" if f.read(1) != b"\0" else b"\1")
+
+            status, results = copy_dcp(source, os.path.join(tmp, "copy"))
+            self.assertFalse(status)
+            invalid = [r["path"] for r in results if not r["valid"]]
+            self.assertEqual(invalid, [mxf])
+
+
+if __name__ == "__main__":
+    unittest.main()
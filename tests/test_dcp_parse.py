@@ -3,10 +3,20 @@
 
 import unittest
 import os
+import json
+from unittest import mock
 
 from tests import DCP_MAP
 from clairmeta.logger import disable_log
 from clairmeta.dcp import DCP
+from clairmeta.exception import SnapshotException
+from clairmeta.utils.file import temporary_dir
+from clairmeta.dcp_utils import (
+    get_reel_for_asset,
+    get_type_for_asset,
+    get_first_reel_for_asset_type,
+    get_contentkey_for_asset,
+)
 
 
 class ParserTestBase(unittest.TestCase):
@@ -205,3 +215,92 @@ class DCPParseTest(ParserTestBase):
 
             cpl = res["cpl_list"][0]["Info"]["CompositionPlaylist"]
             self.assertTrue(cpl["HighFrameRate"])
+
+    def test_package_model(self):
+        for dcp_id in [1, 2, 7, 30]:
+            res = self.parse(dcp_id)
+            package = self.dcp.package
+            self.assertEqual(json.dumps(package.to_dict()), json.dumps(res))
+            self.assertIs(self.dcp.package, package)
+
+            # Metadata dictionary is built back from the compact model
+            self.assertIs(self.dcp.compact(), package)
+            self.assertIsNone(self.dcp._metadata)
+            self.assertEqual(json.dumps(self.dcp.metadata), json.dumps(res))
+
+    def test_contentkey_lazy_kdm(self):
+        key_id = "2f1b5b5e-1c6b-4d39-8f2a-7c0a1d8e9b21"
+        kdm = {"Info": {"KDM": {"Keys": {key_id: {"ContentKey": "00ff"}}}}}
+
+        with temporary_dir() as tmp:
+            dcp = DCP(tmp, kdm=os.path.join(tmp, "kdm.xml"))
+            asset = {"Id": "asset", "KeyId": key_id}
+            with mock.patch("clairmeta.dcp.kdm_parse", return_value=kdm):
+                self.assertEqual(get_contentkey_for_asset(dcp, asset), "00ff")
+            self.assertIn("kdm", dcp._initialized)
+
+    def test_lazy_parse(self):
+        dcp = DCP(self.get_dcp_path(7))
+        self.assertEqual(len(dcp.list_cpl), 1)
+        self.assertEqual(dcp._initialized, {"files", "assetmap", "cpl"})
+        self.assertIsNone(dcp._size)
+
+        # PKL parsed later is still linked to the CPL
+        cpl_node = dcp.list_cpl[0]["Info"]["CompositionPlaylist"]
+        self.assertNotIn("PKLId", cpl_node)
+        self.assertEqual(len(dcp.list_pkl), 1)
+        self.assertIn("PKLId", cpl_node)
+
+        self.parse(7)
+        self.assertEqual(
+            json.dumps(dcp.parse(), sort_keys=True),
+            json.dumps(self.dcp.metadata, sort_keys=True),
+        )
+
+    def test_metadata_cache(self):
+        metadata = self.parse(7)
+        self.assertIs(self.dcp.metadata, metadata)
+        self.assertNotIn("__xmlns__", json.dumps(metadata))
+
+        self.dcp.check()
+        self.assertIsNot(self.dcp.metadata, metadata)
+        self.assertEqual(self.dcp.metadata, metadata)
+
+    def test_snapshot(self):
+        self.parse(7)
+        with temporary_dir() as tmp:
+            snapshot = os.path.join(tmp, "snapshot.json")
+            self.dcp.save_snapshot(snapshot)
+
+            dcp = DCP.load_snapshot(self.dcp.path, snapshot)
+            self.assertTrue(dcp._probeb)
+            self.assertEqual(
+                json.dumps(dcp.parse(), sort_keys=True),
+                json.dumps(self.dcp.metadata, sort_keys=True),
+            )
+
+            with self.assertRaises(SnapshotException):
+                DCP.load_snapshot(self.get_dcp_path(1), snapshot)
+
+    def test_uuid_index(self):
+        self.parse(7)
+        index = self.dcp.uuid_index
+
+        cpl = self.dcp.list_cpl[0]
+        cpl_node = cpl["Info"]["CompositionPlaylist"]
+        self.assertTrue(index.in_assetmap(cpl_node["Id"]))
+        self.assertEqual(len(index.pkl_for_asset(cpl_node["Id"])), 1)
+
+        for reel in cpl_node["ReelList"]:
+            for asset_type, asset in reel["Assets"].items():
+                self.assertEqual(
+                    get_reel_for_asset(cpl, asset["Id"], index)["Id"],
+                    get_reel_for_asset(cpl, asset["Id"])["Id"],
+                )
+                self.assertEqual(
+                    get_type_for_asset(cpl, asset["Id"], index), asset_type
+                )
+        self.assertEqual(
+            get_first_reel_for_asset_type(cpl, "Picture", index),
+            cpl_node["ReelList"][0],
+        )
@@ -0,0 +1,148 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import mmap
+import base64
+import hashlib
+import threading
+
+from clairmeta.exception import CheckAbortedException
+from clairmeta.utils.throttle import configure_io, READ_MODES
+from clairmeta.utils.file import (
+    iter_file_chunks,
+    read_buffer_size,
+    shaone_b64,
+    file_digests,
+    write_digest_manifest,
+    temporary_dir,
+    enable_hash_cache,
+    disable_hash_cache,
+)
+
+
+class FileUtilsTest(unittest.TestCase):
+    def tearDown(self):
+        configure_io(None)
+        disable_hash_cache()
+
+    def write_file(self, folder, size):
+        path = os.path.join(folder, "file")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    def test_read_modes(self):
+        with temporary_dir() as tmp:
+            path = self.write_file(tmp, 3 * 1024 * 1024 + 17)
+            with open(path, "rb") as f:
+                content = f.read()
+
+            for mode in READ_MODES:
+                chunks = [bytes(c) for c in iter_file_chunks(path, mode, 1024 * 1024)]
+                self.assertEqual(b"".join(chunks), content, msg=mode)
+                self.assertEqual(len(chunks), 4, msg=mode)
+
+    def test_hash_read_modes(self):
+        with temporary_dir() as tmp:
+            path = self.write_file(tmp, 1024 * 1024 + 17)
+            hashes = []
+            for mode in READ_MODES:
+                configure_io({"read_mode": mode})
+                hashes.append(shaone_b64(path))
+            self.assertEqual(len(set(hashes)), 1)
+
+        with self.assertRaises(ValueError):
+            configure_io({"read_mode": "mmap"})
+
+    def test_hash_binary(self):
+        # Line endings and Ctrl-Z must not be translated (Windows text mode)
+        content = b"line\r\nend\x1a" * 1000 + b"\n\r\x1atail"
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "file")
+            with open(path, "wb") as f:
+                f.write(content)
+
+            for mode in READ_MODES:
+                configure_io({"read_mode": mode})
+                self.assertEqual(
+                    file_digests(path, ["sha1"], use_cache=False)["sha1"],
+                    hashlib.sha1(content).hexdigest(),
+                    msg=mode,
+                )
+
+    def test_hash_cancel(self):
+        with temporary_dir() as tmp:
+            path = self.write_file(tmp, 1024)
+            cancel = threading.Event()
+            cancel.set()
+            with self.assertRaises(CheckAbortedException):
+                shaone_b64(path, cancel=cancel)
+
+    def test_file_digests(self):
+        with temporary_dir() as tmp:
+            path = self.write_file(tmp, 1024 * 1024 + 17)
+            with open(path, "rb") as f:
+                content = f.read()
+
+            digests = file_digests(path, ["sha1", "md5", "sha256"])
+            for algorithm, digest in digests.items():
+                expected = hashlib.new(algorithm, content).hexdigest()
+                self.assertEqual(digest, expected)
+
+            with self.assertRaises(ValueError):
+                file_digests(path, ["nodigest"])
+
+    def test_file_digests_xxhash(self):
+        try:
+            import xxhash
+        except ImportError:
+            self.skipTest("Requires xxhash package")
+
+        with temporary_dir() as tmp:
+            path = self.write_file(tmp, 1024)
+            with open(path, "rb") as f:
+                content = f.read()
+
+            digests = file_digests(path, ["sha1", "xxh64"])
+            self.assertEqual(digests["xxh64"], xxhash.xxh64(content).hexdigest())
+
+    def test_file_digests_cache(self):
+        with temporary_dir() as tmp:
+            path = self.write_file(tmp, 1024)
+            cache = enable_hash_cache()
+
+            digests = file_digests(path, ["sha1", "md5"])
+            self.assertEqual(cache.stats()["entries"], 2)
+
+            # sha1 is shared with shaone_b64
+            hits = cache.stats()["hits"]
+            sha1 = shaone_b64(path)
+            self.assertEqual(cache.stats()["hits"], hits + 1)
+            self.assertEqual(base64.b64decode(sha1).hex(), digests["sha1"])
+            self.assertEqual(file_digests(path, ["md5", "sha1"]), digests)
+
+    def test_write_digest_manifest(self):
+        with temporary_dir() as tmp:
+            manifest = os.path.join(tmp, "manifest.md5")
+            digests = {
+                "b.mxf": {"sha1": "5678", "md5": "1234"},
+                "a.xml": {"sha1": "abcd", "md5": "ef01"},
+            }
+            write_digest_manifest(manifest, digests, "md5")
+
+            with open(manifest) as f:
+                self.assertEqual(f.read(), "ef01  a.xml\n1234  b.mxf\n")
+
+    def test_read_buffer_size(self):
+        sizes = [read_buffer_size(2**i) for i in range(0, 40)]
+        self.assertEqual(sizes, sorted(sizes))
+        self.assertEqual(sizes[0], 64 * 1024)
+        self.assertEqual(sizes[-1], 8 * 1024 * 1024)
+        for size in sizes:
+            self.assertEqual(size % mmap.PAGESIZE, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import struct
+from unittest import mock
+
+from clairmeta import Sequence
+from clairmeta.exception import ImageException
+from clairmeta.logger import disable_log
+from clairmeta.settings import SEQUENCE_SETTINGS
+from clairmeta.utils.file import temporary_dir
+from clairmeta.utils.image import probe_image, probe_image_sequence
+
+
+def dpx(width=2048, height=1080, descriptor=50, bitdepth=10, endian=">"):
+    magic = b"SDPX" if endian == ">" else b"XPDS"
+    header = magic + bytes(764) + struct.pack(endian + "HHII", 0, 1, width, height)
+    header += bytes(20) + bytes([descriptor, 0, 0, bitdepth])
+    return header + bytes(2048 - len(header))
+
+
+def tiff(width=1998, height=1080, bitdepth=16, photometric=2, bigtiff=False):
+    """Build a little endian (Big)TIFF, BitsPerSample fits in a BigTIFF entry."""
+    entries = [
+        (256, 4, 1, width),
+        (257, 4, 1, height),
+        (258, 3, 3, None),
+        (262, 3, 1, photometric),
+        (277, 3, 1, 3),
+    ]
+    if bigtiff:
+        header_fmt, count_fmt, entry_fmt = "<2sHHHQ", "<Q", "<HHQQ"
+        header_size = struct.calcsize(header_fmt)
+    else:
+        header_fmt, count_fmt, entry_fmt = "<2sHI", "<H", "<HHII"
+        header_size = struct.calcsize(header_fmt)
+
+    ifd_size = struct.calcsize(count_fmt) + len(entries) * struct.calcsize(entry_fmt)
+    bits_offset = header_size + ifd_size + 8
+
+    if bigtiff:
+        data = struct.pack(header_fmt, b"II", 43, 8, 0, header_size)
+    else:
+        data = struct.pack(header_fmt, b"II", 42, header_size)
+    data += struct.pack(count_fmt, len(entries))
+    for tag, field_type, count, value in entries:
+        if value is None and bigtiff:
+            bits = struct.pack("<HHHH", bitdepth, bitdepth, bitdepth, 0)
+            value = struct.unpack("<Q", bits)[0]
+        elif value is None:
+            value = bits_offset
+        elif field_type == 3:
+            # Left justified in the value field
+            value = struct.unpack("<I", struct.pack("<HH", value, 0))[0]
+        data += struct.pack(entry_fmt, tag, field_type, count, value)
+    data += bytes(8) + struct.pack("<HHH", bitdepth, bitdepth, bitdepth)
+    return data + bytes(1000)
+
+
+def exr(width=1920, height=1080, channels="BGR", pixel_type=1):
+    def attribute(name, attr_type, value):
+        header = name.encode() + b"\0" + attr_type.encode() + b"\0"
+        return header + struct.pack("<i", len(value)) + value
+
+    chlist = b"".join(
+        c.encode() + b"\0" + struct.pack("<iB3xii", pixel_type, 0, 1, 1)
+        for c in channels
+    )
+    data = b"\x76\x2f\x31\x01" + struct.pack("<I", 2)
+    data += attribute("channels", "chlist", chlist + b"\0")
+    data += attribute("compression", "compression", b"\0")
+    data += attribute(
+        "dataWindow", "box2i", struct.pack("<iiii", 0, 0, width - 1, height - 1)
+    )
+    return data + b"\0" + bytes(1000)
+
+
+class ImageTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(ImageTest, self).__init__(*args, **kwargs)
+        disable_log()
+
+    def probe(self, data):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "image")
+            with open(path, "wb") as f:
+                f.write(data)
+            return probe_image(path)["Probe"]
+
+    def test_probe_dpx(self):
+        expected = {
+            "Format": "DPX",
+            "ProbeImage": {
+                "Format": "DPX",
+                "Width": "2048",
+                "Height": "1080",
+                "ColorSpace": "RGB",
+                "BitDepth": "10",
+            },
+        }
+        self.assertEqual(self.probe(dpx()), expected)
+        self.assertEqual(self.probe(dpx(endian="<")), expected)
+        image = self.probe(dpx(descriptor=6))["ProbeImage"]
+        self.assertEqual(image["ColorSpace"], "Y")
+
+        with self.assertRaises(ImageException):
+            self.probe(dpx()[:500])
+
+    def test_probe_tiff(self):
+        for bigtiff in [False, True]:
+            image = self.probe(tiff(bigtiff=bigtiff))["ProbeImage"]
+            self.assertEqual(image["Format"], "TIFF")
+            self.assertEqual((image["Width"], image["Height"]), ("1998", "1080"))
+            self.assertEqual(image["ColorSpace"], "RGB")
+            self.assertEqual(image["BitDepth"], "16")
+
+        with self.assertRaises(ImageException):
+            self.probe(tiff()[:20])
+
+    def test_probe_exr(self):
+        image = self.probe(exr())["ProbeImage"]
+        self.assertEqual(image["Format"], "EXR")
+        self.assertEqual((image["Width"], image["Height"]), ("1920", "1080"))
+        self.assertEqual(image["ColorSpace"], "RGB")
+        self.assertEqual(image["BitDepth"], "16")
+
+        image = self.probe(exr(channels="ABGR", pixel_type=2))["ProbeImage"]
+        self.assertEqual((image["ColorSpace"], image["BitDepth"]), ("RGBA", "32"))
+
+        with self.assertRaises(ImageException):
+            self.probe(exr()[:40])
+        with self.assertRaises(ImageException):
+            self.probe(os.urandom(100))
+
+    def make_sequence(self, path, frames, changed=None):
+        os.makedirs(path)
+        for i in range(frames):
+            data = tiff(bitdepth=8) if i == changed else tiff()
+            with open(os.path.join(path, "dcdm.{:06d}.tiff".format(i)), "wb") as f:
+                f.write(data)
+
+    def test_probe_sequence(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "R1")
+            self.make_sequence(path, 100, changed=50)
+            paths = [os.path.join(path, f) for f in sorted(os.listdir(path))]
+
+            probe, errors = probe_image_sequence(paths, samples=3)
+            self.assertEqual(probe["ProbeImage"]["BitDepth"], "16")
+            self.assertEqual(
+                errors,
+                [
+                    "dcdm.000050.tiff : header difference, BitDepth got 8 but "
+                    "expected 16"
+                ],
+            )
+            self.assertEqual(probe_image_sequence(paths, samples=2)[1], [])
+
+    def test_check_sequence(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DCDM")
+            self.make_sequence(os.path.join(path, "R1"), 20)
+            seq = Sequence(path)
+            self.assertTrue(seq.check(SEQUENCE_SETTINGS["DCDM"]))
+            self.assertEqual(seq.parse()["DCDM/R1"]["dcdm"]["Count"], 20)
+
+            path = os.path.join(tmp, "DCDM_BAD")
+            self.make_sequence(os.path.join(path, "R1"), 20, changed=19)
+            with self.assertRaises(ValueError) as cm:
+                Sequence(path).check(SEQUENCE_SETTINGS["DCDM"])
+            self.assertIn("DCDM_BAD/R1 - dcdm.000019.tiff", str(cm.exception))
+
+    def test_check_sequence_errors(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DCDM")
+            for reel in ["R1", "R2"]:
+                self.make_sequence(os.path.join(path, reel), 20, changed=19)
+            os.remove(os.path.join(path, "R2", "dcdm.000010.tiff"))
+
+            # Errors of all folders and sequences are reported together
+            with self.assertRaises(ValueError) as cm:
+                Sequence(path).check(SEQUENCE_SETTINGS["DCDM"])
+            errors = str(cm.exception).split("\n")
+            self.assertTrue(any(e.startswith("DCDM/R2 - ") for e in errors[:-2]))
+            self.assertEqual(
+                errors[-2:],
+                [
+                    "DCDM/R1 - dcdm.000019.tiff : header difference, BitDepth got "
+                    "8 but expected 16",
+                    "DCDM/R2 - dcdm.000019.tiff : header difference, BitDepth got "
+                    "8 but expected 16",
+                ],
+            )
+
+            with mock.patch.dict(SEQUENCE_SETTINGS["ALL"], max_errors=1):
+                with self.assertRaises(ValueError) as cm:
+                    Sequence(path).check(SEQUENCE_SETTINGS["DCDM"])
+            self.assertEqual(str(cm.exception).split("\n")[-1], "1 more error(s)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import subprocess
+import sys
+
+from clairmeta.utils.probe import find_command, get_capabilities, PROBE_DEPS
+
+
+# Modules that must only be imported when the relevant checker or probe runs
+HEAVY_MODULES = [
+    "cryptography",
+    "lxml",
+    "freetype",
+    "pycountry",
+    "dicttoxml",
+    "numpy",
+]
+
+
+class ImportTest(unittest.TestCase):
+    def loaded_modules(self, code):
+        code = "import sys; {}; print(' '.join(sys.modules))".format(code)
+        res = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True,
+            text=True,
+            env=dict(os.environ, CLAIRMETA_LOG_CONSOLE="OFF"),
+        )
+        self.assertEqual(res.returncode, 0, msg=res.stderr)
+        return res.stdout.split()
+
+    def assert_lazy(self, code):
+        modules = self.loaded_modules(code)
+        for heavy in HEAVY_MODULES:
+            self.assertNotIn(heavy, modules, msg="{} imported".format(heavy))
+
+    def test_import_package(self):
+        self.assert_lazy("import clairmeta")
+
+    def test_import_cli(self):
+        self.assert_lazy("import clairmeta.cli")
+
+    def test_import_dcp(self):
+        self.assert_lazy("from clairmeta import DCP, Sequence")
+
+    def test_capabilities(self):
+        capabilities = get_capabilities()
+        self.assertEqual(sorted(capabilities.keys()), sorted(PROBE_DEPS))
+
+        hits = find_command.cache_info().hits
+        get_capabilities()
+        self.assertEqual(find_command.cache_info().hits, hits + len(PROBE_DEPS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import struct
+
+from clairmeta.exception import J2KException
+from clairmeta.utils.file import temporary_dir
+from clairmeta.utils.j2k import (
+    parse_codestream_header,
+    sample_codestreams,
+    dci_profile_errors,
+)
+from tests.test_mxf import make_mxf
+
+
+def marker(code, segment):
+    return struct.pack(">HH", code, len(segment) + 2) + segment
+
+
+def codestream(width=2048, height=1080, levels=5, tile_parts=3, order=4, poc=b""):
+    """Build a JPEG 2000 codestream main header and first tile-part."""
+    rsiz = 3 if width <= 2048 else 4
+    siz = struct.pack(">HIIIIIIIIH", rsiz, width, height, 0, 0, width, height, 0, 0, 3)
+    siz += bytes([11, 1, 1]) * 3
+    cod = struct.pack(">BBHBBBBBB", 1, order, 1, 1, levels, 3, 3, 0, 0)
+    cod += bytes([0x77] + [0x88] * levels)
+    qcd = bytes([0x22]) + bytes(2 * (3 * levels + 1))
+    tlm = bytes([0, 0x50]) + struct.pack(">BI", 0, 1000) * tile_parts
+    sot = struct.pack(">HIBB", 0, 1000, 0, tile_parts)
+
+    data = b"\xff\x4f"
+    data += marker(0xFF51, siz) + marker(0xFF52, cod) + marker(0xFF5C, qcd)
+    if poc:
+        data += marker(0xFF5F, poc)
+    data += marker(0xFF55, tlm) + marker(0xFF90, sot) + b"\xff\x93"
+    return data + os.urandom(1000)
+
+
+class J2KTest(unittest.TestCase):
+    def test_parse(self):
+        header = parse_codestream_header(codestream())
+        self.assertEqual(header["SIZ"]["Xsiz"], 2048)
+        self.assertEqual(header["SIZ"]["Components"][0]["Precision"], 12)
+        self.assertEqual(header["COD"]["DecompositionLevels"], 5)
+        self.assertEqual(header["COD"]["ProgressionOrder"], "CPRL")
+        self.assertEqual(header["COD"]["CodeBlockWidth"], 32)
+        self.assertEqual(header["COD"]["Precincts"][:2], [(128, 128), (256, 256)])
+        self.assertEqual(header["QCD"]["GuardBits"], 1)
+        self.assertEqual(header["TileParts"], 3)
+
+        with self.assertRaises(J2KException):
+            parse_codestream_header(codestream()[:100])
+        with self.assertRaises(J2KException):
+            parse_codestream_header(os.urandom(100))
+
+    def test_dci_profile(self):
+        header = parse_codestream_header(codestream())
+        self.assertEqual(dci_profile_errors(header, "2K", 5), [])
+
+        header = parse_codestream_header(codestream(levels=4, order=0))
+        errors = dci_profile_errors(header, "2K", 5)
+        self.assertEqual(len(errors), 2)
+        self.assertIn("Progression order is LRCP", errors[1])
+
+        poc = struct.pack(">BBHBBB", 0, 0, 1, 6, 3, 4)
+        poc += struct.pack(">BBHBBB", 6, 0, 1, 7, 3, 4)
+        header = parse_codestream_header(
+            codestream(4096, 2160, levels=6, tile_parts=6, poc=poc)
+        )
+        self.assertEqual(dci_profile_errors(header, "4K", 6), [])
+
+        header = parse_codestream_header(codestream(4096, 2160, 6, 6))
+        errors = dci_profile_errors(header, "4K", 6)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("Progression order change", errors[0])
+
+    def test_sample_codestreams(self):
+        frames = [codestream() for _ in range(50)]
+        frames[20] = codestream(levels=4)
+        content, _ = make_mxf(frames)
+
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "picture.mxf")
+            with open(path, "wb") as f:
+                f.write(content)
+
+            headers = sample_codestreams(path, samples=3)
+            self.assertEqual(sorted(headers.keys()), [0, 12, 24, 37, 49])
+            for header in headers.values():
+                self.assertEqual(dci_profile_errors(header, "2K", 5), [])
+
+            headers = sample_codestreams(path, samples=48)
+            self.assertEqual(len(headers), 50)
+            self.assertEqual(headers[20]["COD"]["DecompositionLevels"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
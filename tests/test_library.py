@@ -0,0 +1,91 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import uuid
+
+from tests import DCP_MAP
+from clairmeta.dcp import DCP
+from clairmeta.library import LibraryIndex
+from clairmeta.logger import disable_log
+from clairmeta.utils.file import temporary_dir
+
+
+ASSETMAP = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<AssetMap xmlns="http://www.smpte-ra.org/schemas/429-9/2007/AM">
+  <Id>urn:uuid:{id}</Id>
+  <VolumeCount>1</VolumeCount>
+  <AssetList>{assets}</AssetList>
+</AssetMap>
+"""
+
+ASSET = """<Asset><Id>urn:uuid:{id}</Id><ChunkList><Chunk><Path>{path}</Path>
+<Length>{size}</Length></Chunk></ChunkList></Asset>"""
+
+
+def make_package(path, uuids):
+    os.makedirs(path)
+    assets = "".join(
+        ASSET.format(id=u, path="{}.mxf".format(i), size=1000 + i)
+        for i, u in enumerate(uuids)
+    )
+    with open(os.path.join(path, "ASSETMAP.xml"), "w") as f:
+        f.write(ASSETMAP.format(id=uuid.uuid4(), assets=assets))
+
+
+class LibraryIndexTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(LibraryIndexTest, self).__init__(*args, **kwargs)
+        disable_log()
+
+    def test_scan(self):
+        uuids = [str(uuid.uuid4()) for _ in range(3)]
+
+        with temporary_dir() as tmp:
+            root = os.path.join(tmp, "library")
+            make_package(os.path.join(root, "A", "DCP_1"), uuids[:2])
+            make_package(os.path.join(root, "DCP_2"), uuids[1:])
+
+            index = LibraryIndex(os.path.join(tmp, "index.db"))
+            index.add_root(root)
+            self.assertEqual(index.roots, [root])
+            self.assertEqual(index.scan(), {"packages": 2, "indexed": 2, "removed": 0})
+            self.assertEqual(index.scan(), {"packages": 2, "indexed": 0, "removed": 0})
+
+            found = index.find_assets(uuids + ["unknown"])
+            self.assertEqual(sorted(found), sorted(uuids))
+            self.assertEqual(len(found[uuids[1]]), 2)
+            self.assertEqual(
+                found[uuids[0]],
+                [
+                    {
+                        "package": os.path.join(root, "A", "DCP_1"),
+                        "path": "0.mxf",
+                        "size": 1000,
+                    }
+                ],
+            )
+
+            os.rename(os.path.join(root, "DCP_2"), os.path.join(tmp, "DCP_2"))
+            self.assertEqual(index.scan(), {"packages": 1, "indexed": 0, "removed": 1})
+            self.assertNotIn(uuids[2], index.find_assets(uuids))
+
+    def test_find_ov(self):
+        dcp_folder = os.path.join(
+            os.path.dirname(__file__), "resources", "DCP", "ECL-SET"
+        )
+        self.assertTrue(os.path.exists(dcp_folder))
+
+        with temporary_dir() as tmp:
+            index = LibraryIndex(os.path.join(tmp, "index.db"))
+            index.scan([dcp_folder])
+
+            dcp = DCP(os.path.join(dcp_folder, DCP_MAP[2]))
+            self.assertEqual(index.find_ov(dcp), os.path.join(dcp_folder, DCP_MAP[1]))
+            dcp = DCP(os.path.join(dcp_folder, DCP_MAP[1]))
+            self.assertIsNone(index.find_ov(dcp))
+
+
+if __name__ == "__main__":
+    unittest.main()
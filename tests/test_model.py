@@ -0,0 +1,125 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import json
+
+from clairmeta.model import Package, EssenceType, PackageType, Schema
+
+
+UUID_PICTURE = "4a3a4e4c-27bb-4d0c-8ab3-4a05d0c6ec3e"
+UUID_CPL = "1a2fd2ad-b4c1-4ba9-9b0f-2f4f1a0a9e81"
+
+
+def reel_asset(essence):
+    return {
+        "Id": UUID_PICTURE,
+        "EditRate": 24.0,
+        "IntrinsicDuration": 240,
+        "EntryPoint": 0,
+        "Duration": 240,
+        "Schema": "SMPTE",
+        "Encrypted": False,
+        "EssenceType": essence,
+        "Path": "picture.mxf",
+        "AbsolutePath": "/dcp/picture.mxf",
+        "Probe": {
+            "EditRate": 24.0,
+            "Resolution": "2048x858",
+            "EncryptedEssence": False,
+            "BitRateStats": {"MaxBitRate": 120.5, "PercentileBitRate": {"P50": 90}},
+        },
+    }
+
+
+METADATA = {
+    "asset_list": {UUID_PICTURE: "picture.mxf", UUID_CPL: "cpl.xml"},
+    "volindex_list": [],
+    "assetmap_list": [
+        {
+            "FileName": "ASSETMAP.xml",
+            "FilePath": "/dcp/ASSETMAP.xml",
+            "Info": {
+                "AssetMap": {
+                    "Id": "0d7e5f04-5b4f-4e17-a53b-b3a4aa0f19a1",
+                    "AssetList": {
+                        "Asset": [
+                            {
+                                "Id": UUID_PICTURE,
+                                "ChunkList": {"Chunk": {"Path": "picture.mxf"}},
+                            }
+                        ]
+                    },
+                    "Schema": "SMPTE",
+                }
+            },
+        }
+    ],
+    "cpl_list": [
+        {
+            "FileName": "cpl.xml",
+            "FilePath": "/dcp/cpl.xml",
+            "Info": {
+                "CompositionPlaylist": {
+                    "Id": UUID_CPL,
+                    "ContentTitleText": "TST_FTR_F_EN-XX_51_2K_20240101_SMPTE_OV",
+                    "ReelList": [
+                        {
+                            "Position": 1,
+                            "Id": "3f6c2d8b-3a6e-4d8e-9a39-4d6bb1d9d6a2",
+                            "AnnotationText": "",
+                            "Assets": {"Picture": reel_asset("Picture")},
+                        }
+                    ],
+                    "Schema": "SMPTE",
+                }
+            },
+            "CPLType": "OV",
+        }
+    ],
+    "pkl_list": [],
+    "kdm_list": [],
+    "package_type": "OV",
+    "path": "/dcp",
+    "path_naming_convention": {},
+    "size": "1.00 GB",
+    "size_bytes": 1000000000,
+    "count_file": 2,
+    "schema": "SMPTE",
+    "type": "DCP",
+}
+
+
+class ModelTest(unittest.TestCase):
+    def test_round_trip(self):
+        package = Package.from_dict(METADATA)
+        self.assertEqual(
+            json.dumps(package.to_dict()), json.dumps(METADATA), "Export differs"
+        )
+
+    def test_typed_fields(self):
+        package = Package.from_dict(METADATA)
+        self.assertEqual(package.package_type, PackageType.OV)
+        self.assertEqual(package.schema, Schema.SMPTE)
+
+        cpl = package.cpls[0].node
+        self.assertEqual(cpl.id, UUID_CPL)
+        essence, asset = cpl.reels[0].assets[0]
+        self.assertEqual(essence, EssenceType.PICTURE)
+        self.assertEqual(asset.probe.resolution, "2048x858")
+        self.assertEqual(asset["IntrinsicDuration"], 240)
+        self.assertEqual(
+            package.assetmaps[0].node.asset_list.assets[0].path, "picture.mxf"
+        )
+
+    def test_shared_values(self):
+        a = Package.from_dict(json.loads(json.dumps(METADATA)))
+        b = Package.from_dict(json.loads(json.dumps(METADATA)))
+        asset_a = a.cpls[0].node.reels[0].assets[0][1]
+        asset_b = b.cpls[0].node.reels[0].assets[0][1]
+        self.assertIs(asset_a.id, asset_b.id)
+        self.assertIs(asset_a._keys, asset_b._keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
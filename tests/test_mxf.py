@@ -0,0 +1,228 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import struct
+import numpy as np
+
+from clairmeta.exception import MXFException
+from clairmeta.utils.file import temporary_dir
+from clairmeta.utils.mxf import (
+    MXFFile,
+    PARTITION_UL,
+    RIP_UL,
+    INDEX_SEGMENT_UL,
+    FILL_UL,
+    ENCRYPTED_TRIPLET_UL,
+    decode_ber_length,
+    scan_mxf,
+    mxf_edit_unit_sizes,
+    bitrate_stats,
+    bitrate_violations,
+)
+
+
+PICTURE_UL = bytes.fromhex("060e2b34010201010d01030115010801")
+
+
+def klv(key, value):
+    return key + b"\x83" + len(value).to_bytes(3, "big") + value
+
+
+def partition_pack(kind, this, previous, footer, header_count, index_count, sids):
+    index_sid, body_sid = sids
+    key = PARTITION_UL[:13] + bytes([kind, 0x04, 0x00])
+    value = struct.pack(
+        ">HHIQQQQQIQI",
+        1,
+        3,
+        1,
+        this,
+        previous,
+        footer,
+        header_count,
+        index_count,
+        index_sid,
+        0,
+        body_sid,
+    )
+    value += bytes(16) + struct.pack(">II", 0, 16)
+    return klv(key, value)
+
+
+def index_segment(offsets, duration, edit_unit_byte_count=0):
+    value = struct.pack(">HHii", 0x3F0B, 8, 24, 1)
+    value += struct.pack(">HHq", 0x3F0C, 8, 0)
+    value += struct.pack(">HHq", 0x3F0D, 8, duration)
+    value += struct.pack(">HHI", 0x3F05, 4, edit_unit_byte_count)
+    value += struct.pack(">HHI", 0x3F06, 4, 1)
+    value += struct.pack(">HHI", 0x3F07, 4, 1)
+    if offsets:
+        entries = b"".join(struct.pack(">bbBQ", 0, 0, 0x80, o) for o in offsets)
+        value += struct.pack(">HHII", 0x3F0A, 8 + len(entries), len(offsets), 11)
+        value += entries
+    return klv(INDEX_SEGMENT_UL, value)
+
+
+def triplet(frame):
+    """Encrypted triplet (ST 429-6), encrypted value is not meaningful."""
+    value = klv(b"", bytes(16))
+    value += klv(b"", struct.pack(">Q", 0))
+    value += klv(b"", PICTURE_UL)
+    value += klv(b"", struct.pack(">Q", len(frame)))
+    value += klv(b"", os.urandom(32 + len(frame) + 16 - len(frame) % 16))
+    return klv(ENCRYPTED_TRIPLET_UL, value)
+
+
+def make_mxf(frames, extra_entries=0, cbr=False, encrypted=False):
+    """Build a minimal OP-Atom like MXF file.
+
+    Returns:
+        Tuple (file content, list of essence KLV file offsets).
+
+    """
+    header_metadata = klv(FILL_UL, bytes(100))
+    essence = b""
+    offsets = []
+    for frame in frames:
+        offsets.append(len(essence))
+        essence += triplet(frame) if encrypted else klv(PICTURE_UL, frame)
+
+    if cbr:
+        segment = index_segment([], len(frames), len(essence) // len(frames))
+    else:
+        stream_offsets = offsets + [len(essence)] * extra_entries
+        segment = index_segment(stream_offsets, len(stream_offsets))
+
+    header_size = len(partition_pack(2, 0, 0, 0, 0, 0, (0, 0)))
+    body_offset = header_size + len(header_metadata)
+    body_size = len(partition_pack(3, 0, 0, 0, 0, 0, (0, 1)))
+    footer_offset = body_offset + body_size + len(essence)
+
+    header = partition_pack(2, 0, 0, footer_offset, len(header_metadata), 0, (0, 0))
+    body = partition_pack(3, body_offset, 0, footer_offset, 0, 0, (0, 1))
+    footer = partition_pack(
+        4, footer_offset, body_offset, footer_offset, 0, len(segment), (1, 0)
+    )
+
+    rip_entries = struct.pack(">IQ", 0, 0)
+    rip_entries += struct.pack(">IQ", 1, body_offset)
+    rip_entries += struct.pack(">IQ", 0, footer_offset)
+    rip_size = 16 + 4 + len(rip_entries) + 4
+    rip = klv(RIP_UL, rip_entries + struct.pack(">I", rip_size))
+
+    content = header + header_metadata + body + essence + footer + segment + rip
+    file_offsets = [body_offset + body_size + o for o in offsets]
+    return content, file_offsets
+
+
+class MXFTest(unittest.TestCase):
+    frames = [os.urandom(1000 + i * 10) for i in range(24)]
+
+    def write_mxf(self, folder, content):
+        path = os.path.join(folder, "file.mxf")
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_ber_length(self):
+        self.assertEqual(decode_ber_length(b"\x10"), (16, 1))
+        self.assertEqual(decode_ber_length(b"\x83\x00\x01\x00"), (256, 4))
+        with self.assertRaises(MXFException):
+            decode_ber_length(b"\x84\x00")
+
+    def test_partitions(self):
+        content, _ = make_mxf(self.frames)
+        with temporary_dir() as tmp:
+            path = self.write_mxf(tmp, content)
+            with MXFFile(path) as mxf:
+                partitions = mxf.list_partitions()
+                self.assertEqual(
+                    [p["kind"] for p in partitions], ["header", "body", "footer"]
+                )
+                self.assertEqual(partitions[0]["status"], "closed complete")
+                self.assertEqual(len(mxf.read_rip()), 3)
+
+                segments = mxf.read_index_segments(partitions[-1])
+                self.assertEqual(len(segments), 1)
+                self.assertEqual(segments[0]["duration"], 24)
+                self.assertEqual(segments[0]["edit_rate"], (24, 1))
+
+    def test_scan_valid(self):
+        for cbr in [False, True]:
+            frames = self.frames if not cbr else [os.urandom(1000)] * 24
+            content, _ = make_mxf(frames, cbr=cbr)
+            with temporary_dir() as tmp:
+                scan = scan_mxf(self.write_mxf(tmp, content))
+                self.assertTrue(scan["valid"], scan["errors"])
+                self.assertEqual(scan["edit_units"], 24)
+                self.assertEqual(scan["partitions"], 3)
+
+    def test_scan_truncated(self):
+        content, _ = make_mxf(self.frames)
+        with temporary_dir() as tmp:
+            scan = scan_mxf(self.write_mxf(tmp, content[: len(content) // 2]))
+            self.assertFalse(scan["valid"])
+            self.assertIn("truncated", scan["errors"][0])
+
+    def test_scan_missing_essence(self):
+        # Index lists edit units that are not in the essence container
+        content, _ = make_mxf(self.frames, extra_entries=2)
+        with temporary_dir() as tmp:
+            scan = scan_mxf(self.write_mxf(tmp, content))
+            self.assertFalse(scan["valid"])
+            self.assertEqual(len(scan["errors"]), 2)
+
+    def test_scan_corrupt_length(self):
+        content, offsets = make_mxf(self.frames)
+        content = bytearray(content)
+        # Essence KLV length overflowing the next edit unit
+        content[offsets[5] + 17 : offsets[5] + 20] = (5000).to_bytes(3, "big")
+        with temporary_dir() as tmp:
+            scan = scan_mxf(self.write_mxf(tmp, bytes(content)))
+            self.assertFalse(scan["valid"])
+            self.assertEqual(len(scan["errors"]), 1)
+            self.assertIn("Edit unit 5", scan["errors"][0])
+
+    def test_scan_not_mxf(self):
+        with temporary_dir() as tmp:
+            scan = scan_mxf(self.write_mxf(tmp, os.urandom(4096)))
+            self.assertFalse(scan["valid"])
+
+    def test_edit_unit_sizes(self):
+        for cbr in [False, True]:
+            frames = self.frames if not cbr else [os.urandom(1000)] * 24
+            content, _ = make_mxf(frames, cbr=cbr)
+            with temporary_dir() as tmp:
+                sizes, edit_rate = mxf_edit_unit_sizes(self.write_mxf(tmp, content))
+                self.assertEqual(edit_rate, (24, 1))
+                self.assertEqual(sizes.tolist(), [len(f) for f in frames])
+
+        # Encryption overhead is measured on the first frame
+        frames = [os.urandom(1600)] * 24
+        content, _ = make_mxf(frames, encrypted=True)
+        with temporary_dir() as tmp:
+            sizes, _ = mxf_edit_unit_sizes(self.write_mxf(tmp, content))
+            self.assertEqual(sizes.tolist(), [len(f) for f in frames])
+            scan = scan_mxf(os.path.join(tmp, "file.mxf"))
+            self.assertTrue(scan["valid"], scan["errors"])
+
+    def test_bitrate_stats(self):
+        sizes = np.full(48, 1000000)
+        sizes[30] = 1500000
+        stats = bitrate_stats(sizes, (24, 1))
+        self.assertEqual(stats["FrameCount"], 48)
+        self.assertEqual(stats["MaxFrameSize"], 1500000)
+        self.assertEqual(stats["MaxBitRate"], 288.0)
+        self.assertEqual(stats["MaxBitRateTimeCode"], "00:00:01:06")
+        self.assertEqual(stats["PercentileBitRate"]["P50"], 192.0)
+        self.assertEqual(stats["PeakBitRate"], 196.0)
+
+        bitrates = sizes * 8 * 24 / 1e6
+        self.assertEqual(bitrate_violations(bitrates, 250), [(30, 1, 288.0)])
+        self.assertEqual(bitrate_violations(bitrates, 300), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
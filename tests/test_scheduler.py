@@ -0,0 +1,153 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import tempfile
+import threading
+
+from clairmeta.utils.file import shaone_b64, temporary_dir, AggregateProgress
+from clairmeta.utils.scheduler import DeviceScheduler, device_of, mount_point
+
+
+class SchedulerTest(unittest.TestCase):
+    def write_files(self, folder, sizes):
+        paths = []
+        for i, size in enumerate(sizes):
+            path = os.path.join(folder, "file_{}".format(i))
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            paths.append(path)
+        return paths
+
+    def test_largest_first(self):
+        with temporary_dir() as tmp:
+            paths = self.write_files(tmp, [10, 3000, 200, 40000])
+            order = []
+
+            def process(path, callback):
+                order.append(path)
+                return shaone_b64(path, callback)
+
+            with DeviceScheduler(1) as scheduler:
+                futures = scheduler.submit(process, paths)
+
+            self.assertEqual(order, [paths[3], paths[1], paths[2], paths[0]])
+            for path, future in futures.items():
+                self.assertEqual(future.result(), shaone_b64(path))
+
+    def test_readers_per_device(self):
+        with temporary_dir() as tmp:
+            paths = self.write_files(tmp, [100] * 8)
+            lock = threading.Lock()
+            running = [0, 0]
+
+            def process(path, callback):
+                with lock:
+                    running[0] += 1
+                    running[1] = max(running)
+                threading.Event().wait(0.02)
+                with lock:
+                    running[0] -= 1
+
+            with DeviceScheduler(2) as scheduler:
+                scheduler.submit(process, paths)
+            self.assertEqual(running[1], 2)
+
+    def test_device_progress(self):
+        with temporary_dir() as tmp:
+            paths = self.write_files(tmp, [1000, 2000])
+            progress = []
+
+            def callback(*args):
+                progress.append(args)
+
+            with DeviceScheduler(device_callback=callback) as scheduler:
+                scheduler.submit(
+                    lambda path, callback: shaone_b64(path, callback), paths
+                )
+
+            stats = scheduler.progress.devices[device_of(tmp)]
+            self.assertEqual(stats["files"], 2)
+            self.assertEqual(stats["processed"], 3000)
+            self.assertEqual(progress[-1][:3], (mount_point(tmp), 3000, 3000))
+
+    def test_file_callback(self):
+        with temporary_dir() as tmp:
+            paths = self.write_files(tmp, [100] * 8)
+            lock = threading.Lock()
+            overlaps = []
+
+            def file_callback(*args):
+                overlaps.append(not lock.acquire(blocking=False))
+                threading.Event().wait(0.005)
+                lock.release()
+
+            progress = AggregateProgress(lambda *args: None, tmp, 800)
+            with DeviceScheduler(4, file_callback) as scheduler:
+                scheduler.submit(
+                    lambda path, callback: [
+                        callback(path, i * 50, 100, 0) or progress(path, i * 50, 100, 0)
+                        for i in range(3)
+                    ],
+                    paths,
+                )
+
+            self.assertTrue(overlaps)
+            self.assertFalse(any(overlaps))
+            self.assertEqual(progress.processed, 800)
+
+    def test_exception(self):
+        with temporary_dir() as tmp:
+            paths = self.write_files(tmp, [10])
+
+            def process(path, callback):
+                raise ValueError(path)
+
+            with DeviceScheduler() as scheduler:
+                futures = scheduler.submit(process, paths)
+            with self.assertRaises(ValueError):
+                futures[paths[0]].result()
+
+    def test_shutdown_cancel(self):
+        with temporary_dir() as tmp:
+            paths = self.write_files(tmp, [400, 300, 200, 100])
+            started = threading.Event()
+            release = threading.Event()
+
+            def process(path, callback):
+                started.set()
+                release.wait(5)
+
+            scheduler = DeviceScheduler(1)
+            futures = scheduler.submit(process, paths)
+            started.wait(5)
+            # Pending files are cancelled before the running one completes
+            threading.Timer(0.05, release.set).start()
+            scheduler.shutdown(cancel_futures=True)
+
+            self.assertFalse(futures[paths[0]].cancelled())
+            self.assertTrue(all(futures[p].cancelled() for p in paths[1:]))
+
+    def test_multiple_devices(self):
+        shm = "/dev/shm"
+        if not os.path.isdir(shm) or device_of(shm) == device_of(tempfile.gettempdir()):
+            self.skipTest("Requires two distinct file systems")
+
+        with temporary_dir() as tmp, tempfile.TemporaryDirectory(dir=shm) as tmp_shm:
+            paths = self.write_files(tmp, [100]) + self.write_files(tmp_shm, [100])
+            barrier = threading.Barrier(2, timeout=5)
+
+            # Both devices are read at the same time, even with one reader
+            def process(path, callback):
+                barrier.wait()
+
+            with DeviceScheduler(1) as scheduler:
+                futures = scheduler.submit(process, paths)
+            for future in futures.values():
+                future.result()
+            self.assertEqual(len(scheduler.progress.devices), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
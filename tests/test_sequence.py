@@ -7,6 +7,9 @@ import os
 from clairmeta import Sequence
 from clairmeta.logger import disable_log
 from clairmeta.settings import SEQUENCE_SETTINGS
+from clairmeta.sequence_check import check_sequence
+from clairmeta.utils.file import temporary_dir, parse_name
+from clairmeta.utils.sequence import parse_names
 
 
 class SequenceTestBase(unittest.TestCase):
@@ -88,5 +91,51 @@ class CheckTest(SequenceTestBase):
         self.assertTrue(self.check_dcdm("DCDM"))
 
 
+class SequenceErrorsTest(unittest.TestCase):
+    def make_sequence(self, path, files):
+        os.makedirs(path)
+        for name, size in files:
+            with open(os.path.join(path, name), "wb") as f:
+                f.write(b"\0" * size)
+
+    def test_parse_names(self):
+        files = ["a.0001.tiff", "a_b.01.tif", "a.tiff", "12.dpx", "v2.f_0001.tif"]
+        names, indexes, valid = parse_names(files)
+
+        for f, name, index, is_valid in zip(files, names, indexes, valid):
+            if is_valid:
+                self.assertEqual(parse_name(f), (name, index))
+            else:
+                with self.assertRaises(ValueError):
+                    parse_name(f)
+
+    def test_all_errors_reported(self):
+        files = {"seq.{:04d}.tiff".format(i): 1000 for i in range(20)}
+        for i in [3, 15, 16, 17]:
+            del files["seq.{:04d}.tiff".format(i)]
+        files["seq.0010.tiff"] = 2000
+        files["seq_b.0020.tiff"] = 1000
+
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DSM")
+            self.make_sequence(os.path.join(path, "R1"), files.items())
+            self.make_sequence(os.path.join(path, "R2"), [("seq.0000.tiff", 10)])
+            self.make_sequence(os.path.join(path, "IGNORED"), [("a.txt", 1)])
+
+            with self.assertRaises(ValueError) as cm:
+                check_sequence(path, {".tiff": {}}, ignore_dirs=["IGNORED"])
+
+        self.assertEqual(
+            str(cm.exception).split("\n"),
+            [
+                "DSM/R1 - Filename difference, seq_b but expected seq",
+                "DSM/R1 - seq.0010.tiff : file size difference got 2000 but "
+                "expected 1000 - tolerance of 2.5%",
+                "DSM/R1 - File sequence jump found, file 3 not found",
+                "DSM/R1 - File sequence jump found, files 15 to 17 not found",
+            ],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
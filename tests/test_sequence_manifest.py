@@ -0,0 +1,127 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import hashlib
+from unittest import mock
+
+from clairmeta.exception import ManifestException
+from clairmeta.logger import disable_log
+from clairmeta.sequence_manifest import make_manifest, verify_manifest, read_manifest
+from clairmeta.utils.file import temporary_dir
+
+
+class SequenceManifestTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(SequenceManifestTest, self).__init__(*args, **kwargs)
+        disable_log()
+
+    def make_sequence(self, path, frames=30):
+        for reel in ["R1", "R2"]:
+            os.makedirs(os.path.join(path, reel))
+            for i in range(frames):
+                file_path = os.path.join(path, reel, "seq.{:06d}.dpx".format(i))
+                with open(file_path, "wb") as f:
+                    f.write(os.urandom(4096))
+
+    def test_make_manifest(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DSM")
+            self.make_sequence(path)
+
+            for manifest_format, algorithm in [("mhl", "md5"), ("text", "sha1")]:
+                manifest = os.path.join(path, "DSM.{}".format(algorithm))
+                digests = make_manifest(
+                    path, manifest, algorithm, manifest_format, jobs=4
+                )
+                self.assertEqual(len(digests), 60)
+
+                with open(os.path.join(path, "R2", "seq.000010.dpx"), "rb") as f:
+                    expected = hashlib.new(algorithm, f.read()).hexdigest()
+                self.assertEqual(digests["R2/seq.000010.dpx"], expected)
+
+                read_algorithm, entries = read_manifest(manifest)
+                self.assertEqual(read_algorithm, algorithm)
+                self.assertEqual({k: v["digest"] for k, v in entries.items()}, digests)
+                os.remove(manifest)
+
+            with self.assertRaises(ManifestException):
+                make_manifest(path, os.path.join(tmp, "DSM.md4"), "md4")
+
+    def test_make_manifest_progress(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DSM")
+            self.make_sequence(path)
+            calls = []
+            make_manifest(
+                path,
+                os.path.join(tmp, "DSM.mhl"),
+                callback=lambda *args: calls.append(args),
+                jobs=4,
+            )
+
+            # Aggregate progression of the whole sequence, completed once
+            total = 60 * 4096
+            self.assertEqual({c[0] for c in calls}, {path})
+            self.assertEqual([c[1] for c in calls], sorted(c[1] for c in calls))
+            self.assertEqual([c[1:3] for c in calls if c[1] == total], [(total, total)])
+
+    def test_verify_manifest(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DSM")
+            manifest = os.path.join(tmp, "DSM.mhl")
+            self.make_sequence(path)
+            make_manifest(path, manifest)
+
+            result = verify_manifest(path, manifest, jobs=4)
+            self.assertEqual(result["verified"], 60)
+            self.assertEqual(result["mismatch"] + result["missing"], [])
+
+            with open(os.path.join(path, "R1", "seq.000005.dpx"), "r+b") as f:
+                f.write(b"corrupted")
+            os.remove(os.path.join(path, "R2", "seq.000029.dpx"))
+            with open(os.path.join(path, "R2", "extra.txt"), "w") as f:
+                f.write("extra")
+
+            result = verify_manifest(path, manifest)
+            self.assertEqual(result["mismatch"], ["R1/seq.000005.dpx"])
+            self.assertEqual(result["missing"], ["R2/seq.000029.dpx"])
+            self.assertEqual(result["extra"], ["R2/extra.txt"])
+
+    def test_verify_resume(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "DSM")
+            manifest = os.path.join(tmp, "DSM.md5")
+            journal = os.path.join(tmp, "DSM.journal")
+            self.make_sequence(path, frames=10)
+            make_manifest(path, manifest, manifest_format="text")
+
+            # Verification interrupted after the first reel
+            with open(manifest) as f:
+                lines = f.readlines()
+            partial = os.path.join(tmp, "R1.md5")
+            with open(partial, "w") as f:
+                f.writelines(line for line in lines if "R1/" in line)
+            with mock.patch("os.fsync", wraps=os.fsync) as fsync:
+                verify_manifest(path, partial, journal_path=journal)
+            # Records are flushed in batch, once on close at least
+            self.assertEqual(fsync.call_count, 1)
+
+            result = verify_manifest(path, manifest, journal_path=journal)
+            self.assertEqual((result["verified"], result["resumed"]), (20, 10))
+            self.assertEqual(result["mismatch"], [])
+
+            # Modified files are verified again
+            file_path = os.path.join(path, "R1", "seq.000000.dpx")
+            with open(file_path, "r+b") as f:
+                f.write(b"corrupted")
+            mtime = os.path.getmtime(file_path) + 10
+            os.utime(file_path, (mtime, mtime))
+            result = verify_manifest(path, manifest, journal_path=journal)
+            self.assertEqual(result["resumed"], 19)
+            self.assertEqual(result["mismatch"], ["R1/seq.000000.dpx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
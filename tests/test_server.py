@@ -0,0 +1,95 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from tests import DCP_MAP
+from clairmeta.logger import disable_log
+from clairmeta.server import JobServer, make_server
+from clairmeta.utils.file import disable_hash_cache
+
+
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        disable_log()
+        cls.job_server = JobServer(jobs=2, queue_size=8)
+        cls.job_server.start()
+        cls.server = make_server(cls.job_server, port=0)
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.job_server.stop()
+        disable_hash_cache()
+
+    def get_dcp_path(self, dcp_id):
+        if dcp_id in DCP_MAP:
+            dcp_folder = os.path.join(
+                os.path.dirname(__file__), "resources", "DCP", "ECL-SET"
+            )
+            folder_path = os.path.join(dcp_folder, DCP_MAP[dcp_id])
+            self.assertTrue(os.path.exists(folder_path))
+            return folder_path
+
+    def request(self, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        try:
+            with urllib.request.urlopen(self.url + path, data=data) as r:
+                return r.status, json.load(r)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_status(self):
+        code, status = self.request("/status")
+        self.assertEqual(code, 200)
+        self.assertEqual(status["jobs"], 2)
+        self.assertEqual(status["queue_size"], 8)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.request("/unknown", {})[0], 404)
+        self.assertEqual(self.request("/jobs/unknown")[0], 404)
+        self.assertEqual(self.request("/check", {})[0], 400)
+        self.assertEqual(self.request("/check", ["path"])[0], 400)
+
+    def test_probe(self):
+        code, job = self.request("/probe", {"path": self.get_dcp_path(1)})
+        self.assertEqual(code, 202)
+
+        self.job_server.get(job["id"]).done.wait()
+        code, job = self.request("/jobs/{}".format(job["id"]))
+        self.assertEqual(code, 200)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"]["type"], "DCP")
+
+    def test_probe_failure(self):
+        code, job = self.request("/probe", {"path": "/not/a/dcp", "wait": True})
+        self.assertEqual(code, 200)
+        self.assertEqual(job["status"], "failed")
+        self.assertTrue(job["error"])
+
+    def test_check(self):
+        params = {"path": self.get_dcp_path(25), "wait": True}
+        code, job = self.request("/check", params)
+        self.assertEqual(code, 200)
+        self.assertEqual(job["status"], "done")
+        self.assertFalse(job["result"]["status"])
+        self.assertTrue(job["result"]["report"]["checks"])
+
+        # Same package, assets hash are retrieved from cache
+        code, job = self.request("/check", params)
+        self.assertEqual(job["status"], "done")
+        self.assertGreater(self.request("/status")[1]["cache"]["hash"]["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import time
+import datetime
+import threading
+
+from clairmeta.utils.file import shaone_b64, temporary_dir
+from clairmeta.utils.throttle import (
+    TokenBucket,
+    ReadLimiter,
+    configure_io,
+    io_context,
+    bind_io_context,
+    get_read_limiter,
+    get_read_mode,
+    use_idle_priority,
+)
+
+
+class ThrottleTest(unittest.TestCase):
+    def tearDown(self):
+        configure_io(None)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(1e6)
+
+        start = time.monotonic()
+        # First second worth of tokens is available immediately
+        for _ in range(5):
+            bucket.consume(0.2e6)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        bucket.consume(0.2e6)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_token_bucket_shared(self):
+        bucket = TokenBucket(1e6, capacity=1)
+
+        def consume():
+            for _ in range(5):
+                bucket.consume(0.02e6)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=consume) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 0.3 MB at 1 MB/s for all threads
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_token_bucket_cancel(self):
+        bucket = TokenBucket(1, capacity=1)
+        cancel = threading.Event()
+        cancel.set()
+
+        start = time.monotonic()
+        bucket.consume(1e6, cancel)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_schedule(self):
+        limiter = ReadLimiter(
+            100,
+            [
+                {"start": "08:00", "end": "12:00", "read_limit": 10},
+                {"start": "22:00", "end": "06:00", "read_limit": 0},
+            ],
+        )
+        self.assertEqual(limiter.current_limit(datetime.time(9, 0)), 10)
+        self.assertEqual(limiter.current_limit(datetime.time(12, 0)), 100)
+        self.assertEqual(limiter.current_limit(datetime.time(23, 0)), 0)
+        self.assertEqual(limiter.current_limit(datetime.time(3, 0)), 0)
+
+        with self.assertRaises(ValueError):
+            ReadLimiter(10, [{"start": "25:00", "end": "06:00"}])
+
+    def test_configure_io(self):
+        configure_io({"read_limit": 0, "read_schedule": [], "idle_priority": True})
+        self.assertIsNone(get_read_limiter())
+        self.assertTrue(use_idle_priority())
+
+        configure_io({"read_limit": 10})
+        self.assertEqual(get_read_limiter().read_limit, 10)
+        self.assertFalse(use_idle_priority())
+
+    def test_io_context(self):
+        configure_io({"read_mode": "fadvise"})
+        results = {}
+
+        def check(name, settings, barrier):
+            with io_context(settings):
+                barrier.wait()
+                worker = threading.Thread(
+                    target=bind_io_context(
+                        lambda: results.setdefault(name, get_read_limiter())
+                    )
+                )
+                worker.start()
+                worker.join()
+                self.assertEqual(get_read_mode(), settings["read_mode"])
+
+        barrier = threading.Barrier(2)
+        threads = [
+            threading.Thread(
+                target=check,
+                args=(limit, {"read_limit": limit, "read_mode": "direct"}, barrier),
+            )
+            for limit in [10, 20]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            {k: v.read_limit for k, v in results.items()}, {10: 10, 20: 20}
+        )
+        # Process wide settings are restored
+        self.assertIsNone(get_read_limiter())
+        self.assertEqual(get_read_mode(), "fadvise")
+
+        # Bandwidth is shared by concurrent contexts with the same settings
+        with io_context({"read_limit": 10}):
+            limiter = get_read_limiter()
+        with io_context({"read_limit": 10, "read_mode": "direct"}):
+            self.assertIs(get_read_limiter(), limiter)
+            self.assertIs(get_read_limiter(), results[10])
+
+    def test_hash_throttled(self):
+        with temporary_dir() as tmp:
+            path = os.path.join(tmp, "file")
+            with open(path, "wb") as f:
+                f.write(os.urandom(1024 * 1024))
+
+            # 0.5 MB burst then 0.5 MB/s, about one second for 1 MiB
+            configure_io({"read_limit": 0.5})
+            start = time.monotonic()
+            shaone_b64(path)
+            self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+# Clairmeta - (C) YMAGIS S.A.
+# See LICENSE for more information
+
+import unittest
+import os
+import time
+import shutil
+import threading
+from unittest import mock
+
+from tests import DCP_MAP
+from clairmeta.logger import disable_log
+from clairmeta.profile import get_default_profile
+from clairmeta.watch import FolderWatcher
+from clairmeta.utils.file import temporary_dir, disable_hash_cache
+
+
+class WatchTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(WatchTest, self).__init__(*args, **kwargs)
+        disable_log()
+        self.profile = get_default_profile()
+        self.results = []
+
+    def tearDown(self):
+        disable_hash_cache()
+
+    def get_dcp_path(self, dcp_id):
+        if dcp_id in DCP_MAP:
+            dcp_folder = os.path.join(
+                os.path.dirname(__file__), "resources", "DCP", "ECL-SET"
+            )
+            folder_path = os.path.join(dcp_folder, DCP_MAP[dcp_id])
+            self.assertTrue(os.path.exists(folder_path))
+            return folder_path
+
+    def on_checked(self, path, status, report):
+        self.results.append((os.path.basename(path), status))
+
+    def watch(self, root, use_inotify):
+        return FolderWatcher(
+            root,
+            self.on_checked,
+            self.profile,
+            settle_time=0,
+            poll_interval=0.1,
+            use_inotify=use_inotify,
+        )
+
+    def step_until_checked(self, watcher, count):
+        for _ in range(100):
+            watcher.step()
+            if len(self.results) >= count:
+                break
+            time.sleep(0.05)
+
+    def run_watch(self, use_inotify):
+        dcp_path = self.get_dcp_path(11)
+        dcp_name = os.path.basename(dcp_path)
+
+        with temporary_dir() as root:
+            watcher = self.watch(root, use_inotify)
+            watcher.step()
+            self.assertEqual(self.results, [])
+
+            shutil.copytree(dcp_path, os.path.join(root, dcp_name))
+            self.step_until_checked(watcher, 1)
+            self.assertEqual(self.results, [(dcp_name, True)])
+
+            # No change, no new check
+            watcher.step()
+            self.assertEqual(len(self.results), 1)
+
+            # Modified package is checked again
+            mxf = [f for f in os.listdir(dcp_path) if f.endswith(".mxf")][0]
+            with open(os.path.join(root, dcp_name, mxf), "ab") as f:
+                f.write(b"\0")
+            watcher.wait()
+            self.step_until_checked(watcher, 2)
+            self.assertEqual(self.results[-1], (dcp_name, False))
+
+            watcher.close()
+
+    def test_watch_polling(self):
+        self.run_watch(use_inotify=False)
+
+    def test_watch_inotify(self):
+        self.run_watch(use_inotify=True)
+
+    def test_watch_incomplete(self):
+        with temporary_dir() as root:
+            os.makedirs(os.path.join(root, "DCP"))
+            with open(os.path.join(root, "DCP", "video.mxf"), "wb") as f:
+                f.write(b"\0" * 1024)
+
+            watcher = self.watch(root, use_inotify=False)
+            watcher.step()
+            watcher.step()
+            watcher.close()
+
+            # No AssetMap received yet
+            self.assertEqual(self.results, [])
+
+    def test_watch_inotify_events(self):
+        with temporary_dir() as root:
+            os.makedirs(os.path.join(root, "DCP"))
+            watcher = FolderWatcher(root, settle_time=60, poll_interval=0.3)
+            if not watcher.inotify:
+                watcher.close()
+                self.skipTest("Inotify not available")
+
+            watcher.step()
+            state = watcher.packages[os.path.join(root, "DCP")]
+            last_update = state.last_update
+
+            # Events are drained until the next polling time
+            stop = threading.Event()
+
+            def write():
+                with open(os.path.join(root, "DCP", "video.mxf"), "wb") as f:
+                    while not stop.wait(0.01):
+                        f.write(b"\0" * 1024)
+                        f.flush()
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            try:
+                start = time.monotonic()
+                watcher.wait()
+                self.assertGreaterEqual(time.monotonic() - start, 0.25)
+            finally:
+                stop.set()
+                writer.join()
+            self.assertEqual(watcher._dirty, {os.path.join(root, "DCP")})
+
+            # Only modified packages are scanned again
+            os.makedirs(os.path.join(root, "OTHER"))
+            watcher.step()
+            self.assertNotEqual(state.last_update, last_update)
+            other = watcher.packages[os.path.join(root, "OTHER")]
+            last_update = other.last_update
+            watcher.step()
+            self.assertEqual(other.last_update, last_update)
+            watcher.close()
+
+    def test_watch_inotify_unsupported(self):
+        with temporary_dir() as root:
+            with mock.patch("clairmeta.watch.sys.platform", "win32"):
+                watcher = self.watch(root, use_inotify=True)
+            self.assertIsNone(watcher.inotify)
+            watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,11 +3,23 @@
 
 import unittest
 import os
+import threading
 
-from clairmeta.utils.xml import parse_xml
+from clairmeta.utils.file import temporary_dir
+from clairmeta.utils.xml import parse_xml, xml_root_name, validate_xml, get_xsd_schema
 from clairmeta.utils.sys import remove_key_dict
 
 
+SUBTITLE = """<?xml version="1.0" encoding="UTF-8"?>
+<DCSubtitle Version="1.0">
+  <SubtitleID>{}</SubtitleID>
+  <MovieTitle>Movie</MovieTitle>
+  <ReelNumber>1</ReelNumber>
+  <Language>en</Language>
+</DCSubtitle>
+"""
+
+
 class ParseTest(unittest.TestCase):
     def get_file_path(self, name):
         file_path = os.path.join(os.path.dirname(__file__), "resources", "XML", name)
@@ -25,6 +37,48 @@ class ParseTest(unittest.TestCase):
         xml_with_attrib = remove_key_dict(xml_with_attrib, ["@"])
         self.assertEqual(xml_with_attrib, xml_without_attrib)
 
+    def test_root_name(self):
+        self.assertEqual(
+            xml_root_name(self.get_file_path("CPL_SMPTE.xml")), "CompositionPlaylist"
+        )
+        self.assertIsNone(xml_root_name(__file__))
+
+
+class ValidateTest(unittest.TestCase):
+    def test_validate_concurrent(self):
+        xsd_id = "interop_subtitle"
+        results = {}
+
+        def validate(name, path):
+            for _ in range(10):
+                try:
+                    validate_xml(path, xsd_id)
+                    results[name] = None
+                except Exception as e:
+                    results[name] = str(e)
+            results[name, "schema"] = get_xsd_schema(xsd_id)
+
+        with temporary_dir() as tmp:
+            threads = []
+            for name, uuid in [
+                ("valid", "5b9e5b2c-3a45-4b1c-9d2e-6f7a8b9c0d1e"),
+                ("invalid", "not-an-uuid"),
+            ]:
+                path = os.path.join(tmp, name + ".xml")
+                with open(path, "w") as f:
+                    f.write(SUBTITLE.format(uuid))
+                threads.append(threading.Thread(target=validate, args=(name, path)))
+
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertIsNone(results["valid"])
+        self.assertIn("SubtitleID", results["invalid"])
+        # Schemas are compiled per thread
+        self.assertIsNot(results["valid", "schema"], results["invalid", "schema"])
+
 
 if __name__ == "__main__":
     unittest.main()